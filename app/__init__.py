@@ -6,14 +6,42 @@ import os
 db = SQLAlchemy()
 migrate = Migrate()
 
-from app.models import Lernfeld  # Für den Kontextprozessor
+from app.referenzdaten import referenzdaten  # Für den Kontextprozessor
 
-def create_app():
+def create_app(config=None):
+    """``config`` überschreibt Werte aus instance/config.py (Benchmarks, Skripte)."""
     app = Flask(__name__, instance_relative_config=True)
     app.config.from_pyfile("config.py")
+    if config:
+        app.config.update(config)
+
+    from . import datenbank
+    datenbank.standardwerte_setzen(app)
 
     db.init_app(app)
-    migrate.init_app(app, db)
+    # Die FTS-Tabellen legt app.volltext per DDL an – Autogenerate soll sie ignorieren
+    from .volltext import fuer_migration
+    migrate.init_app(app, db, include_name=fuer_migration)
+    datenbank.init_app(app)
+
+    # Laufzeitmessung (Server-Timing, /metrics) – nur mit MESSUNG_AKTIV
+    from . import messung
+    messung.init_app(app)
+
+    from . import (wochenplan, anwesenheit, live, volltext, jobs, berichte, personenimport, export,
+                   httpcache, assets, kompression, vorlagen)
+    wochenplan.init_app(app)
+    anwesenheit.init_app(app)
+    live.init_app(app)
+    volltext.init_app(app)
+    jobs.init_app(app)
+    berichte.init_app(app)
+    export.init_app(app)
+    httpcache.init_app(app)
+    assets.init_app(app)
+    kompression.init_app(app)
+    vorlagen.init_app(app)
+    # personenimport hat kein init_app – der Import registriert seinen Job
 
     # ── Hier die Blueprints importieren und registrieren ──
     from .routes.personen    import bp as personen_bp
@@ -21,17 +49,31 @@ def create_app():
     from .routes.kurse       import bp as kurse_bp       # neu
     from .routes.lernfelder  import bp as lernfelder_bp
     from .routes.leistung import bp as leistung_bp
+    from .routes.dashboard import bp as dashboard_bp
+    from .routes.suche import bp as suche_bp
+    from .routes.berichte import bp as berichte_bp
+    from .routes.jobs import bp as jobs_bp
+    from .routes.export import bp as export_bp
 
     app.register_blueprint(personen_bp)
     app.register_blueprint(freiarbeit_bp)
     app.register_blueprint(kurse_bp)       # neu
     app.register_blueprint(lernfelder_bp)
     app.register_blueprint(leistung_bp)
+    app.register_blueprint(dashboard_bp)
+    app.register_blueprint(suche_bp)
+    app.register_blueprint(berichte_bp)
+    app.register_blueprint(jobs_bp)
+    app.register_blueprint(export_bp)
 
     # Kontextprozessor für Lernfelder in Templates
     @app.context_processor
     def inject_lernfelder():
-        return dict(lernfelder=Lernfeld.query.order_by(Lernfeld.name).all())
+        return dict(lernfelder=referenzdaten.lernfelder())
+
+    # Alle Templates jetzt übersetzen, nicht beim ersten Aufruf jeder Seite
+    if app.config["TEMPLATES_VORKOMPILIEREN"]:
+        vorlagen.vorkompilieren(app)
 
     return app
 
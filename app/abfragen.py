@@ -0,0 +1,28 @@
+from sqlalchemy.orm import joinedload
+
+from app import db
+from app.models import FreiarbeitEintrag, KursRueckmeldung, LeistungsRueckmeldung, Person
+
+# Wie Listen und Detailseiten ihre Daten laden.
+#
+# Die Beziehungen in den Models laden nur noch bei Bedarf (lazy="select");
+# wer verbundene Objekte braucht, fordert sie hier ausdrücklich an. Listen
+# und JSON-Antworten lesen nur die angezeigten Spalten (app/lesemodelle.py)
+# statt ganzer ORM-Objekte. So braucht jeder Endpunkt eine feste Zahl von
+# Abfragen, egal wie viele Zeilen er liefert (benchmarks/endpunkte.py prüft
+# das mit BUDGETS).
+
+# Ladeoptionen für die ORM-Abfragen der Detailseite
+EINTRAG_MIT_LERNFELD = joinedload(FreiarbeitEintrag.lernfeld)
+SITZUNG_MIT_LERNFELD = joinedload(KursRueckmeldung.lernfeld)
+RUECKMELDUNG_MIT_LERNFELD = joinedload(LeistungsRueckmeldung.lernfeld)
+PERSON_MIT_GRUPPE = joinedload(Person.lerngruppe_obj)
+
+
+def person_mit_gruppe(person_id):
+    """Person samt Lerngruppe in einer Abfrage (oder None)."""
+    try:
+        person_id = int(person_id)
+    except (TypeError, ValueError):
+        return None
+    return db.session.get(Person, person_id, options=[PERSON_MIT_GRUPPE])
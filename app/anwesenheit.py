@@ -0,0 +1,238 @@
+from datetime import date, timedelta
+
+import click
+from flask import current_app
+from sqlalchemy import case, delete, func, or_, select, tuple_
+from sqlalchemy.dialects.sqlite import insert
+
+from app import db
+from app.models import AnwesenheitMonat, AnwesenheitWoche, KursRueckmeldung, KursTeilnahme, Person
+
+# Die Rollups zählen Kurs-Teilnahmen vor, damit Auswertungen und Warnungen
+# nur noch wenige Zeilen lesen statt die ganze Historie. Gepflegt werden sie
+# im Schreibpfad von app.kursdoku (gleiche Transaktion); nach Änderungen an
+# den Rohdaten an diesem vorbei hilft ``flask anwesenheit-aufbauen``.
+
+_MONAT = AnwesenheitMonat.__table__
+_WOCHE = AnwesenheitWoche.__table__
+
+STANDARD_WARNSCHWELLE = 3     # Fehlzeiten pro Monat, ab denen gewarnt wird
+
+
+def rollups_berechnen(zeilen):
+    """Faltet ``(person_id, lernfeld_id, lerngruppe_id, datum, anwesend, abwesend)``
+    zu den Zählern je Monat und je Woche.
+
+    Gibt zwei Dicts zurück: ``{(person, lernfeld, jahr, monat): [anw, abw, zuletzt_anwesend]}``
+    und ``{(lerngruppe, iso_jahr, kw): [anw, abw]}``.
+    """
+    monate, wochen = {}, {}
+    for person_id, lernfeld_id, lerngruppe_id, datum, anwesend, abwesend in zeilen:
+        # Alt-Daten ohne Lernfeld bzw. Lerngruppe fallen aus dem jeweiligen Rollup
+        if lernfeld_id is not None:
+            m = monate.setdefault((person_id, lernfeld_id, datum.year, datum.month), [0, 0, None])
+            m[0] += anwesend
+            m[1] += abwesend
+            if anwesend and (m[2] is None or datum > m[2]):
+                m[2] = datum
+        if lerngruppe_id is not None:
+            jahr, kw, _ = datum.isocalendar()
+            w = wochen.setdefault((lerngruppe_id, jahr, kw), [0, 0])
+            w[0] += anwesend
+            w[1] += abwesend
+    return monate, wochen
+
+
+def _hochzaehlen(connection, tabelle, schluessel, zaehler):
+    if not zaehler:
+        return
+    stmt = insert(tabelle)
+    spalten = ["anwesend", "abwesend"]
+    neu = {
+        "anwesend": tabelle.c.anwesend + stmt.excluded.anwesend,
+        "abwesend": tabelle.c.abwesend + stmt.excluded.abwesend,
+    }
+    if "zuletzt_anwesend" in tabelle.c:
+        spalten.append("zuletzt_anwesend")
+        # max(x, NULL) ist in SQLite NULL – beide Seiten mit coalesce absichern
+        alt, dazu = tabelle.c.zuletzt_anwesend, stmt.excluded.zuletzt_anwesend
+        neu["zuletzt_anwesend"] = func.max(func.coalesce(alt, dazu), func.coalesce(dazu, alt))
+    connection.execute(
+        stmt.on_conflict_do_update(index_elements=schluessel, set_=neu),
+        [{**dict(zip(schluessel, k)), **dict(zip(spalten, werte))} for k, werte in zaehler.items()],
+    )
+
+
+def _schreiben(connection, monate, wochen):
+    _hochzaehlen(connection, _MONAT, ["person_id", "lernfeld_id", "jahr", "monat"], monate)
+    _hochzaehlen(connection, _WOCHE, ["lerngruppe_id", "jahr", "kw"], wochen)
+
+
+def verbuchen(connection, teilnahmen):
+    """Zählt neue Teilnahmen ``(person_id, lernfeld_id, lerngruppe_id, datum, status)`` hoch."""
+    zeilen = (
+        (pid, lf, lg, datum, status == "anwesend", status == "abwesend")
+        for pid, lf, lg, datum, status in teilnahmen
+    )
+    _schreiben(connection, *rollups_berechnen(zeilen))
+
+
+def _rohdaten():
+    """Teilnahmen je Person, Lernfeld, Lerngruppe und Tag – Grundlage für den Neuaufbau."""
+    return (
+        select(
+            KursTeilnahme.person_id, KursRueckmeldung.lernfeld_id,
+            KursRueckmeldung.lerngruppe_id, KursRueckmeldung.datum,
+            func.sum(case((KursTeilnahme.status == "anwesend", 1), else_=0)),
+            func.sum(case((KursTeilnahme.status == "abwesend", 1), else_=0)),
+        )
+        .join(KursRueckmeldung, KursTeilnahme.rueckmeldung_id == KursRueckmeldung.id)
+        .group_by(
+            KursTeilnahme.person_id, KursRueckmeldung.lernfeld_id,
+            KursRueckmeldung.lerngruppe_id, KursRueckmeldung.datum,
+        )
+    )
+
+
+def neu_aufbauen(connection):
+    """Berechnet beide Rollups aus den Rohdaten neu. Gibt (monate, wochen) zurück."""
+    connection.execute(delete(_MONAT))
+    connection.execute(delete(_WOCHE))
+    monate, wochen = rollups_berechnen(connection.execute(_rohdaten()))
+    _schreiben(connection, monate, wochen)
+    return len(monate), len(wochen)
+
+
+# ── Auswertungen ──────────────────────────────────────────────────────────
+def _monatsende(tag):
+    return (tag.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+
+
+def anwesenheit_je_person(von=None, bis=None, lerngruppe_id=None):
+    """Anwesenheit je Person im Zeitraum ``von``–``bis`` (jeweils einschließlich).
+
+    Ganze Monate kommen aus dem Monats-Rollup; nur angeschnittene Monate am
+    Rand werden aus den Kurs-Teilnahmen dieser Tage gezählt – die Kosten
+    hängen also nicht von der Länge der Historie ab. Kurse ohne Lernfeld
+    zählen wie im Rollup nicht mit.
+
+    Liefert ``{person_id: [anwesend, gesamt, zuletzt_anwesend]}``.
+    """
+    # Erster und letzter ganz enthaltener Monat als (jahr, monat)
+    ab = None
+    if von is not None:
+        erster = von if von.day == 1 else _monatsende(von) + timedelta(days=1)
+        ab = (erster.year, erster.month)
+    bis_monat = None
+    if bis is not None:
+        letzter = bis if bis == _monatsende(bis) else bis.replace(day=1) - timedelta(days=1)
+        bis_monat = (letzter.year, letzter.month)
+
+    # Tage der angeschnittenen Randmonate
+    raender = set()
+    if von is not None and von.day != 1:
+        raender.add((von, min(_monatsende(von), bis or _monatsende(von))))
+    if bis is not None and bis != _monatsende(bis):
+        raender.add((max(bis.replace(day=1), von or bis.replace(day=1)), bis))
+
+    def nur_gruppe(query, spalte):
+        if not lerngruppe_id:
+            return query
+        return query.where(spalte.in_(select(Person.id).where(Person.lerngruppe_id == lerngruppe_id)))
+
+    ergebnis = {}
+
+    def addieren(pid, anwesend, abwesend, zuletzt):
+        e = ergebnis.setdefault(pid, [0, 0, None])
+        e[0] += anwesend or 0
+        e[1] += (anwesend or 0) + (abwesend or 0)
+        if zuletzt and (e[2] is None or zuletzt > e[2]):
+            e[2] = zuletzt
+
+    if ab is None or bis_monat is None or ab <= bis_monat:
+        monat = tuple_(AnwesenheitMonat.jahr, AnwesenheitMonat.monat)
+        query = (
+            select(AnwesenheitMonat.person_id, func.sum(AnwesenheitMonat.anwesend),
+                   func.sum(AnwesenheitMonat.abwesend), func.max(AnwesenheitMonat.zuletzt_anwesend))
+            .group_by(AnwesenheitMonat.person_id)
+        )
+        if ab is not None:
+            query = query.where(monat >= ab)
+        if bis_monat is not None:
+            query = query.where(monat <= bis_monat)
+        for zeile in db.session.execute(nur_gruppe(query, AnwesenheitMonat.person_id)):
+            addieren(*zeile)
+
+    if raender:
+        anwesend = KursTeilnahme.status == "anwesend"
+        query = (
+            select(
+                KursTeilnahme.person_id,
+                func.sum(case((anwesend, 1), else_=0)),
+                func.sum(case((KursTeilnahme.status == "abwesend", 1), else_=0)),
+                func.max(case((anwesend, KursRueckmeldung.datum))),
+            )
+            .join(KursRueckmeldung, KursTeilnahme.rueckmeldung_id == KursRueckmeldung.id)
+            .where(KursRueckmeldung.lernfeld_id.is_not(None))
+            .where(or_(*(KursRueckmeldung.datum.between(a, b) for a, b in raender)))
+            .group_by(KursTeilnahme.person_id)
+        )
+        for zeile in db.session.execute(nur_gruppe(query, KursTeilnahme.person_id)):
+            addieren(*zeile)
+    return ergebnis
+
+
+def fehlzeiten_warnungen(jahr, monat, schwelle=None, lerngruppe_id=None):
+    """Personen mit mehr als ``schwelle`` Fehlzeiten im Monat, absteigend sortiert.
+
+    Liefert ``[(person_id, abwesend, anwesend), …]`` aus dem Monats-Rollup.
+    """
+    if schwelle is None:
+        schwelle = current_app.config.get("ANWESENHEIT_WARNSCHWELLE", STANDARD_WARNSCHWELLE)
+    abwesend = func.sum(AnwesenheitMonat.abwesend)
+    query = (
+        select(AnwesenheitMonat.person_id, abwesend, func.sum(AnwesenheitMonat.anwesend))
+        .where(AnwesenheitMonat.jahr == jahr, AnwesenheitMonat.monat == monat)
+        .group_by(AnwesenheitMonat.person_id)
+        .having(abwesend > schwelle)
+        .order_by(abwesend.desc())
+    )
+    if lerngruppe_id:
+        query = query.where(AnwesenheitMonat.person_id.in_(
+            select(Person.id).where(Person.lerngruppe_id == lerngruppe_id)
+        ))
+    return db.session.execute(query).all()
+
+
+def wochen_bericht(lerngruppe_id, bis=None, wochen=12):
+    """Anwesend/abwesend der Lerngruppe für die letzten ``wochen`` ISO-Wochen bis ``bis``.
+
+    Liefert ``[(jahr, kw, montag, anwesend, abwesend), …]`` absteigend, auch
+    für Wochen ohne Kurse (dann mit Nullen).
+    """
+    bis = bis or date.today()
+    montag = bis - timedelta(days=bis.isoweekday() - 1)
+    montage = [montag - timedelta(weeks=i) for i in range(wochen)]
+    schluessel = [m.isocalendar()[:2] for m in montage]
+
+    zaehler = {
+        (jahr, kw): (anw, abw)
+        for jahr, kw, anw, abw in db.session.execute(
+            select(AnwesenheitWoche.jahr, AnwesenheitWoche.kw,
+                   AnwesenheitWoche.anwesend, AnwesenheitWoche.abwesend)
+            .where(
+                AnwesenheitWoche.lerngruppe_id == lerngruppe_id,
+                tuple_(AnwesenheitWoche.jahr, AnwesenheitWoche.kw).in_(schluessel),
+            )
+        )
+    }
+    return [(*k, m, *zaehler.get(k, (0, 0))) for k, m in zip(schluessel, montage)]
+
+
+def init_app(app):
+    @app.cli.command("anwesenheit-aufbauen")
+    def anwesenheit_aufbauen():
+        """Berechnet die Anwesenheits-Rollups aus allen Kurs-Teilnahmen neu."""
+        monate, wochen = neu_aufbauen(db.session.connection())
+        db.session.commit()
+        click.echo(f"{monate} Monats- und {wochen} Wochenzeilen berechnet.")
@@ -0,0 +1,261 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import shutil
+import urllib.request
+from urllib.parse import urljoin
+
+import click
+from flask import abort, current_app, request, send_file, url_for
+
+try:
+    import brotli       # optional: pip install brotli
+except ImportError:
+    brotli = None
+
+# Statische Dateien ohne Internet: Die Bibliotheken werden einmal nach
+# static/vendor geholt (``flask assets-bauen``), zusammen mit static/css
+# verkleinert, mit einem Inhalts-Hash im Namen nach static/dist geschrieben
+# und dort zusätzlich gzip-/brotli-komprimiert abgelegt. ``asset_url`` liefert
+# im Template den Pfad aus dist/manifest.json; solange nicht gebaut wurde,
+# bleibt es bei static/ bzw. dem CDN. Mit ASSETS_OFFLINE gibt es kein CDN:
+# fehlt eine Bibliothek, meldet das schon der Start, und die Seite bricht ab
+# statt still aus dem Internet zu laden.
+
+STANDARD = {
+    "ASSETS_MAX_AGE": 365 * 24 * 3600,     # s; die Namen ändern sich mit dem Inhalt
+    "ASSETS_OFFLINE": False,               # True: nie vom CDN laden, fehlender Build ist ein Fehler
+}
+
+# Ziel unter static/vendor → Quelle (feste Versionen)
+VENDOR = {
+    "bootstrap/bootstrap.min.css":
+        "https://cdn.jsdelivr.net/npm/bootstrap@5.3.3/dist/css/bootstrap.min.css",
+    "bootstrap/bootstrap.bundle.min.js":
+        "https://cdn.jsdelivr.net/npm/bootstrap@5.3.3/dist/js/bootstrap.bundle.min.js",
+    "jquery/jquery.min.js":
+        "https://code.jquery.com/jquery-3.6.0.min.js",
+    "select2/select2.min.css":
+        "https://cdn.jsdelivr.net/npm/select2@4.1.0-rc.0/dist/css/select2.min.css",
+    "select2/select2.min.js":
+        "https://cdn.jsdelivr.net/npm/select2@4.1.0-rc.0/dist/js/select2.min.js",
+    "jquery-ui/jquery-ui.css":
+        "https://code.jquery.com/ui/1.13.2/themes/base/jquery-ui.css",
+    "jquery-ui/jquery-ui.min.js":
+        "https://code.jquery.com/ui/1.13.2/jquery-ui.min.js",
+}
+QUELLEN = ("css", "vendor")         # Ordner unter static/, die gebaut werden
+ZIEL = "dist"
+KOMPRIMIERBAR = (".css", ".js", ".svg", ".json", ".txt", ".map")
+
+_URL = re.compile(r"""url\(\s*(['"]?)([^'")]+)\1\s*\)""")
+_SOURCEMAP = re.compile(r"\n?(/\*# sourceMappingURL=[^*]*\*/|//# sourceMappingURL=\S*)\s*$")
+_KOMMENTAR = re.compile(r"/\*(?!!).*?\*/", re.S)
+_LEERRAUM = re.compile(r"\s+")
+_UM_KLAMMERN = re.compile(r"\s*([{};])\s*")
+
+
+# ── Holen ─────────────────────────────────────────────────────────────────
+def _relative_urls(css):
+    """Relative ``url(...)``-Verweise einer CSS-Datei (Bilder, Schriften)."""
+    for _, ziel in _URL.findall(css):
+        if not ziel.startswith(("data:", "http:", "https:", "/", "#")):
+            yield ziel.split("?")[0].split("#")[0]
+
+
+def _laden(url, pfad):
+    os.makedirs(os.path.dirname(pfad), exist_ok=True)
+    with urllib.request.urlopen(url, timeout=30) as antwort, open(pfad + ".tmp", "wb") as datei:
+        shutil.copyfileobj(antwort, datei)
+    os.replace(pfad + ".tmp", pfad)
+
+
+def vendor_holen(static, neu=False, melden=print):
+    """Lädt fehlende Bibliotheken samt der Bilder, auf die ihr CSS verweist."""
+    for ziel, url in VENDOR.items():
+        pfad = os.path.join(static, "vendor", ziel)
+        if neu or not os.path.exists(pfad):
+            melden(f"hole {url}")
+            _laden(url, pfad)
+        if ziel.endswith(".css"):
+            with open(pfad, encoding="utf-8") as f:
+                verweise = set(_relative_urls(f.read()))
+            for verweis in sorted(verweise):
+                unterpfad = os.path.normpath(os.path.join(os.path.dirname(pfad), verweis))
+                if neu or not os.path.exists(unterpfad):
+                    melden(f"hole {urljoin(url, verweis)}")
+                    _laden(urljoin(url, verweis), unterpfad)
+
+
+# ── Bauen ─────────────────────────────────────────────────────────────────
+def css_verkleinern(css):
+    """Vorsichtiges Verkleinern: Kommentare (außer /*! … */) und Leerraum."""
+    css = _KOMMENTAR.sub("", css)
+    css = _LEERRAUM.sub(" ", css)
+    return _UM_KLAMMERN.sub(r"\1", css).strip()
+
+
+def _mit_hash(relpfad, inhalt):
+    stamm, endung = os.path.splitext(relpfad)
+    return f"{stamm}.{hashlib.sha256(inhalt).hexdigest()[:10]}{endung}"
+
+
+def _komprimiert_schreiben(pfad, inhalt):
+    varianten = {".gz": gzip.compress(inhalt, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        varianten[".br"] = brotli.compress(inhalt, quality=11)
+    for endung, daten in varianten.items():
+        if len(daten) < len(inhalt):
+            with open(pfad + endung, "wb") as f:
+                f.write(daten)
+
+
+def bauen(static, melden=print):
+    """Schreibt static/dist neu und gibt das Manifest zurück."""
+    dateien = []
+    for quelle in QUELLEN:
+        for ordner, _, namen in os.walk(os.path.join(static, quelle)):
+            for name in namen:
+                dateien.append(os.path.relpath(os.path.join(ordner, name), static).replace(os.sep, "/"))
+    # CSS zuletzt: es verweist auf die schon umbenannten Bilder
+    dateien.sort(key=lambda p: (p.endswith(".css"), p))
+
+    ziel = os.path.join(static, ZIEL)
+    shutil.rmtree(ziel, ignore_errors=True)
+    manifest = {}
+    for relpfad in dateien:
+        with open(os.path.join(static, relpfad), "rb") as f:
+            inhalt = f.read()
+        if relpfad.endswith((".css", ".js")):
+            text = _SOURCEMAP.sub("", inhalt.decode("utf-8"))   # Maps liefern wir nicht mit
+            if relpfad.endswith(".css"):
+                if ".min." not in relpfad:
+                    text = css_verkleinern(text)
+                text = _URL.sub(lambda m: _url_ersetzen(m, relpfad, manifest), text)
+            inhalt = text.encode("utf-8")
+
+        neu = _mit_hash(relpfad, inhalt)
+        manifest[relpfad] = neu
+        pfad = os.path.join(ziel, neu)
+        os.makedirs(os.path.dirname(pfad), exist_ok=True)
+        with open(pfad, "wb") as f:
+            f.write(inhalt)
+        if relpfad.endswith(KOMPRIMIERBAR):
+            _komprimiert_schreiben(pfad, inhalt)
+        melden(f"{relpfad} → {ZIEL}/{neu}")
+
+    with open(os.path.join(ziel, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    return manifest
+
+
+def _url_ersetzen(treffer, css_pfad, manifest):
+    verweis = treffer.group(2)
+    if verweis.startswith(("data:", "http:", "https:", "/", "#")):
+        return treffer.group(0)
+    ziel = os.path.normpath(os.path.join(os.path.dirname(css_pfad), verweis)).replace(os.sep, "/")
+    if ziel not in manifest:
+        return treffer.group(0)
+    # Gleiche Ordnerstruktur in dist – nur der Dateiname ändert sich
+    neu = os.path.relpath(manifest[ziel], os.path.dirname(css_pfad)).replace(os.sep, "/")
+    return f"url({neu})"
+
+
+# ── Ausliefern ────────────────────────────────────────────────────────────
+class Manifest:
+    """Liest dist/manifest.json; neu, sobald sich die Datei ändert (nach einem Build)."""
+
+    def __init__(self):
+        self._stand = None
+        self._eintraege = {}
+
+    def eintraege(self, static):
+        pfad = os.path.join(static, ZIEL, "manifest.json")
+        try:
+            stand = os.stat(pfad).st_mtime_ns
+        except OSError:
+            return {}
+        if stand != self._stand:
+            with open(pfad, encoding="utf-8") as f:
+                self._eintraege = json.load(f)
+            self._stand = stand
+        return self._eintraege
+
+
+manifest = Manifest()
+
+
+def fehlende_bibliotheken(static):
+    """Bibliotheken aus VENDOR, die weder gebaut noch unter static/vendor liegen."""
+    gebaut = manifest.eintraege(static)
+    return [
+        ziel for ziel in VENDOR
+        if f"vendor/{ziel}" not in gebaut and not os.path.exists(os.path.join(static, "vendor", ziel))
+    ]
+
+
+def asset_url(relpfad):
+    """URL einer Datei unter static/ – gebaut, lokal oder (vendor, ungebaut) vom CDN."""
+    static = current_app.static_folder
+    gebaut = manifest.eintraege(static).get(relpfad)
+    if gebaut:
+        return url_for("assets", dateiname=gebaut)
+    if relpfad.startswith("vendor/") and not os.path.exists(os.path.join(static, relpfad)):
+        if current_app.config["ASSETS_OFFLINE"]:
+            raise RuntimeError(f"{relpfad} fehlt (ASSETS_OFFLINE) – erst 'flask assets-bauen' ausführen")
+        return VENDOR[relpfad[len("vendor/"):]]
+    return url_for("static", filename=relpfad)
+
+
+def ausliefern(dateiname):
+    """Gebaute Datei, wenn möglich vorkomprimiert, mit langer Cache-Dauer."""
+    basis = os.path.realpath(os.path.join(current_app.static_folder, ZIEL))
+    pfad = os.path.realpath(os.path.join(basis, dateiname))
+    if not pfad.startswith(basis + os.sep) or not os.path.isfile(pfad) or dateiname.endswith((".gz", ".br")):
+        abort(404)
+
+    mimetype = mimetypes.guess_type(pfad)[0] or "application/octet-stream"
+    kodierung = None
+    for endung, name in ((".br", "br"), (".gz", "gzip")):
+        if request.accept_encodings[name] and os.path.isfile(pfad + endung):
+            pfad, kodierung = pfad + endung, name
+            break
+    antwort = send_file(pfad, mimetype=mimetype, conditional=True,
+                        max_age=current_app.config["ASSETS_MAX_AGE"])
+    if kodierung:
+        antwort.headers["Content-Encoding"] = kodierung
+    if dateiname.endswith(KOMPRIMIERBAR):
+        antwort.vary.add("Accept-Encoding")
+    antwort.cache_control.public = True
+    antwort.cache_control.immutable = True
+    return antwort
+
+
+def init_app(app):
+    for schluessel, wert in STANDARD.items():
+        app.config.setdefault(schluessel, wert)
+    app.add_url_rule("/assets/<path:dateiname>", "assets", ausliefern)
+    app.jinja_env.globals["asset_url"] = asset_url
+
+    # Nicht abbrechen: ``flask assets-bauen`` braucht die App, um den Build zu machen
+    fehlend = fehlende_bibliotheken(app.static_folder)
+    if fehlend and app.config["ASSETS_OFFLINE"]:
+        app.logger.error("ASSETS_OFFLINE, aber %d Bibliotheken fehlen (%s) – "
+                         "Seiten schlagen fehl, bis 'flask assets-bauen' gelaufen ist",
+                         len(fehlend), ", ".join(fehlend))
+    elif fehlend:
+        app.logger.warning("%d Bibliotheken kommen vom CDN, weil 'flask assets-bauen' "
+                           "nicht gelaufen ist (%s)", len(fehlend), ", ".join(fehlend))
+
+    @app.cli.command("assets-bauen")
+    @click.option("--offline", is_flag=True, help="Nichts herunterladen, nur vorhandene Dateien bauen.")
+    @click.option("--neu-holen", is_flag=True, help="Bibliotheken auch dann laden, wenn sie schon da sind.")
+    def assets_bauen(offline, neu_holen):
+        """Holt die Bibliotheken nach static/vendor und baut static/dist."""
+        if not offline:
+            vendor_holen(app.static_folder, neu_holen, click.echo)
+        gebaut = bauen(app.static_folder, click.echo)
+        click.echo(f"{len(gebaut)} Dateien gebaut{'' if brotli else ' (ohne brotli – pip install brotli)'}.")
@@ -0,0 +1,268 @@
+import multiprocessing
+import os
+import re
+import zipfile
+from collections import defaultdict
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import date, datetime
+
+import click
+from flask import current_app
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from sqlalchemy import case, func, select
+
+from app import db
+from app.models import (
+    FreiarbeitEintrag, KursRueckmeldung, KursTeilnahme, LeistungsRueckmeldung, Lerngruppe, Person
+)
+from app.jobs import aufgabe
+from app.referenzdaten import referenzdaten
+from app.utils import zeitraum_filtern
+
+# Sammel-Berichte zur Zeugniszeit: ein HTML-Bericht je Person, alle in einer ZIP.
+#
+# Der Elternprozess liest die Daten blockweise mit wenigen gruppierten
+# Abfragen; die Worker eines Prozess-Pools rendern nur noch. Sie bekommen
+# Lernfeld-Namen und Template einmal beim Start (``_initialisieren``), pro
+# Bericht wandert nur ein kleines Dict hinüber. Während der Pool einen Block
+# rendert, lädt der Elternprozess schon den nächsten.
+
+STANDARD = {
+    # HTML rendert in ~2 ms je Bericht, das Starten der Pool-Prozesse kostet
+    # mehr. Der Pool lohnt erst für teurere Formate oder tausende Berichte.
+    "BERICHTE_PROZESSE": 1,             # 1 = ohne Pool, None = Anzahl CPU-Kerne
+}
+BLOCKGROESSE = 100                      # Personen pro Datenabfrage
+
+_TEMPLATE_ORDNER = os.path.join(os.path.dirname(__file__), "templates", "berichte")
+
+# Zustand eines Pool-Workers, gesetzt von _initialisieren
+_worker = {}
+
+
+def _initialisieren(lernfeld_namen, erstellt_am):
+    umgebung = Environment(
+        loader=FileSystemLoader(_TEMPLATE_ORDNER),
+        autoescape=select_autoescape(["html"]),
+    )
+    _worker["template"] = umgebung.get_template("bericht.html")
+    _worker["lernfelder"] = lernfeld_namen
+    _worker["erstellt_am"] = erstellt_am
+
+
+def _rendern(daten):
+    """Läuft im Worker: Daten einer Person → (Dateiname, HTML-Bytes)."""
+    html = _worker["template"].render(
+        lernfelder=_worker["lernfelder"], erstellt_am=_worker["erstellt_am"], **daten
+    )
+    return daten["dateiname"], html.encode("utf-8")
+
+
+class _OhneProzesse:
+    """Ersatz für den Pool bei BERICHTE_PROZESSE = 1 – rendert sofort im Aufrufer."""
+
+    def __init__(self, initargs):
+        _initialisieren(*initargs)
+
+    def submit(self, fn, *args):
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        _worker.clear()
+
+
+# ── Daten ─────────────────────────────────────────────────────────────────
+def _dateiname(gruppe, nachname, vorname, person_id):
+    def sauber(s):
+        return re.sub(r"[^\w.-]+", "_", s or "").strip("_") or "ohne"
+    return f"{sauber(gruppe)}/{sauber(nachname)}_{sauber(vorname)}_{person_id}.html"
+
+
+def personen_auswaehlen(lerngruppe_id=None):
+    """IDs der Personen (einer Lerngruppe oder aller), in Ausgabereihenfolge."""
+    query = (
+        select(Person.id)
+        .outerjoin(Lerngruppe, Person.lerngruppe_id == Lerngruppe.id)
+        .order_by(Lerngruppe.name, Person.nachname, Person.vorname)
+    )
+    if lerngruppe_id:
+        query = query.where(Person.lerngruppe_id == lerngruppe_id)
+    return db.session.execute(query).scalars().all()
+
+
+def berichtsdaten(person_ids, von=None, bis=None):
+    """Alles für die Berichte einer Personengruppe, als einfache Dicts.
+
+    Fünf Abfragen für den ganzen Block, unabhängig von seiner Größe.
+    Die Dicts sind picklebar und gehen so direkt an den Pool.
+    """
+    gruppen = {g.id: g.name for g in referenzdaten.lerngruppen()}
+    berichte = {}
+    for p in db.session.execute(
+        select(Person.id, Person.vorname, Person.spitzname, Person.nachname, Person.lerngruppe_id,
+               Person.stufe, Person.foerderbedarf, Person.foerderbedarf_massnahmen, Person.ziele)
+        .where(Person.id.in_(person_ids))
+    ):
+        gruppe = gruppen.get(p.lerngruppe_id, "")
+        berichte[p.id] = {
+            "dateiname": _dateiname(gruppe, p.nachname, p.vorname, p.id),
+            "person": {
+                "name": f"{p.vorname} {p.nachname}", "spitzname": p.spitzname,
+                "lerngruppe": gruppe, "stufe": p.stufe, "foerderbedarf": p.foerderbedarf,
+                "foerderbedarf_massnahmen": p.foerderbedarf_massnahmen, "ziele": p.ziele,
+            },
+            "von": von, "bis": bis,
+            # lernfeld_id -> Kennzahlen; das Template löst die Namen auf
+            "freiarbeit": defaultdict(lambda: {"anzahl": 0, "erste": None, "letzte": None, "themen": []}),
+            "kurse": {},
+            "leistungen": defaultdict(list),
+        }
+
+    freiarbeit = zeitraum_filtern(
+        select(FreiarbeitEintrag.person_id, FreiarbeitEintrag.lernfeld_id, func.count(),
+               func.min(FreiarbeitEintrag.datum), func.max(FreiarbeitEintrag.datum))
+        .where(FreiarbeitEintrag.person_id.in_(person_ids))
+        .group_by(FreiarbeitEintrag.person_id, FreiarbeitEintrag.lernfeld_id),
+        FreiarbeitEintrag.datum, von, bis
+    )
+    for pid, lf_id, anzahl, erste, letzte in db.session.execute(freiarbeit):
+        eintrag = berichte[pid]["freiarbeit"][lf_id]
+        eintrag.update(anzahl=anzahl, erste=erste, letzte=letzte)
+
+    themen = zeitraum_filtern(
+        select(FreiarbeitEintrag.person_id, FreiarbeitEintrag.lernfeld_id, FreiarbeitEintrag.thema_text)
+        .where(FreiarbeitEintrag.person_id.in_(person_ids),
+               func.coalesce(FreiarbeitEintrag.thema_text, "") != "")
+        .group_by(FreiarbeitEintrag.person_id, FreiarbeitEintrag.lernfeld_id, FreiarbeitEintrag.thema_text)
+        .order_by(func.min(FreiarbeitEintrag.datum)),
+        FreiarbeitEintrag.datum, von, bis
+    )
+    for pid, lf_id, thema in db.session.execute(themen):
+        berichte[pid]["freiarbeit"][lf_id]["themen"].append(thema)
+
+    kurse = zeitraum_filtern(
+        select(
+            KursTeilnahme.person_id, KursRueckmeldung.lernfeld_id,
+            func.sum(case((KursTeilnahme.status == "anwesend", 1), else_=0)),
+            func.sum(case((KursTeilnahme.status == "abwesend", 1), else_=0)),
+            func.count(),
+        )
+        .join(KursRueckmeldung, KursTeilnahme.rueckmeldung_id == KursRueckmeldung.id)
+        .where(KursTeilnahme.person_id.in_(person_ids))
+        .group_by(KursTeilnahme.person_id, KursRueckmeldung.lernfeld_id),
+        KursRueckmeldung.datum, von, bis
+    )
+    for pid, lf_id, anwesend, abwesend, gesamt in db.session.execute(kurse):
+        berichte[pid]["kurse"][lf_id] = {"anwesend": anwesend, "abwesend": abwesend, "gesamt": gesamt}
+
+    leistungen = zeitraum_filtern(
+        select(LeistungsRueckmeldung.person_id, LeistungsRueckmeldung.lernfeld_id,
+               LeistungsRueckmeldung.datum, LeistungsRueckmeldung.thema,
+               LeistungsRueckmeldung.rueckmeldung, LeistungsRueckmeldung.note)
+        .where(LeistungsRueckmeldung.person_id.in_(person_ids))
+        .order_by(LeistungsRueckmeldung.datum, LeistungsRueckmeldung.id),
+        LeistungsRueckmeldung.datum, von, bis
+    )
+    for pid, lf_id, datum, thema, rueckmeldung, note in db.session.execute(leistungen):
+        berichte[pid]["leistungen"][lf_id].append(
+            {"datum": datum, "thema": thema, "rueckmeldung": rueckmeldung, "note": note}
+        )
+
+    ergebnis = []
+    for pid in person_ids:
+        bericht = berichte.get(pid)
+        if bericht is None:
+            continue                # inzwischen gelöscht
+        bericht["freiarbeit"] = dict(bericht["freiarbeit"])
+        bericht["leistungen"] = dict(bericht["leistungen"])
+        ergebnis.append(bericht)
+    return ergebnis
+
+
+# ── Erzeugen ──────────────────────────────────────────────────────────────
+def berichte_erstellen(ziel, lerngruppe_id=None, von=None, bis=None, prozesse=None, fortschritt=None):
+    """Schreibt die Berichte als ZIP nach ``ziel`` (Pfad oder Binärdatei).
+
+    ``fortschritt(fertig, gesamt)`` wird nach jedem geschriebenen Bericht
+    aufgerufen. Gibt die Zahl der Berichte zurück. Braucht einen App-Kontext.
+    """
+    if prozesse is None:
+        prozesse = current_app.config.get("BERICHTE_PROZESSE", 1) or os.cpu_count() or 1
+    person_ids = personen_auswaehlen(lerngruppe_id)
+    gesamt = len(person_ids)
+    initargs = (
+        {lf.id: lf.name for lf in referenzdaten.lernfelder()},
+        datetime.now().strftime("%d.%m.%Y"),
+    )
+
+    # spawn statt fork: der Aufrufer ist oft ein Server-Thread mit offenen
+    # Verbindungen und Locks, die ein geforktes Kind mitschleppen würde
+    pool = (
+        ProcessPoolExecutor(
+            max_workers=min(prozesse, max(1, gesamt // 10)),
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_initialisieren, initargs=initargs,
+        )
+        if prozesse > 1 and gesamt > 1 else _OhneProzesse(initargs)
+    )
+
+    fertig = 0
+    with pool, zipfile.ZipFile(ziel, "w", zipfile.ZIP_DEFLATED) as archiv:
+        def schreiben(futures):
+            nonlocal fertig
+            for future in futures:
+                dateiname, inhalt = future.result()
+                archiv.writestr(dateiname, inhalt)
+                fertig += 1
+                if fortschritt:
+                    fortschritt(fertig, gesamt)
+
+        ausstehend = []
+        for i in range(0, gesamt, BLOCKGROESSE):
+            daten = berichtsdaten(person_ids[i:i + BLOCKGROESSE], von, bis)
+            neu = [pool.submit(_rendern, d) for d in daten]
+            schreiben(ausstehend)
+            ausstehend = neu
+        schreiben(ausstehend)
+    return fertig
+
+
+# ── Als Hintergrund-Job ───────────────────────────────────────────────────
+@aufgabe("berichte")
+def _berichte_job(job, lerngruppe_id=None, von=None, bis=None):
+    ziel = job.datei("berichte.zip")
+    anzahl = berichte_erstellen(
+        ziel, lerngruppe_id,
+        von and date.fromisoformat(von), bis and date.fromisoformat(bis),
+        fortschritt=job.fortschritt,
+    )
+    return {
+        "anzahl": anzahl,
+        "datei": os.path.basename(ziel),
+        "dateiname": f"berichte-{date.today().isoformat()}.zip",
+    }
+
+
+def init_app(app):
+    for schluessel, wert in STANDARD.items():
+        app.config.setdefault(schluessel, wert)
+
+    @app.cli.command("berichte-erstellen")
+    @click.argument("ziel", type=click.Path(dir_okay=False, writable=True))
+    @click.option("--lerngruppe", "lerngruppe_id", type=int, help="Nur diese Lerngruppe (sonst alle).")
+    @click.option("--von", type=click.DateTime(["%Y-%m-%d"]), help="Zeitraum ab (JJJJ-MM-TT).")
+    @click.option("--bis", type=click.DateTime(["%Y-%m-%d"]), help="Zeitraum bis (JJJJ-MM-TT).")
+    @click.option("--prozesse", type=int, help="Anzahl Render-Prozesse (Standard: BERICHTE_PROZESSE).")
+    def berichte_erstellen_befehl(ziel, lerngruppe_id, von, bis, prozesse):
+        """Erstellt die Berichte als ZIP-Datei ZIEL."""
+        with click.progressbar(length=len(personen_auswaehlen(lerngruppe_id)), label="Berichte") as balken:
+            anzahl = berichte_erstellen(
+                ziel, lerngruppe_id, von and von.date(), bis and bis.date(), prozesse,
+                fortschritt=lambda fertig, gesamt: balken.update(1),
+            )
+        click.echo(f"{anzahl} Berichte nach {ziel} geschrieben.")
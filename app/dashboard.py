@@ -0,0 +1,114 @@
+from sqlalchemy import func, select
+
+from app import db
+from app.anwesenheit import anwesenheit_je_person
+from app.lesemodelle import name_mit_spitzname
+from app.models import Person, FreiarbeitEintrag, LeistungsRueckmeldung
+from app.referenzdaten import referenzdaten
+from app.utils import zeitraum_filtern
+
+
+class DashboardZeile:
+    """Kennzahlen einer Person im gewählten Zeitraum."""
+
+    __slots__ = (
+        "person_id", "name", "lerngruppe", "freiarbeit", "freiarbeit_gesamt",
+        "letzte_aktivitaet", "kurse_anwesend", "kurse_gesamt", "leistungen"
+    )
+
+    def __init__(self, person_id, name, lerngruppe):
+        self.person_id = person_id
+        self.name = name
+        self.lerngruppe = lerngruppe
+        self.freiarbeit = {}              # lernfeld_id -> Anzahl Einträge
+        self.freiarbeit_gesamt = 0
+        self.letzte_aktivitaet = None
+        self.kurse_anwesend = 0
+        self.kurse_gesamt = 0
+        self.leistungen = 0
+
+    @property
+    def anwesenheit(self):
+        """Anteil der Kurse, in denen die Person anwesend war (0–1) oder None."""
+        if not self.kurse_gesamt:
+            return None
+        return self.kurse_anwesend / self.kurse_gesamt
+
+    def _aktivitaet(self, datum):
+        if datum and (self.letzte_aktivitaet is None or datum > self.letzte_aktivitaet):
+            self.letzte_aktivitaet = datum
+
+
+def dashboard_laden(lerngruppe_id=None, von=None, bis=None):
+    """Liefert (zeilen, lernfelder) für die Übersicht.
+
+    Statt pro Person nachzuladen, gibt es wenige gruppierte Abfragen:
+    Personen, Freiarbeit je Person×Lernfeld, Anwesenheit aus dem
+    Monats-Rollup (siehe ``anwesenheit_je_person``) und
+    Leistungsrückmeldungen je Person. ``lernfelder`` enthält nur die
+    Lernfelder, in denen im Zeitraum gearbeitet wurde.
+    """
+    personen = select(Person.id, Person.vorname, Person.spitzname, Person.nachname, Person.lerngruppe_id)
+    if lerngruppe_id:
+        personen = personen.where(Person.lerngruppe_id == lerngruppe_id)
+    gruppen = {g.id: g.name for g in referenzdaten.lerngruppen()}
+
+    zeilen = {}
+    for pid, vorname, spitzname, nachname, gid in db.session.execute(personen):
+        zeilen[pid] = DashboardZeile(pid, name_mit_spitzname(vorname, nachname, spitzname),
+                                     gruppen.get(gid, ""))
+    if not zeilen:
+        return [], []
+
+    # Personenfilter als Subquery – das Ergebnis bleibt eine Zeile je Gruppe
+    def nur_gruppe(query, spalte):
+        if not lerngruppe_id:
+            return query
+        return query.where(spalte.in_(
+            select(Person.id).where(Person.lerngruppe_id == lerngruppe_id)
+        ))
+
+    freiarbeit = zeitraum_filtern(
+        select(
+            FreiarbeitEintrag.person_id, FreiarbeitEintrag.lernfeld_id,
+            func.count(), func.max(FreiarbeitEintrag.datum)
+        )
+        .group_by(FreiarbeitEintrag.person_id, FreiarbeitEintrag.lernfeld_id),
+        FreiarbeitEintrag.datum, von, bis
+    )
+    freiarbeit = nur_gruppe(freiarbeit, FreiarbeitEintrag.person_id)
+    benutzte_lernfelder = set()
+    for pid, lernfeld_id, anzahl, letzte in db.session.execute(freiarbeit):
+        z = zeilen.get(pid)
+        if z is None:
+            continue
+        z.freiarbeit[lernfeld_id] = anzahl
+        z.freiarbeit_gesamt += anzahl
+        z._aktivitaet(letzte)
+        benutzte_lernfelder.add(lernfeld_id)
+
+    # Anwesenheit aus dem Monats-Rollup, nicht aus allen Kurs-Teilnahmen
+    for pid, (anwesend, gesamt, letzte) in anwesenheit_je_person(von, bis, lerngruppe_id).items():
+        z = zeilen.get(pid)
+        if z is None:
+            continue
+        z.kurse_anwesend = anwesend
+        z.kurse_gesamt = gesamt
+        z._aktivitaet(letzte)
+
+    leistungen = zeitraum_filtern(
+        select(LeistungsRueckmeldung.person_id, func.count(), func.max(LeistungsRueckmeldung.datum))
+        .group_by(LeistungsRueckmeldung.person_id),
+        LeistungsRueckmeldung.datum, von, bis
+    )
+    leistungen = nur_gruppe(leistungen, LeistungsRueckmeldung.person_id)
+    for pid, anzahl, letzte in db.session.execute(leistungen):
+        z = zeilen.get(pid)
+        if z is None:
+            continue
+        z.leistungen = anzahl
+        z._aktivitaet(letzte)
+
+    lernfelder = [lf for lf in referenzdaten.lernfelder() if lf.id in benutzte_lernfelder]
+    ergebnis = sorted(zeilen.values(), key=lambda z: (z.lerngruppe.lower(), z.name.lower()))
+    return ergebnis, lernfelder
@@ -0,0 +1,69 @@
+from sqlalchemy import event
+
+
+# Standardwerte; überschreibbar in instance/config.py
+STANDARD = {
+    "SQLITE_JOURNAL_MODE": "WAL",      # Leser blockieren Schreiber nicht mehr
+    "SQLITE_SYNCHRONOUS":  "NORMAL",   # mit WAL sicher, spart ein fsync pro Commit
+    "SQLITE_BUSY_TIMEOUT": 5000,       # ms warten statt sofort "database is locked"
+    "SQLITE_CACHE_SIZE":   -32000,     # negativ = KiB, also ca. 32 MB Seiten-Cache je Verbindung
+    "SQLITE_MMAP_SIZE":    256 * 1024 * 1024,   # Bytes, 0 schaltet mmap ab
+    "SQLITE_TEMP_STORE":   "MEMORY",   # Sortierungen/Zwischentabellen im RAM
+    "SQLITE_POOL_SIZE":    10,         # offene Verbindungen je Worker-Prozess
+    "SQLITE_MAX_OVERFLOW": 10,         # zusätzliche Verbindungen unter Last
+    "SQLITE_POOL_TIMEOUT": 30,         # s warten auf eine freie Verbindung
+}
+
+
+def standardwerte_setzen(app):
+    """Vor ``db.init_app`` aufrufen – die Pool-Einstellungen braucht die Engine beim Anlegen."""
+    for schluessel, wert in STANDARD.items():
+        app.config.setdefault(schluessel, wert)
+
+    if not app.config["SQLALCHEMY_DATABASE_URI"].startswith("sqlite"):
+        return
+    if ":memory:" in app.config["SQLALCHEMY_DATABASE_URI"]:
+        return    # eine In-Memory-DB lebt nur in ihrer einen Verbindung
+    optionen = app.config.setdefault("SQLALCHEMY_ENGINE_OPTIONS", {})
+    optionen.setdefault("pool_size", app.config["SQLITE_POOL_SIZE"])
+    optionen.setdefault("max_overflow", app.config["SQLITE_MAX_OVERFLOW"])
+    optionen.setdefault("pool_timeout", app.config["SQLITE_POOL_TIMEOUT"])
+    connect_args = optionen.setdefault("connect_args", {})
+    # Wartezeit des Treibers selbst (Sekunden), passend zum busy_timeout
+    connect_args.setdefault("timeout", app.config["SQLITE_BUSY_TIMEOUT"] / 1000)
+
+
+def init_app(app):
+    """Setzt die SQLite-Pragmas auf jeder neuen Verbindung.
+
+    Mehrere Worker-Prozesse teilen sich dieselbe Datei; erst mit WAL und
+    busy_timeout laufen gleichzeitige Einträge nicht in Sperrfehler.
+    """
+    with app.app_context():
+        from app import db
+        engine = db.engine
+    if engine.dialect.name != "sqlite":
+        return
+
+    pragmas = [
+        f"PRAGMA busy_timeout = {int(app.config['SQLITE_BUSY_TIMEOUT'])}",
+        f"PRAGMA journal_mode = {app.config['SQLITE_JOURNAL_MODE']}",
+        f"PRAGMA synchronous = {app.config['SQLITE_SYNCHRONOUS']}",
+        f"PRAGMA cache_size = {int(app.config['SQLITE_CACHE_SIZE'])}",
+        f"PRAGMA mmap_size = {int(app.config['SQLITE_MMAP_SIZE'])}",
+        f"PRAGMA temp_store = {app.config['SQLITE_TEMP_STORE']}",
+    ]
+
+    @event.listens_for(engine, "connect")
+    def _pragmas_setzen(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+
+def nach_fork(app):
+    """Im Worker nach dem Fork aufrufen: geerbte Verbindungen nicht weiterverwenden."""
+    from app import db
+    with app.app_context():
+        db.engine.dispose(close=False)
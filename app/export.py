@@ -0,0 +1,302 @@
+import csv
+import io
+import re
+import zipfile
+from datetime import date, datetime
+from xml.sax.saxutils import escape
+
+import click
+from sqlalchemy import select
+
+from app import db
+from app.models import (
+    FreiarbeitEintrag, KursRueckmeldung, KursTeilnahme, LeistungsRueckmeldung, Lernfeld, Lerngruppe, Person
+)
+from app.utils import zeitraum_filtern
+
+# Export der Dokumentation als CSV oder XLSX, zeilenweise gestreamt.
+#
+# Gelesen wird mit ``yield_per`` in Paketen von BATCHGROESSE Zeilen, nur die
+# benötigten Spalten statt ORM-Objekte. Beide Formate erzeugen ihre Ausgabe
+# stückweise als Bytes – der Download beginnt mit dem ersten Paket, und der
+# Speicherbedarf hängt nicht an der Zahl der Zeilen. Sortiert wird in
+# Erfassungsreihenfolge (Primärschlüssel): eine Sortierung nach Datum
+# müsste erst alle Zeilen lesen, bevor die erste herausgeht.
+
+BATCHGROESSE = 1000
+
+
+def _person_spalten():
+    return [
+        ("Lerngruppe", Lerngruppe.name),
+        ("Vorname", Person.vorname),
+        ("Nachname", Person.nachname),
+    ]
+
+
+def _freiarbeit():
+    spalten = [
+        ("Datum", FreiarbeitEintrag.datum),
+        *_person_spalten(),
+        ("Lernfeld", Lernfeld.name),
+        ("Phase", FreiarbeitEintrag.phase),
+        ("Thema", FreiarbeitEintrag.thema_text),
+        ("Notiz", FreiarbeitEintrag.notiz),
+    ]
+    query = (
+        select(*(s for _, s in spalten))
+        .select_from(FreiarbeitEintrag)
+        .join(Person, FreiarbeitEintrag.person_id == Person.id)
+        .outerjoin(Lerngruppe, Person.lerngruppe_id == Lerngruppe.id)
+        .outerjoin(Lernfeld, FreiarbeitEintrag.lernfeld_id == Lernfeld.id)
+        .order_by(FreiarbeitEintrag.id)
+    )
+    return spalten, query, FreiarbeitEintrag.lernfeld_id, FreiarbeitEintrag.datum
+
+
+def _kurse():
+    spalten = [
+        ("Datum", KursRueckmeldung.datum),
+        *_person_spalten(),
+        ("Lernfeld", Lernfeld.name),
+        ("Phase", KursRueckmeldung.phase),
+        ("Kursthema", KursRueckmeldung.thema),
+        ("Status", KursTeilnahme.status),
+        ("Notiz", KursTeilnahme.notiz),
+    ]
+    query = (
+        select(*(s for _, s in spalten))
+        .select_from(KursTeilnahme)
+        .join(KursRueckmeldung, KursTeilnahme.rueckmeldung_id == KursRueckmeldung.id)
+        .join(Person, KursTeilnahme.person_id == Person.id)
+        .outerjoin(Lerngruppe, Person.lerngruppe_id == Lerngruppe.id)
+        .outerjoin(Lernfeld, KursRueckmeldung.lernfeld_id == Lernfeld.id)
+        .order_by(KursRueckmeldung.id, KursTeilnahme.id)
+    )
+    return spalten, query, KursRueckmeldung.lernfeld_id, KursRueckmeldung.datum
+
+
+def _leistungen():
+    spalten = [
+        ("Datum", LeistungsRueckmeldung.datum),
+        *_person_spalten(),
+        ("Lernfeld", Lernfeld.name),
+        ("Thema", LeistungsRueckmeldung.thema),
+        ("Rückmeldung", LeistungsRueckmeldung.rueckmeldung),
+        ("Note", LeistungsRueckmeldung.note),
+    ]
+    query = (
+        select(*(s for _, s in spalten))
+        .select_from(LeistungsRueckmeldung)
+        .join(Person, LeistungsRueckmeldung.person_id == Person.id)
+        .outerjoin(Lerngruppe, Person.lerngruppe_id == Lerngruppe.id)
+        .outerjoin(Lernfeld, LeistungsRueckmeldung.lernfeld_id == Lernfeld.id)
+        .order_by(LeistungsRueckmeldung.id)
+    )
+    return spalten, query, LeistungsRueckmeldung.lernfeld_id, LeistungsRueckmeldung.datum
+
+
+EXPORTE = {
+    "freiarbeit": ("Freiarbeit", _freiarbeit),
+    "kurse":      ("Kurs-Teilnahmen", _kurse),
+    "leistungen": ("Leistungsrückmeldungen", _leistungen),
+}
+FORMATE = {
+    "csv":  "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+def kopf_und_zeilen(art, lerngruppe_id=None, lernfeld_id=None, von=None, bis=None):
+    """(Spaltenköpfe, Zeilen-Iterator) für einen Export; die Abfrage startet beim ersten Lesen."""
+    spalten, query, lernfeld_spalte, datum_spalte = EXPORTE[art][1]()
+    if lerngruppe_id:
+        query = query.where(Person.lerngruppe_id == lerngruppe_id)
+    if lernfeld_id:
+        query = query.where(lernfeld_spalte == lernfeld_id)
+    query = zeitraum_filtern(query, datum_spalte, von, bis)
+
+    def zeilen():
+        ergebnis = db.session.execute(query, execution_options={"yield_per": BATCHGROESSE})
+        try:
+            for paket in ergebnis.partitions():
+                yield from paket
+        finally:
+            ergebnis.close()
+
+    return [k for k, _ in spalten], zeilen()
+
+
+# ── CSV ───────────────────────────────────────────────────────────────────
+def csv_stueckweise(kopf, zeilen):
+    """CSV für Excel (UTF-8 mit BOM, Semikolon), in Stücken zu BATCHGROESSE Zeilen."""
+    puffer = io.StringIO()
+    writer = csv.writer(puffer, delimiter=";", lineterminator="\r\n")
+    puffer.write("\ufeff")    # BOM, damit Excel UTF-8 erkennt
+    writer.writerow(kopf)
+    for i, zeile in enumerate(zeilen, 1):
+        writer.writerow(
+            w.strftime("%d.%m.%Y") if isinstance(w, date) else w for w in zeile
+        )
+        if i % BATCHGROESSE == 0:
+            yield puffer.getvalue().encode("utf-8")
+            puffer.seek(0)
+            puffer.truncate()
+    yield puffer.getvalue().encode("utf-8")
+
+
+# ── XLSX ──────────────────────────────────────────────────────────────────
+# Ein minimales Office-Open-XML-Paket: eine Tabelle mit Inline-Strings, dazu
+# ein Zahlenformat für Datumsspalten. zipfile schreibt auch in nicht
+# durchsuchbare Ziele (mit Data Descriptors) – so lässt sich das Paket
+# während des Schreibens abholen.
+_XLSX_RAHMEN = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+        '</Types>'
+    ),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+        '<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>'
+        '</Relationships>'
+    ),
+    "xl/styles.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+        '<numFmts count="1"><numFmt numFmtId="164" formatCode="dd.mm.yyyy"/></numFmts>'
+        '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font><font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+        '<fills count="2"><fill><patternFill patternType="none"/></fill><fill><patternFill patternType="gray125"/></fill></fills>'
+        '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+        '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+        '<cellXfs count="3"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+        '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+        '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/></cellXfs>'
+        '</styleSheet>'
+    ),
+}
+_EPOCHE = date(1899, 12, 30)
+# In XML 1.0 verbotene Steuerzeichen (kommen in eingefügten Notizen vor)
+_UNGUELTIG = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def _zelle(wert, stil=0):
+    # Text zuerst prüfen – er macht den Großteil der Zellen aus
+    if type(wert) is str:
+        if not wert:
+            return "<c/>"
+        if not wert.isprintable():      # Zeilenumbrüche, Steuerzeichen
+            wert = _UNGUELTIG.sub("", wert)
+        text = escape(wert)
+        stil = f' s="{stil}"' if stil else ""
+        return f'<c t="inlineStr"{stil}><is><t xml:space="preserve">{text}</t></is></c>'
+    if wert is None:
+        return "<c/>"
+    if isinstance(wert, bool):
+        return f'<c t="b"><v>{int(wert)}</v></c>'
+    if isinstance(wert, datetime):
+        wert = wert.date()
+    if isinstance(wert, date):
+        return f'<c s="1"><v>{(wert - _EPOCHE).days}</v></c>'
+    if isinstance(wert, (int, float)):
+        return f"<c><v>{wert}</v></c>"
+    return _zelle(str(wert), stil)
+
+
+class _Sammler(io.RawIOBase):
+    """Nimmt die Bytes von zipfile entgegen, bis sie abgeholt werden."""
+
+    def __init__(self):
+        self._teile = []
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._teile.append(bytes(b))
+        return len(b)
+
+    def abholen(self):
+        daten = b"".join(self._teile)
+        self._teile.clear()
+        return daten
+
+
+def xlsx_stueckweise(kopf, zeilen, blattname="Export"):
+    """XLSX-Datei als Folge von Byte-Stücken, ohne die Tabelle im Speicher zu halten."""
+    sammler = _Sammler()
+    with zipfile.ZipFile(sammler, "w", zipfile.ZIP_DEFLATED) as archiv:
+        for name, inhalt in _XLSX_RAHMEN.items():
+            archiv.writestr(name, inhalt)
+        archiv.writestr("xl/workbook.xml", (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+            f'<sheets><sheet name="{escape(blattname[:31])}" sheetId="1" r:id="rId1"/></sheets>'
+            '</workbook>'
+        ))
+        yield sammler.abholen()
+
+        # force_zip64: die Größe steht beim Öffnen noch nicht fest
+        with archiv.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as blatt:
+            blatt.write((
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                '<sheetViews><sheetView workbookViewId="0"><pane ySplit="1" topLeftCell="A2" state="frozen"/></sheetView></sheetViews>'
+                '<sheetData><row>' + "".join(_zelle(k, 2) for k in kopf) + '</row>'
+            ).encode("utf-8"))
+            teile = []
+            for i, zeile in enumerate(zeilen, 1):
+                teile.append("<row>" + "".join(_zelle(w) for w in zeile) + "</row>")
+                if i % BATCHGROESSE == 0:
+                    blatt.write("".join(teile).encode("utf-8"))
+                    teile.clear()
+                    yield sammler.abholen()
+            blatt.write(("".join(teile) + "</sheetData></worksheet>").encode("utf-8"))
+    yield sammler.abholen()
+
+
+def stueckweise(format_, kopf, zeilen, blattname="Export"):
+    if format_ == "xlsx":
+        return xlsx_stueckweise(kopf, zeilen, blattname)
+    return csv_stueckweise(kopf, zeilen)
+
+
+def dateiname(art, format_, von=None, bis=None):
+    zeitraum = "".join(f"_{d.isoformat()}" for d in (von, bis) if d)
+    return f"{art}{zeitraum}.{format_}"
+
+
+def init_app(app):
+    @app.cli.command("export")
+    @click.argument("art", type=click.Choice(list(EXPORTE)))
+    @click.argument("ziel", type=click.Path(dir_okay=False, writable=True))
+    @click.option("--format", "format_", type=click.Choice(list(FORMATE)),
+                  help="Dateiformat (Standard: nach Dateiendung, sonst csv).")
+    @click.option("--lerngruppe", "lerngruppe_id", type=int)
+    @click.option("--lernfeld", "lernfeld_id", type=int)
+    @click.option("--von", type=click.DateTime(["%Y-%m-%d"]), help="ab Datum (JJJJ-MM-TT).")
+    @click.option("--bis", type=click.DateTime(["%Y-%m-%d"]), help="bis Datum (JJJJ-MM-TT).")
+    def export_befehl(art, ziel, format_, lerngruppe_id, lernfeld_id, von, bis):
+        """Exportiert Freiarbeit, Kurs-Teilnahmen oder Leistungsrückmeldungen nach ZIEL."""
+        format_ = format_ or ("xlsx" if ziel.lower().endswith(".xlsx") else "csv")
+        kopf, zeilen = kopf_und_zeilen(
+            art, lerngruppe_id, lernfeld_id, von and von.date(), bis and bis.date()
+        )
+        with open(ziel, "wb") as datei:
+            for stueck in stueckweise(format_, kopf, zeilen, EXPORTE[art][0]):
+                datei.write(stueck)
+        click.echo(f"{EXPORTE[art][0]} nach {ziel} exportiert.")
@@ -0,0 +1,135 @@
+from datetime import date
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models import Person, FreiarbeitEintrag
+from app.referenzdaten import referenzdaten
+
+
+MAX_EINTRAEGE = 200      # Einträge pro Sync-Anfrage
+CLIENT_ID_LAENGE = 36    # UUID in Textform
+
+
+class SyncErgebnis:
+    """Rückmeldung zu einem Eintrag aus der Warteschlange."""
+
+    GESPEICHERT = "gespeichert"
+    VORHANDEN = "vorhanden"      # schon früher übertragen – Client darf löschen
+    FEHLER = "fehler"            # Daten ungültig – erneutes Senden hilft nicht
+
+    def __init__(self, client_id, status, id=None, fehler=None):
+        self.client_id = client_id
+        self.status = status
+        self.id = id
+        self.fehler = fehler
+
+    def als_dict(self):
+        d = {"client_id": self.client_id, "status": self.status}
+        if self.id is not None:
+            d["id"] = self.id
+        if self.fehler:
+            d["fehler"] = self.fehler
+        return d
+
+
+def _pruefen(daten, lernfeld_ids):
+    """Wandelt einen JSON-Eintrag in Spaltenwerte um; ValueError bei Fehlern."""
+    if not isinstance(daten, dict):
+        raise ValueError("Eintrag ist kein Objekt.")
+    try:
+        werte = {
+            "person_id":   int(daten["person_id"]),
+            "lernfeld_id": int(daten["lernfeld_id"]),
+            "datum":       date.fromisoformat(daten["datum"]),
+            "phase":       str(daten["phase"]).strip(),
+            "thema_text":  str(daten.get("thema_text") or "").strip(),
+            "notiz":       str(daten.get("notiz") or "").strip() or None,
+        }
+    except (KeyError, TypeError, ValueError) as e:
+        raise ValueError(f"Ungültige Angaben: {e}") from e
+    if not werte["phase"]:
+        raise ValueError("Phase fehlt.")
+    if not werte["thema_text"]:
+        raise ValueError("Thema fehlt.")
+    if werte["lernfeld_id"] not in lernfeld_ids:
+        raise ValueError(f"Lernfeld {werte['lernfeld_id']} gibt es nicht.")
+    return werte
+
+
+def eintraege_uebernehmen(eintraege):
+    """Speichert einen Stapel Freiarbeit-Einträge aus der Offline-Warteschlange.
+
+    Jeder Eintrag trägt eine vom Client erzeugte ``client_id``. Bereits
+    gespeicherte IDs werden mit einer Abfrage erkannt und nur bestätigt, so
+    dass ein wiederholtes Senden nach Verbindungsabbruch nichts doppelt
+    anlegt. Fehlerhafte Einträge werden einzeln gemeldet, alle übrigen in
+    einer Transaktion gespeichert. Gibt eine ``SyncErgebnis``-Liste in der
+    Reihenfolge der Eingabe zurück.
+    """
+    try:
+        return _uebernehmen(eintraege)
+    except IntegrityError:
+        # Ein anderer Worker hat dieselbe client_id gerade gespeichert –
+        # beim zweiten Durchlauf erkennt die Vorabfrage sie als vorhanden.
+        db.session.rollback()
+        return _uebernehmen(eintraege)
+
+
+def _uebernehmen(eintraege):
+    lernfeld_ids = {lf.id for lf in referenzdaten.lernfelder()}
+    ergebnisse = [None] * len(eintraege)
+    gueltig = {}             # client_id -> (index, werte)
+
+    for i, daten in enumerate(eintraege):
+        client_id = daten.get("client_id") if isinstance(daten, dict) else None
+        if not isinstance(client_id, str) or not 0 < len(client_id) <= CLIENT_ID_LAENGE:
+            ergebnisse[i] = SyncErgebnis(client_id, SyncErgebnis.FEHLER,
+                                         fehler="client_id fehlt oder ist ungültig.")
+            continue
+        if client_id in gueltig:
+            ergebnisse[i] = SyncErgebnis(client_id, SyncErgebnis.VORHANDEN)
+            continue
+        try:
+            gueltig[client_id] = (i, _pruefen(daten, lernfeld_ids))
+        except ValueError as e:
+            ergebnisse[i] = SyncErgebnis(client_id, SyncErgebnis.FEHLER, fehler=str(e))
+
+    if gueltig:
+        vorhanden = dict(db.session.execute(
+            select(FreiarbeitEintrag.client_id, FreiarbeitEintrag.id)
+            .where(FreiarbeitEintrag.client_id.in_(gueltig))
+        ).all())
+        personen = set(db.session.execute(
+            select(Person.id)
+            .where(Person.id.in_({w["person_id"] for _, w in gueltig.values()}))
+        ).scalars())
+    else:
+        vorhanden, personen = {}, set()
+
+    neu = []
+    for client_id, (i, werte) in gueltig.items():
+        if client_id in vorhanden:
+            ergebnisse[i] = SyncErgebnis(client_id, SyncErgebnis.VORHANDEN, id=vorhanden[client_id])
+        elif werte["person_id"] not in personen:
+            ergebnisse[i] = SyncErgebnis(client_id, SyncErgebnis.FEHLER,
+                                         fehler=f"Person {werte['person_id']} gibt es nicht.")
+        else:
+            neu.append((i, client_id, FreiarbeitEintrag(client_id=client_id, **werte)))
+
+    # Bewusst über die ORM-Unit-of-Work statt Bulk-INSERT, damit die
+    # Mapper-Events (Caches, Versionen) für jeden Eintrag greifen.
+    db.session.add_all(e for _, _, e in neu)
+    db.session.flush()
+    # IDs vor dem Commit lesen – danach wären die Objekte expired
+    for i, client_id, eintrag in neu:
+        ergebnisse[i] = SyncErgebnis(client_id, SyncErgebnis.GESPEICHERT, id=eintrag.id)
+    db.session.commit()
+
+    # Duplikate innerhalb desselben Stapels bekommen die ID des ersten Eintrags
+    ids = {e.client_id: e.id for e in ergebnisse if e.id is not None}
+    for e in ergebnisse:
+        if e.status == SyncErgebnis.VORHANDEN and e.id is None:
+            e.id = ids.get(e.client_id)
+    return ergebnisse
@@ -0,0 +1,108 @@
+import hashlib
+import os
+import time
+from functools import wraps
+
+from flask import current_app, request, session
+
+from app import versionen
+
+# Bedingte Anfragen für selten geänderte Daten.
+#
+# Der ETag einer Antwort setzt sich aus den Änderungszählern der Tabellen
+# zusammen, aus denen sie entsteht (app/versionen.py, in derselben
+# Transaktion wie die Änderung erhöht), dazu URL und Code-Stand. Schickt der
+# Browser den ETag mit ``If-None-Match`` zurück und hat sich nichts geändert,
+# antwortet der Server mit 304, ohne die View auszuführen – eine einzige
+# Abfrage auf tabellen_version statt Abfrage, Rendern und Übertragung.
+
+STANDARD = {
+    "HTTP_CACHE_AKTIV": True,       # ETags/304 für die mit @bedingt markierten Views
+    "STATIC_MAX_AGE": 3600,         # s, die der Browser statische Dateien ohne Rückfrage nutzt
+}
+_CODE_ENDUNGEN = (".py", ".html", ".js", ".css")
+
+
+def _code_stand(wurzel):
+    """Prüfsumme über Pfade, Größen und Änderungszeiten des Programmcodes.
+
+    Ein Update (neue Templates, geänderte Views) ändert damit alle ETags;
+    alle Worker-Prozesse derselben Installation kommen auf denselben Wert.
+    """
+    pruefsumme = hashlib.sha1()
+    for ordner, unterordner, dateien in os.walk(wurzel):
+        unterordner[:] = sorted(u for u in unterordner if u != "__pycache__")
+        for name in sorted(dateien):
+            if name.endswith(_CODE_ENDUNGEN):
+                info = os.stat(os.path.join(ordner, name))
+                pruefsumme.update(f"{os.path.relpath(os.path.join(ordner, name), wurzel)}"
+                                  f":{info.st_size}:{info.st_mtime_ns};".encode())
+    return pruefsumme.hexdigest()[:12]
+
+
+def etag_berechnen(tabellen, seite=False, schluessel=None):
+    teile = [current_app.extensions["httpcache_stand"], request.full_path,
+             *map(str, versionen.stand(*tabellen))]
+    if schluessel is not None:
+        teile.append(str(schluessel()))
+    if seite:
+        # HTML-Seiten enthalten das CSRF-Token der Sitzung; gecacht werden
+        # darf die Seite nur, solange das Token darin noch gilt
+        if current_app.config.get("WTF_CSRF_ENABLED", True):
+            teile.append(session.get(current_app.config.get("WTF_CSRF_FIELD_NAME", "csrf_token"), ""))
+            gueltig = current_app.config.get("WTF_CSRF_TIME_LIMIT", 3600)
+            if gueltig:
+                teile.append(str(int(time.time() // (gueltig / 2))))
+    return hashlib.sha1("|".join(teile).encode()).hexdigest()[:20]
+
+
+def bedingt(*tabellen, seite=False, schluessel=None):
+    """Decorator: ETag aus den Tabellenständen, 304 bei unverändertem Stand.
+
+    ``tabellen`` sind alle Tabellen, deren Inhalt in die Antwort eingeht.
+    ``seite=True`` für HTML-Seiten (Sitzung, CSRF-Token, Flash-Meldungen).
+    ``schluessel`` liefert, was sonst noch in die Antwort eingeht (z. B. das
+    heutige Datum) – aufgerufen bei jeder Anfrage.
+    """
+    def decorator(view):
+        @wraps(view)
+        def bedingte_view(*args, **kwargs):
+            if request.method not in ("GET", "HEAD") or not current_app.config["HTTP_CACHE_AKTIV"]:
+                return view(*args, **kwargs)
+            if seite and session.get("_flashes"):
+                return view(*args, **kwargs)    # Meldungen müssen angezeigt werden
+
+            etag = etag_berechnen(tabellen, seite, schluessel)
+            if request.if_none_match.contains_weak(etag):
+                antwort = current_app.response_class(status=304)
+            else:
+                antwort = current_app.make_response(view(*args, **kwargs))
+                if antwort.status_code != 200:
+                    return antwort
+            # schwach: gzip (app/kompression.py) ändert die Bytes, nicht den
+            # Inhalt – 200 und 304 tragen so denselben Validator
+            antwort.set_etag(etag, weak=True)
+            # speichern ja, aber vor jeder Nutzung nachfragen
+            antwort.cache_control.no_cache = True
+            if seite:
+                antwort.cache_control.private = True
+                antwort.vary.add("Cookie")
+            return antwort
+        return bedingte_view
+    return decorator
+
+
+def init_app(app):
+    for schluessel, wert in STANDARD.items():
+        app.config.setdefault(schluessel, wert)
+    app.extensions["httpcache_stand"] = _code_stand(app.root_path)
+
+    @app.after_request
+    def _statische_dateien(response):
+        # Flask selbst schickt für /static no-cache; die Dateien tragen
+        # ETag und Last-Modified, nach Ablauf genügt also eine 304-Rückfrage
+        if request.endpoint == "static" and response.status_code in (200, 304):
+            response.cache_control.no_cache = None
+            response.cache_control.public = True
+            response.cache_control.max_age = app.config["STATIC_MAX_AGE"]
+        return response
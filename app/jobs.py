@@ -0,0 +1,284 @@
+import json
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from sqlalchemy import delete, exc, func, select, update
+
+from app import db
+from app.models import Job
+
+# Kleine Job-Warteschlange in der SQLite-Datenbank.
+#
+# ``einreihen`` legt eine Zeile an und kehrt sofort zurück; Worker-Threads
+# holen sich wartende Jobs per atomarem UPDATE … RETURNING, so dass auch
+# mehrere Prozesse dieselbe Tabelle abarbeiten können. Unter gunicorn läuft
+# dafür ein eigener Prozess (server.py), damit die Web-Worker frei bleiben;
+# ohne ihn (Entwicklung, waitress) starten die Threads im Webprozess.
+
+STANDARD = {
+    "JOBS_THREADS": 2,                  # gleichzeitig laufende Jobs je Worker-Prozess
+    "JOBS_IM_WEBPROZESS": True,         # Worker-Threads im Webprozess starten (sonst: flask jobs-worker)
+    "JOBS_ABFRAGE_INTERVALL": 2,        # s, in denen ein untätiger Worker nach neuen Jobs schaut
+    "JOBS_VERWAIST_NACH": 3600,         # s ohne Fortschritt, nach denen ein laufender Job als abgebrochen gilt
+    "JOBS_AUFBEWAHREN_TAGE": 7,         # beendete Jobs samt Dateien so lange behalten
+    "JOBS_VERZEICHNIS": None,           # None = instance/jobs
+}
+
+_AUFGABEN = {}
+_WEITER = {}
+
+
+def aufgabe(art, weiter=None):
+    """Registriert ``fn(job, **parameter)`` als Job-Art; der Rückgabewert (JSON) wird das Ergebnis.
+
+    ``weiter`` ist ein Endpoint (mit Parameter ``job_id``), auf den die
+    Statusseite nach erfolgreichem Ende weiterleitet.
+    """
+    def registrieren(fn):
+        _AUFGABEN[art] = fn
+        if weiter:
+            _WEITER[art] = weiter
+        return fn
+    return registrieren
+
+
+def weiter_endpoint(art):
+    return _WEITER.get(art)
+
+
+def verzeichnis(app=None):
+    """Ablage für Ein- und Ausgabedateien der Jobs."""
+    app = app or current_app
+    pfad = app.config.get("JOBS_VERZEICHNIS") or os.path.join(app.instance_path, "jobs")
+    os.makedirs(pfad, exist_ok=True)
+    return pfad
+
+
+def einreihen(art, **parameter):
+    """Legt einen Job an (eigener Commit) und gibt seine ID zurück."""
+    if art not in _AUFGABEN:
+        raise ValueError(f"Unbekannte Job-Art: {art}")
+    job = Job(art=art, parameter=json.dumps(parameter))
+    db.session.add(job)
+    db.session.flush()
+    job_id = job.id         # vor dem Commit lesen, sonst lädt SQLAlchemy die Zeile neu
+    db.session.commit()
+    _lokal_wecken(current_app._get_current_object())
+    return job_id
+
+
+def status(job_id):
+    """Zustand eines Jobs als Dict oder None."""
+    job = db.session.get(Job, job_id)
+    if job is None:
+        return None
+    return {
+        "id": job.id,
+        "art": job.art,
+        "zustand": job.zustand,
+        "fertig": job.fertig,
+        "gesamt": job.gesamt,
+        "ergebnis": json.loads(job.ergebnis) if job.ergebnis else None,
+        "fehler": job.fehler,
+        "erstellt_am": job.erstellt_am.isoformat(),
+        "beendet_am": job.beendet_am.isoformat() if job.beendet_am else None,
+    }
+
+
+# ── Ausführen ─────────────────────────────────────────────────────────────
+class LaufenderJob:
+    """Wird an die Aufgabe übergeben: ID, Dateiablage und Fortschritt."""
+
+    def __init__(self, job_id, verzeichnis):
+        self.id = job_id
+        self.verzeichnis = verzeichnis
+        self._zuletzt = 0.0
+
+    def datei(self, name):
+        return os.path.join(self.verzeichnis, f"{self.id}-{name}")
+
+    def fortschritt(self, fertig, gesamt=None, erzwingen=False):
+        """Meldet den Stand – höchstens einmal pro Sekunde in die Datenbank.
+
+        Geschrieben wird über eine eigene Verbindung, damit der Stand sofort
+        sichtbar ist. Hält der Job selbst gerade die Schreibsperre (z. B. ein
+        Import in einer Transaktion), fällt die Meldung aus statt zu warten.
+        """
+        jetzt = time.monotonic()
+        if not erzwingen and jetzt - self._zuletzt < 1.0:
+            return
+        self._zuletzt = jetzt
+        try:
+            with db.engine.connect() as verbindung:
+                verbindung.exec_driver_sql("PRAGMA busy_timeout = 50")
+                try:
+                    verbindung.execute(
+                        update(Job).where(Job.id == self.id)
+                        .values(fertig=fertig, gesamt=gesamt, aktualisiert_am=datetime.utcnow())
+                    )
+                    verbindung.commit()
+                finally:
+                    verbindung.rollback()
+                    verbindung.exec_driver_sql(
+                        f"PRAGMA busy_timeout = {int(current_app.config['SQLITE_BUSY_TIMEOUT'])}"
+                    )
+        except exc.OperationalError:
+            pass    # Datenbank gesperrt – die nächste Meldung kommt durch
+
+
+def _naechsten_holen(worker_name):
+    """Markiert den ältesten wartenden Job als laufend und gibt ihn zurück (oder None)."""
+    jetzt = datetime.utcnow()
+    naechster = (
+        select(Job.id).where(Job.zustand == "wartet").order_by(Job.id).limit(1).scalar_subquery()
+    )
+    zeile = db.session.execute(
+        update(Job)
+        .where(Job.id == naechster, Job.zustand == "wartet")
+        .values(zustand="laeuft", worker=worker_name, gestartet_am=jetzt, aktualisiert_am=jetzt)
+        .returning(Job.id, Job.art, Job.parameter)
+    ).first()
+    db.session.commit()
+    return zeile
+
+
+def _beenden(job_id, **werte):
+    db.session.execute(
+        update(Job).where(Job.id == job_id).values(beendet_am=datetime.utcnow(), **werte)
+    )
+    db.session.commit()
+
+
+def ausfuehren(app, job_id, art, parameter):
+    job = LaufenderJob(job_id, verzeichnis(app))
+    try:
+        fn = _AUFGABEN[art]
+        ergebnis = fn(job, **json.loads(parameter))
+    except Exception as e:
+        db.session.rollback()
+        app.logger.exception("Job %s (%s) fehlgeschlagen", job_id, art)
+        _beenden(job_id, zustand="fehler", fehler=str(e) or type(e).__name__)
+    else:
+        # Der letzte Fortschritt kann gedrosselt worden sein
+        _beenden(job_id, zustand="fertig", ergebnis=json.dumps(ergebnis),
+                 fertig=func.coalesce(Job.gesamt, Job.fertig))
+    finally:
+        db.session.remove()
+
+
+def aufraeumen(app):
+    """Beendet verwaiste Jobs und löscht alte samt ihren Dateien."""
+    jetzt = datetime.utcnow()
+    db.session.execute(
+        update(Job)
+        .where(Job.zustand == "laeuft",
+               Job.aktualisiert_am < jetzt - timedelta(seconds=app.config["JOBS_VERWAIST_NACH"]))
+        .values(zustand="fehler", fehler="abgebrochen (Worker beendet)", beendet_am=jetzt)
+    )
+    grenze = jetzt - timedelta(days=app.config["JOBS_AUFBEWAHREN_TAGE"])
+    alt = db.session.execute(
+        delete(Job).where(Job.zustand.in_(("fertig", "fehler")), Job.beendet_am < grenze)
+    ).rowcount
+    db.session.commit()
+
+    # Ergebnisse und nie abgeholte Uploads nach derselben Frist
+    ordner = verzeichnis(app)
+    for name in os.listdir(ordner):
+        pfad = os.path.join(ordner, name)
+        if datetime.utcfromtimestamp(os.path.getmtime(pfad)) < grenze:
+            os.remove(pfad)
+    return alt
+
+
+class JobWorker:
+    """Threads, die wartende Jobs abarbeiten."""
+
+    def __init__(self, app, threads):
+        self.app = app
+        self.threads = threads
+        self._signal = threading.Event()
+        self._stopp = threading.Event()
+        self._name = f"{socket.gethostname()}:{os.getpid()}"
+
+    def starten(self):
+        with self.app.app_context():
+            aufraeumen(self.app)
+            db.session.remove()
+        for i in range(self.threads):
+            threading.Thread(target=self._schleife, name=f"jobs-{i}", daemon=True).start()
+        return self
+
+    def wecken(self):
+        self._signal.set()
+
+    def stoppen(self):
+        self._stopp.set()
+        self._signal.set()
+
+    def _schleife(self):
+        intervall = self.app.config["JOBS_ABFRAGE_INTERVALL"]
+        name = f"{self._name}:{threading.current_thread().name}"
+        while not self._stopp.is_set():
+            with self.app.app_context():
+                try:
+                    zeile = _naechsten_holen(name)
+                    db.session.remove()
+                    if zeile is not None:
+                        ausfuehren(self.app, *zeile)
+                        continue
+                except exc.OperationalError:
+                    self.app.logger.warning("Jobs: Datenbank gesperrt, neuer Versuch")
+                except Exception:
+                    # Nie den Thread sterben lassen – sonst bleiben Jobs für immer
+                    # wartend; ein halb beendeter Job gilt später als verwaist
+                    self.app.logger.exception("Jobs: unerwarteter Fehler im Worker")
+                finally:
+                    db.session.remove()
+            self._signal.wait(intervall)
+            self._signal.clear()
+
+
+_lokal = {"pid": None, "worker": None}
+_lokal_lock = threading.Lock()
+
+
+def _lokal_wecken(app):
+    """Startet (einmal je Prozess) die Worker-Threads im Webprozess bzw. weckt sie."""
+    if not app.config["JOBS_IM_WEBPROZESS"]:
+        return
+    with _lokal_lock:
+        if _lokal["pid"] != os.getpid():
+            # nach einem fork gehören die Threads dem Elternprozess
+            _lokal["pid"] = os.getpid()
+            _lokal["worker"] = JobWorker(app, app.config["JOBS_THREADS"]).starten()
+    _lokal["worker"].wecken()
+
+
+def worker_ausfuehren(app, threads=None):
+    """Eigenständiger Worker (CLI, server.py) – blockiert bis zum Abbruch."""
+    worker = JobWorker(app, threads or app.config["JOBS_THREADS"]).starten()
+    try:
+        while True:
+            time.sleep(3600)
+            with app.app_context():
+                aufraeumen(app)
+                db.session.remove()
+    except KeyboardInterrupt:
+        worker.stoppen()
+
+
+def init_app(app):
+    for schluessel, wert in STANDARD.items():
+        app.config.setdefault(schluessel, wert)
+
+    @app.cli.command("jobs-worker")
+    @click.option("--threads", type=int, help="Gleichzeitige Jobs (Standard: JOBS_THREADS).")
+    def jobs_worker(threads):
+        """Arbeitet Hintergrund-Jobs ab, bis er mit Strg+C beendet wird."""
+        click.echo(f"Job-Worker läuft mit {threads or app.config['JOBS_THREADS']} Threads.")
+        worker_ausfuehren(app, threads)
@@ -0,0 +1,89 @@
+import gzip
+import zlib
+
+from flask import request
+
+# gzip für HTML, JSON und CSV.
+#
+# Übersicht und Personenliste sind große, sehr gleichförmige HTML-Seiten
+# (Tabellen, Tabs je Woche) – komprimiert gehen nur ein Bruchteil der Bytes
+# über die Leitung. Gestreamte Antworten (CSV-Export) werden Stück für Stück
+# komprimiert und nach jedem Stück geleert, damit der Download sofort
+# beginnt. Nicht angefasst werden: Server-Sent Events (die Live-Liste muss
+# jedes Ereignis sofort zustellen), bereits kodierte Antworten (/assets/
+# liefert vorkomprimierte Dateien), send_file-Antworten, kleine Antworten
+# unter KOMPRESSION_MIN_BYTES und Binärformate (XLSX, PDF und Bilder sind
+# schon gepackt).
+
+STANDARD = {
+    "KOMPRESSION_AKTIV": True,
+    "KOMPRESSION_MIN_BYTES": 1024,      # darunter lohnt sich gzip nicht
+    "KOMPRESSION_STUFE": 6,             # 1 (schnell) … 9 (klein); 6 ist der übliche Mittelweg
+    "KOMPRESSION_TYPEN": (
+        "text/html", "text/css", "text/plain", "text/csv", "text/javascript",
+        "application/json", "application/javascript", "image/svg+xml",
+    ),
+}
+
+
+def _gzip_strom(stuecke, quelle, stufe):
+    """Komprimiert einen gestreamten Body Stück für Stück (gzip-Format).
+
+    ``stuecke`` sind die Bytes aus ``quelle``, dem ursprünglichen Body.
+    """
+    packer = zlib.compressobj(stufe, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    try:
+        for teil in stuecke:
+            daten = packer.compress(teil) + packer.flush(zlib.Z_SYNC_FLUSH)
+            if daten:
+                yield daten
+        yield packer.flush()
+    finally:
+        # stream_with_context & Co. räumen in close() auf
+        schliessen = getattr(quelle, "close", None)
+        if schliessen is not None:
+            schliessen()
+
+
+def komprimieren(antwort, config):
+    if (
+        antwort.status_code != 200
+        or antwort.direct_passthrough
+        or "Content-Encoding" in antwort.headers
+        or antwort.mimetype not in config["KOMPRESSION_TYPEN"]
+        or "no-transform" in antwort.headers.get("Cache-Control", "")
+    ):
+        return antwort
+
+    antwort.vary.add("Accept-Encoding")
+    if not request.accept_encodings["gzip"]:
+        return antwort
+
+    stufe = config["KOMPRESSION_STUFE"]
+    if antwort.is_streamed:
+        antwort.response = _gzip_strom(antwort.iter_encoded(), antwort.response, stufe)
+        antwort.headers.pop("Content-Length", None)
+    else:
+        daten = antwort.get_data()
+        if len(daten) < config["KOMPRESSION_MIN_BYTES"]:
+            return antwort
+        antwort.set_data(gzip.compress(daten, compresslevel=stufe, mtime=0))
+    antwort.headers["Content-Encoding"] = "gzip"
+
+    # Die komprimierte Fassung ist nicht byte-gleich, aber inhaltlich gleich:
+    # schwacher ETag (@bedingt vergibt ohnehin nur schwache)
+    etag, schwach = antwort.get_etag()
+    if etag and not schwach:
+        antwort.set_etag(etag, weak=True)
+    return antwort
+
+
+def init_app(app):
+    for schluessel, wert in STANDARD.items():
+        app.config.setdefault(schluessel, wert)
+
+    @app.after_request
+    def _komprimieren(response):
+        if not app.config["KOMPRESSION_AKTIV"]:
+            return response
+        return komprimieren(response, app.config)
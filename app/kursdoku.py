@@ -0,0 +1,114 @@
+from collections import defaultdict
+from datetime import date
+
+from sqlalchemy import insert, select
+
+from app import db, anwesenheit
+from app.models import Person, KursRueckmeldung, KursTeilnahme
+
+
+class KursEingabe:
+    """Ein dokumentierter Kurs: Metadaten plus die Häkchen aus dem Formular."""
+
+    def __init__(self, lernfeld_id, lerngruppe_id, datum, phase, thema,
+                 krank=(), nicht_im_kurs=(), notizen=None):
+        self.lernfeld_id = lernfeld_id
+        self.lerngruppe_id = lerngruppe_id
+        self.datum = datum
+        self.phase = phase
+        self.thema = thema
+        self.krank = set(krank)
+        self.nicht_im_kurs = set(nicht_im_kurs)
+        self.notizen = notizen or {}
+
+    @classmethod
+    def aus_json(cls, daten):
+        try:
+            return cls(
+                lernfeld_id   = int(daten["lernfeld_id"]),
+                lerngruppe_id = int(daten["lerngruppe_id"]),
+                datum         = date.fromisoformat(daten["datum"]),
+                phase         = daten["phase"],
+                thema         = daten["thema"],
+                krank         = map(int, daten.get("krank", ())),
+                nicht_im_kurs = map(int, daten.get("nicht_im_kurs", ())),
+                notizen       = {int(k): v for k, v in (daten.get("notizen") or {}).items()},
+            )
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"Ungültige Kursangaben: {e}") from e
+
+
+def kurse_dokumentieren(eingaben):
+    """Speichert mehrere Kurse mit allen Teilnahmen in wenigen Statements.
+
+    Die Personen-IDs werden mit einer Abfrage gegen die Lerngruppen geprüft,
+    danach gehen alle Rückmeldungen und alle Teilnahmen jeweils als ein
+    executemany an die Datenbank. Committen muss der Aufrufer.
+    Gibt die IDs der angelegten ``KursRueckmeldung``-Zeilen zurück.
+    """
+    eingaben = list(eingaben)
+    if not eingaben:
+        return []
+    for e in eingaben:
+        if not (e.lernfeld_id and e.lerngruppe_id and e.datum and e.phase and e.thema):
+            raise ValueError("Lernfeld, Lerngruppe, Datum, Phase und Thema sind Pflichtangaben.")
+
+    # Kinder aller beteiligten Gruppen in einer Abfrage
+    gruppen = defaultdict(set)
+    for pid, gid in db.session.execute(
+        select(Person.id, Person.lerngruppe_id)
+        .where(Person.lerngruppe_id.in_({e.lerngruppe_id for e in eingaben}))
+    ):
+        gruppen[gid].add(pid)
+
+    for e in eingaben:
+        fremd = (e.krank | e.nicht_im_kurs) - gruppen[e.lerngruppe_id]
+        if fremd:
+            raise ValueError(
+                f"Personen {sorted(fremd)} gehören nicht zur gewählten Lerngruppe."
+            )
+
+    rueck_ids = db.session.execute(
+        insert(KursRueckmeldung).returning(KursRueckmeldung.id, sort_by_parameter_order=True),
+        [
+            {
+                "lernfeld_id":   e.lernfeld_id,
+                "lerngruppe_id": e.lerngruppe_id,
+                "datum":         e.datum,
+                "phase":         e.phase,
+                "thema":         e.thema,
+            }
+            for e in eingaben
+        ]
+    ).scalars().all()
+
+    teilnahmen = []
+    for rueck_id, e in zip(rueck_ids, eingaben):
+        # Abwesend (krank)
+        for pid in sorted(e.krank):
+            teilnahmen.append({
+                "rueckmeldung_id": rueck_id,
+                "person_id":       pid,
+                "status":          "abwesend",
+                "notiz":           "nicht da",
+            })
+        # Anwesend: alle, die nicht krank und nicht im Kurs sind
+        for pid in sorted(gruppen[e.lerngruppe_id] - e.krank - e.nicht_im_kurs):
+            teilnahmen.append({
+                "rueckmeldung_id": rueck_id,
+                "person_id":       pid,
+                "status":          "anwesend",
+                "notiz":           (e.notizen.get(pid) or "").strip(),
+            })
+    if teilnahmen:
+        db.session.execute(insert(KursTeilnahme), teilnahmen)
+
+        # Rollups in derselben Transaktion nachziehen
+        eingabe_zu = dict(zip(rueck_ids, eingaben))
+        gezaehlt = []
+        for t in teilnahmen:
+            e = eingabe_zu[t["rueckmeldung_id"]]
+            gezaehlt.append((t["person_id"], e.lernfeld_id, e.lerngruppe_id, e.datum, t["status"]))
+        anwesenheit.verbuchen(db.session.connection(), gezaehlt)
+
+    return rueck_ids
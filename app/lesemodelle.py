@@ -0,0 +1,66 @@
+from sqlalchemy import select
+
+from app import db
+from app.models import Lerngruppe, Person, ThemaZuweisung
+
+# Schlanke Lese-Zeilen für Listen und JSON-Antworten.
+#
+# Statt ganzer ORM-Objekte (Identity-Map, Änderungsverfolgung, dazu die
+# Textspalten zu Förderbedarf und Zielen) werden nur die angezeigten Spalten
+# gelesen und in kleine Objekte mit ``__slots__`` gepackt. Anzeigetexte
+# werden beim Anlegen einmal berechnet – der Suchindex hält dieselben Zeilen
+# dauerhaft und gibt sie bei jeder Anfrage aus.
+
+
+def name_mit_spitzname(vorname, nachname, spitzname):
+    """Anzeigename einer Person: "Vorname (Spitzname) Nachname"."""
+    return f"{vorname} ({spitzname}) {nachname}" if spitzname else f"{vorname} {nachname}"
+
+
+class PersonZeile:
+    """Person mit Lerngruppen-Namen und fertigen Anzeigetexten."""
+
+    __slots__ = ("id", "vorname", "nachname", "spitzname", "lerngruppe_id", "lerngruppe",
+                 "name_mit_spitzname", "anzeige")
+
+    def __init__(self, id, vorname, nachname, spitzname, lerngruppe_id, lerngruppe):
+        self.id = id
+        self.vorname = vorname
+        self.nachname = nachname
+        self.spitzname = spitzname
+        self.lerngruppe_id = lerngruppe_id
+        self.lerngruppe = lerngruppe
+        self.name_mit_spitzname = name_mit_spitzname(vorname, nachname, spitzname)
+        self.anzeige = f"{self.name_mit_spitzname} – {lerngruppe or ''}"
+
+    def mit_lerngruppe(self, name):
+        """Kopie mit geändertem Lerngruppen-Namen (Zeilen sind unveränderlich gedacht)."""
+        return PersonZeile(self.id, self.vorname, self.nachname, self.spitzname,
+                           self.lerngruppe_id, name)
+
+    def __repr__(self):
+        return f"<PersonZeile {self.id} {self.anzeige!r}>"
+
+
+PERSON_SPALTEN = (
+    Person.id, Person.vorname, Person.nachname, Person.spitzname, Person.lerngruppe_id, Lerngruppe.name
+)
+
+
+def personen_zeilen(lerngruppe_id=None):
+    """Alle Personen (bzw. die einer Lerngruppe), nach Lerngruppe und Name sortiert."""
+    query = select(*PERSON_SPALTEN).outerjoin(Lerngruppe, Person.lerngruppe_id == Lerngruppe.id)
+    if lerngruppe_id is not None:
+        query = query.where(Person.lerngruppe_id == lerngruppe_id)
+    query = query.order_by(Lerngruppe.name, Person.vorname, Person.nachname)
+    return [PersonZeile(*z) for z in db.session.execute(query)]
+
+
+def thema_zuweisung(person_id, lernfeld_id):
+    """(thema_basistext, bemerkung) der Themenzuweisung oder None."""
+    if not person_id or not lernfeld_id:
+        return None
+    return db.session.execute(
+        select(ThemaZuweisung.thema_basistext, ThemaZuweisung.bemerkung)
+        .where(ThemaZuweisung.person_id == person_id, ThemaZuweisung.lernfeld_id == lernfeld_id)
+    ).first()
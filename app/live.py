@@ -0,0 +1,195 @@
+import json
+import threading
+import time
+from collections import defaultdict
+from datetime import date, datetime
+
+from flask import current_app
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, object_session
+
+from app import db
+from app.lesemodelle import name_mit_spitzname
+from app.models import FreiarbeitEintrag, Person
+
+# Live-Feed der heutigen Freiarbeit-Einträge je Lernfeld (Server-Sent Events).
+#
+# Der Broker verteilt keine Daten, sondern nur ein Signal "im Lernfeld X gibt
+# es Neues". Jeder Stream holt sich daraufhin selbst alle Einträge mit einer
+# höheren ID als der zuletzt gesendeten. Dadurch geht nichts verloren, auch
+# wenn Signale zusammenfallen, und Einträge aus anderen Worker-Prozessen
+# (die dieses Signal nie sehen) kommen spätestens mit der nächsten
+# regelmäßigen Abfrage.
+#
+# Die Liste selbst rendert das Formular auf dem Server; der Stream liefert
+# nur, was danach dazukommt. Jeder offene Stream belegt einen Server-Thread.
+# Sind alle LIVE_MAX_VERBINDUNGEN belegt (oder ist es 0, etwa bei nur einem
+# Thread je Worker, siehe server.py), fragt der Browser stattdessen alle
+# LIVE_POLL_INTERVALL Sekunden nach neuen Einträgen.
+
+STANDARD = {
+    "LIVE_MAX_VERBINDUNGEN": 4,     # offene Streams pro Prozess – jeder belegt einen Thread; 0 = nur Polling
+    "LIVE_ABFRAGE_INTERVALL": 5,    # s zwischen zwei Abfragen ohne Signal (andere Worker)
+    "LIVE_DAUER": 300,              # s, danach endet der Stream und der Browser verbindet neu
+    "LIVE_POLL_INTERVALL": 15,      # s zwischen zwei Abfragen, wenn kein Stream offen ist
+}
+ANZAHL_HEUTE = 40                   # so viele Einträge zeigt die Liste beim Öffnen
+
+
+class Ueberlastet(Exception):
+    """Alle erlaubten Live-Verbindungen dieses Prozesses sind belegt."""
+
+
+class Abo:
+    def __init__(self, broker, kanal):
+        self._broker = broker
+        self.kanal = kanal
+        self._signal = threading.Event()
+
+    def melden(self):
+        self._signal.set()
+
+    def warten(self, timeout):
+        """Wartet auf ein Signal oder den Timeout; True, wenn gemeldet wurde."""
+        gemeldet = self._signal.wait(timeout)
+        # Vor der nächsten Abfrage zurücksetzen – was danach committed wird,
+        # setzt das Signal erneut
+        self._signal.clear()
+        return gemeldet
+
+    def beenden(self):
+        self._broker._abmelden(self)
+
+
+class LiveBroker:
+    """Prozessinterner Pub/Sub: Kanäle sind Lernfeld-IDs."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._abos = defaultdict(set)
+        self._anzahl = 0
+
+    def abonnieren(self, kanal, max_verbindungen):
+        with self._lock:
+            if self._anzahl >= max_verbindungen:
+                raise Ueberlastet()
+            abo = Abo(self, kanal)
+            self._abos[kanal].add(abo)
+            self._anzahl += 1
+            return abo
+
+    def _abmelden(self, abo):
+        with self._lock:
+            abos = self._abos.get(abo.kanal)
+            if abos and abo in abos:
+                abos.discard(abo)
+                self._anzahl -= 1
+                if not abos:
+                    del self._abos[abo.kanal]
+
+    def veroeffentlichen(self, kanal):
+        with self._lock:
+            abos = list(self._abos.get(kanal, ()))
+        for abo in abos:
+            abo.melden()
+
+
+live_broker = LiveBroker()
+
+
+def eintraege_heute(lernfeld_id, seit=0, limit=ANZAHL_HEUTE):
+    """Heutige Einträge im Lernfeld mit ``id > seit`` als Zeilen.
+
+    Ohne ``seit`` die ``limit`` neuesten (neueste zuerst, so zeigt sie das
+    Formular), sonst die ``limit`` ältesten noch nicht gesendeten.
+    """
+    heute = date.today()
+    query = (
+        select(
+            FreiarbeitEintrag.id, FreiarbeitEintrag.client_id, FreiarbeitEintrag.datum,
+            FreiarbeitEintrag.phase, FreiarbeitEintrag.thema_text,
+            Person.vorname, Person.spitzname, Person.nachname,
+        )
+        .join(Person, FreiarbeitEintrag.person_id == Person.id)
+        .where(
+            FreiarbeitEintrag.lernfeld_id == lernfeld_id,
+            FreiarbeitEintrag.gespeichert_am >= datetime(heute.year, heute.month, heute.day),
+        )
+        .limit(limit)
+    )
+    if seit:
+        return db.session.execute(
+            query.where(FreiarbeitEintrag.id > seit).order_by(FreiarbeitEintrag.id.asc())
+        ).all()
+    # Ohne "id > 0": sonst läuft SQLite rückwärts über den Primärschlüssel
+    # durch die ganze Tabelle statt über (lernfeld_id, gespeichert_am)
+    return db.session.execute(query.order_by(FreiarbeitEintrag.id.desc())).all()
+
+
+def neue_eintraege(lernfeld_id, seit=0, limit=ANZAHL_HEUTE):
+    """Wie ``eintraege_heute``, aber als Dicts für JSON und älteste zuerst."""
+    zeilen = eintraege_heute(lernfeld_id, seit, limit)
+    if not seit:
+        zeilen.reverse()
+    return [
+        {
+            "id":         z.id,
+            "client_id":  z.client_id,
+            "datum":      z.datum.isoformat(),
+            "phase":      z.phase,
+            "thema_text": z.thema_text,
+            "anzeige":    name_mit_spitzname(z.vorname, z.nachname, z.spitzname),
+        }
+        for z in zeilen
+    ]
+
+
+def strom(abo, lernfeld_id, seit=0):
+    """Erzeugt den Event-Stream; muss mit ``stream_with_context`` laufen."""
+    intervall = current_app.config["LIVE_ABFRAGE_INTERVALL"]
+    ende = time.monotonic() + current_app.config["LIVE_DAUER"]
+    try:
+        # Browser soll nach Ende des Streams zügig neu verbinden
+        yield "retry: 2000\n\n"
+        while True:
+            eintraege = neue_eintraege(lernfeld_id, seit)
+            # Verbindung und Lese-Snapshot nicht über die Wartezeit halten
+            db.session.remove()
+            if eintraege:
+                for e in eintraege:
+                    yield f"id: {e['id']}\nevent: eintrag\ndata: {json.dumps(e)}\n\n"
+                seit = eintraege[-1]["id"]
+                if len(eintraege) == ANZAHL_HEUTE:
+                    continue      # es liegen vermutlich noch mehr bereit
+            else:
+                yield ": ping\n\n"
+            rest = ende - time.monotonic()
+            if rest <= 0:
+                return
+            abo.warten(min(intervall, rest))
+    finally:
+        abo.beenden()
+
+
+# ── Nach dem Commit melden ────────────────────────────────────────────────
+@event.listens_for(FreiarbeitEintrag, "after_insert")
+def _eintrag_neu(mapper, connection, target):
+    session = object_session(target)
+    if session is not None and target.lernfeld_id is not None:
+        session.info.setdefault("live", set()).add(target.lernfeld_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _nach_commit(session):
+    for kanal in session.info.pop("live", ()):
+        live_broker.veroeffentlichen(kanal)
+
+
+@event.listens_for(Session, "after_rollback")
+def _nach_rollback(session):
+    session.info.pop("live", None)
+
+
+def init_app(app):
+    for schluessel, wert in STANDARD.items():
+        app.config.setdefault(schluessel, wert)
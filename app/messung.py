@@ -0,0 +1,188 @@
+import heapq
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+
+from flask import Response, g, has_request_context, request
+from sqlalchemy import event
+
+from app import db
+
+# Laufzeitmessung je Request (nur mit MESSUNG_AKTIV = True).
+#
+# Gezählt werden Wandzeit, Anzahl und Dauer der SQL-Abfragen über die
+# Engine-Events. Das Ergebnis geht als ``Server-Timing``-Header an den
+# Browser (Entwicklerwerkzeuge → Netzwerk → Timing), langsame Requests und
+# Abfragen landen im Log und die Summen je Endpoint unter ``/metrics``.
+# Die Summen gelten je Prozess – unter gunicorn hat jeder Worker seine eigenen.
+# Bei gestreamten Antworten (Export, Live-Liste) endet die Messung, bevor
+# der Body gesendet wird.
+
+STANDARD = {
+    "MESSUNG_AKTIV": False,             # ohne das bleibt alles abgeschaltet
+    "MESSUNG_STICHPROBE": 1.0,          # Anteil der Requests, die gemessen werden (0–1)
+    "MESSUNG_LANGSAM_MS": 500,          # Requests ab dieser Dauer loggen
+    "MESSUNG_VIELE_ABFRAGEN": 50,       # … oder ab so vielen Abfragen (N+1-Verdacht)
+    "MESSUNG_LANGSAME_ABFRAGE_MS": 100, # einzelne Abfragen ab dieser Dauer loggen
+    "MESSUNG_TOP_ABFRAGEN": 3,          # so viele der langsamsten Abfragen im Log nennen
+    "MESSUNG_SERVER_TIMING": True,      # Server-Timing-Header setzen
+    "MESSUNG_METRIKEN": True,           # /metrics bereitstellen
+}
+# Obergrenzen der Histogramm-Klassen in Sekunden
+KLASSEN = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+_LEERZEICHEN = re.compile(r"\s+")
+
+
+class Messung:
+    """Messwerte eines Requests."""
+
+    __slots__ = ("beginn", "abfragen", "sql_dauer", "langsamste", "top")
+
+    def __init__(self, top):
+        self.beginn = time.perf_counter()
+        self.abfragen = 0
+        self.sql_dauer = 0.0
+        self.langsamste = []      # Min-Heap aus (dauer, statement)
+        self.top = top
+
+    def abfrage(self, dauer, statement):
+        self.abfragen += 1
+        self.sql_dauer += dauer
+        if len(self.langsamste) < self.top:
+            heapq.heappush(self.langsamste, (dauer, statement))
+        elif self.langsamste and dauer > self.langsamste[0][0]:
+            heapq.heapreplace(self.langsamste, (dauer, statement))
+
+    def top_abfragen(self):
+        return sorted(self.langsamste, reverse=True)
+
+
+class Metriken:
+    """Summen je (Methode, Endpoint) für /metrics."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._werte = defaultdict(lambda: {
+            "anzahl": 0, "dauer": 0.0, "abfragen": 0, "sql_dauer": 0.0,
+            "klassen": [0] * len(KLASSEN),
+        })
+
+    def erfassen(self, methode, endpoint, dauer, messung):
+        with self._lock:
+            w = self._werte[(methode, endpoint)]
+            w["anzahl"] += 1
+            w["dauer"] += dauer
+            w["abfragen"] += messung.abfragen
+            w["sql_dauer"] += messung.sql_dauer
+            for i, grenze in enumerate(KLASSEN):
+                if dauer <= grenze:
+                    w["klassen"][i] += 1
+
+    def als_text(self):
+        """Prometheus-Textformat."""
+        with self._lock:
+            werte = {k: dict(v, klassen=list(v["klassen"])) for k, v in self._werte.items()}
+        zeilen = [
+            "# HELP lerndoku_request_dauer_sekunden Bearbeitungszeit der Requests.",
+            "# TYPE lerndoku_request_dauer_sekunden histogram",
+        ]
+        for (methode, endpoint), w in sorted(werte.items()):
+            labels = f'methode="{methode}",endpoint="{endpoint}"'
+            for grenze, anzahl in zip(KLASSEN, w["klassen"]):
+                zeilen.append(f'lerndoku_request_dauer_sekunden_bucket{{{labels},le="{grenze}"}} {anzahl}')
+            zeilen.append(f'lerndoku_request_dauer_sekunden_bucket{{{labels},le="+Inf"}} {w["anzahl"]}')
+            zeilen.append(f'lerndoku_request_dauer_sekunden_sum{{{labels}}} {w["dauer"]:.6f}')
+            zeilen.append(f'lerndoku_request_dauer_sekunden_count{{{labels}}} {w["anzahl"]}')
+        for name, schluessel, hilfe in (
+            ("lerndoku_sql_abfragen_total", "abfragen", "SQL-Abfragen in gemessenen Requests."),
+            ("lerndoku_sql_dauer_sekunden_total", "sql_dauer", "Summe der SQL-Zeit in gemessenen Requests."),
+        ):
+            zeilen += [f"# HELP {name} {hilfe}", f"# TYPE {name} counter"]
+            for (methode, endpoint), w in sorted(werte.items()):
+                zeilen.append(f'{name}{{methode="{methode}",endpoint="{endpoint}"}} {w[schluessel]:g}')
+        return "\n".join(zeilen) + "\n"
+
+
+metriken = Metriken()
+
+
+def aktuelle_messung():
+    """Messung des laufenden Requests oder None (nicht gemessen, Job-Thread, CLI)."""
+    if has_request_context():
+        return g.get("_messung")
+    return None
+
+
+def _kurz(statement, laenge=200):
+    statement = _LEERZEICHEN.sub(" ", statement).strip()
+    return statement if len(statement) <= laenge else statement[:laenge] + " …"
+
+
+def init_app(app):
+    for schluessel, wert in STANDARD.items():
+        app.config.setdefault(schluessel, wert)
+    if not app.config["MESSUNG_AKTIV"]:
+        return
+
+    stichprobe = float(app.config["MESSUNG_STICHPROBE"])
+    langsam = app.config["MESSUNG_LANGSAM_MS"] / 1000
+    viele = app.config["MESSUNG_VIELE_ABFRAGEN"]
+    langsame_abfrage = app.config["MESSUNG_LANGSAME_ABFRAGE_MS"] / 1000
+    top = app.config["MESSUNG_TOP_ABFRAGEN"]
+    server_timing = app.config["MESSUNG_SERVER_TIMING"]
+
+    with app.app_context():
+        engine = db.engine
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _abfrage_beginn(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._messung_beginn = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _abfrage_ende(conn, cursor, statement, parameters, context, executemany):
+        beginn = getattr(context, "_messung_beginn", None)
+        if beginn is None:
+            return
+        dauer = time.perf_counter() - beginn
+        messung = aktuelle_messung()
+        if messung is not None:
+            messung.abfrage(dauer, statement)
+        if dauer >= langsame_abfrage:
+            app.logger.warning("Langsame Abfrage (%.0f ms): %s", dauer * 1000, _kurz(statement, 500))
+
+    @app.before_request
+    def _messung_starten():
+        if stichprobe >= 1 or random.random() < stichprobe:
+            g._messung = Messung(top)
+
+    @app.after_request
+    def _messung_beenden(response):
+        messung = g.pop("_messung", None)
+        if messung is None:
+            return response
+        dauer = time.perf_counter() - messung.beginn
+        endpoint = request.endpoint or "unbekannt"
+        metriken.erfassen(request.method, endpoint, dauer, messung)
+
+        if server_timing:
+            response.headers.add(
+                "Server-Timing",
+                f'app;dur={dauer * 1000:.1f}, '
+                f'db;dur={messung.sql_dauer * 1000:.1f};desc="{messung.abfragen} Abfragen"',
+            )
+        if dauer >= langsam or messung.abfragen >= viele:
+            app.logger.warning(
+                "Langsamer Request %s %s → %s: %.0f ms, %d Abfragen (%.0f ms SQL)%s",
+                request.method, request.full_path.rstrip("?"), response.status_code,
+                dauer * 1000, messung.abfragen, messung.sql_dauer * 1000,
+                "".join(f"\n  {d * 1000:6.1f} ms  {_kurz(s)}" for d, s in messung.top_abfragen()),
+            )
+        return response
+
+    if app.config["MESSUNG_METRIKEN"]:
+        @app.route("/metrics")
+        def metriken_anzeigen():
+            return Response(metriken.als_text(), mimetype="text/plain; version=0.0.4")
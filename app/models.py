@@ -13,6 +13,10 @@ class Person(db.Model):
     foerderbedarf_massnahmen = db.Column(db.Text)  # Notiz zum Förderbedarf, Maßnahmen wie "Taschenrechenr nutzen"
     ziele = db.Column(db.Text)
 
+    __table_args__ = (
+        db.Index("ix_person_lerngruppe_name", "lerngruppe_id", "vorname", "nachname"),
+    )
+
     freiarbeit_eintraege = db.relationship('FreiarbeitEintrag', backref='person', lazy=True)
     
     @property
@@ -42,6 +46,10 @@ class ThemaZuweisung(db.Model):  #persönliche Themen der Kinder zu Lernfeldern
     thema_basistext = db.Column(db.String(255))  # z. B. "Dezimalbrüche"
     bemerkung = db.Column(db.Text)        # z. B. "hat eigenes Material"
 
+    __table_args__ = (
+        db.Index("uq_thema_zuweisung_person_lernfeld", "person_id", "lernfeld_id", unique=True),
+    )
+
 class FreiarbeitEintrag(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     person_id = db.Column(db.Integer, db.ForeignKey('person.id'), nullable=False)
@@ -49,10 +57,17 @@ class FreiarbeitEintrag(db.Model):
     phase = db.Column(db.String(50), nullable=False)
     notiz = db.Column(db.Text)
     lernfeld_id = db.Column(db.Integer, db.ForeignKey('lernfeld.id'))
-    lernfeld    = db.relationship('Lernfeld', lazy='joined')  # ← neu
+    lernfeld    = db.relationship('Lernfeld')    # Ladeoptionen siehe app/abfragen.py
     thema_text = db.Column(db.Text)
     gespeichert_am = db.Column(db.DateTime, default=datetime.utcnow)  #Datum wann es gespeichert wurde
-    
+    client_id = db.Column(db.String(36), unique=True)   # Idempotenz-Schlüssel aus der Offline-Warteschlange
+
+    __table_args__ = (
+        db.Index("ix_freiarbeit_eintrag_person_datum", "person_id", "datum", "phase"),         # Detailseite, Tabs
+        db.Index("ix_freiarbeit_eintrag_lernfeld_gespeichert", "lernfeld_id", "gespeichert_am"),  # "Einträge heute"
+        db.Index("ix_freiarbeit_eintrag_person_lernfeld", "person_id", "lernfeld_id", "datum"),   # Übersicht, Lernfeld-Tab
+    )
+
 class Lerngruppe(db.Model):
     id   = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), unique=True, nullable=False)
@@ -69,8 +84,8 @@ class KursRueckmeldung(db.Model):
     thema          = db.Column(db.String(255), nullable=False)
     gespeichert_am = db.Column(db.DateTime, default=datetime.utcnow)
 
-    lernfeld   = db.relationship('Lernfeld',   lazy='joined')
-    lerngruppe = db.relationship('Lerngruppe', lazy='joined')
+    lernfeld   = db.relationship('Lernfeld')
+    lerngruppe = db.relationship('Lerngruppe')
 
     teilnahmen  = db.relationship('KursTeilnahme', backref='rueckmeldung', lazy=True)
 
@@ -82,6 +97,11 @@ class KursTeilnahme(db.Model):
     status      = db.Column(db.Enum('anwesend','abwesend', name='status_enum'), nullable=False)
     notiz       = db.Column(db.Text)
 
+    __table_args__ = (
+        db.Index("ix_kurs_teilnahme_person", "person_id", "rueckmeldung_id"),
+        db.Index("ix_kurs_teilnahme_rueckmeldung", "rueckmeldung_id"),
+    )
+
 
 class LeistungsRueckmeldung(db.Model):
     __tablename__ = 'leistungs_rueckmeldung'
@@ -94,5 +114,64 @@ class LeistungsRueckmeldung(db.Model):
     rueckmeldung  = db.Column(db.Text, nullable=False)        # Kompetenzen/Freitext
     note          = db.Column(db.String(50))                  # Noten/Punkte optional
 
-    lernfeld = db.relationship('Lernfeld', lazy='joined')
-    person   = db.relationship('Person', lazy='joined')
\ No newline at end of file
+    __table_args__ = (
+        db.Index("ix_leistungs_rueckmeldung_person_datum", "person_id", "datum"),
+    )
+
+    lernfeld = db.relationship('Lernfeld')
+    person   = db.relationship('Person')
+
+class TabellenVersion(db.Model):     # Änderungszähler je Tabelle, für Caches über Prozessgrenzen hinweg
+    __tablename__ = 'tabellen_version'
+    tabelle = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+class Wochenplan(db.Model):     # vorberechnetes Wochenplan-Raster je Person und Kalenderwoche, siehe app/wochenplan.py
+    __tablename__ = 'wochenplan'
+    person_id = db.Column(db.Integer, db.ForeignKey('person.id'), primary_key=True)
+    jahr      = db.Column(db.Integer, primary_key=True)     # ISO-Jahr
+    kw        = db.Column(db.Integer, primary_key=True)     # ISO-Kalenderwoche
+    montag    = db.Column(db.Date, nullable=False)
+    zellen    = db.Column(db.Text, nullable=False, default="[]")   # JSON: [[ap, tag, lernfeld_id, thema, notiz], …]
+
+class AnwesenheitMonat(db.Model):     # Rollup aus KursTeilnahme, gepflegt von app/anwesenheit.py
+    __tablename__ = 'anwesenheit_monat'
+    person_id   = db.Column(db.Integer, db.ForeignKey('person.id'), primary_key=True)
+    lernfeld_id = db.Column(db.Integer, db.ForeignKey('lernfeld.id'), primary_key=True)
+    jahr        = db.Column(db.Integer, primary_key=True)
+    monat       = db.Column(db.Integer, primary_key=True)
+    anwesend    = db.Column(db.Integer, nullable=False, default=0)
+    abwesend    = db.Column(db.Integer, nullable=False, default=0)
+    zuletzt_anwesend = db.Column(db.Date)     # letzter Kurstag im Monat mit Anwesenheit
+
+    __table_args__ = (
+        db.Index("ix_anwesenheit_monat_zeitraum", "jahr", "monat", "person_id"),   # Fehlzeiten-Warnungen
+    )
+
+class AnwesenheitWoche(db.Model):     # Rollup je Lerngruppe und ISO-Woche
+    __tablename__ = 'anwesenheit_woche'
+    lerngruppe_id = db.Column(db.Integer, db.ForeignKey('lerngruppe.id'), primary_key=True)
+    jahr          = db.Column(db.Integer, primary_key=True)     # ISO-Jahr
+    kw            = db.Column(db.Integer, primary_key=True)
+    anwesend      = db.Column(db.Integer, nullable=False, default=0)
+    abwesend      = db.Column(db.Integer, nullable=False, default=0)
+
+class Job(db.Model):     # Hintergrundaufgaben (Import, Berichte, …), abgearbeitet von app/jobs.py
+    __tablename__ = 'job'
+    id             = db.Column(db.Integer, primary_key=True)
+    art            = db.Column(db.String(50), nullable=False)
+    parameter      = db.Column(db.Text, nullable=False, default="{}")   # JSON
+    zustand        = db.Column(db.String(20), nullable=False, default="wartet")   # wartet | laeuft | fertig | fehler
+    fertig         = db.Column(db.Integer, nullable=False, default=0)
+    gesamt         = db.Column(db.Integer)
+    ergebnis       = db.Column(db.Text)            # JSON
+    fehler         = db.Column(db.Text)
+    worker         = db.Column(db.String(100))     # Rechner:PID:Thread, der den Job ausführt
+    erstellt_am    = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    gestartet_am   = db.Column(db.DateTime)
+    aktualisiert_am= db.Column(db.DateTime)        # letzte Fortschrittsmeldung, erkennt verwaiste Jobs
+    beendet_am     = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.Index("ix_job_zustand", "zustand", "id"),     # nächster wartender Job
+    )
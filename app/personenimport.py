@@ -0,0 +1,241 @@
+import codecs
+import csv
+import os
+from itertools import chain
+
+from sqlalchemy import insert
+
+from app import db
+from app.jobs import aufgabe
+from app.models import Person, Lerngruppe
+
+
+BLOCKGROESSE = 64 * 1024     # Bytes, die pro Lesevorgang dekodiert werden
+BATCHGROESSE = 500           # Personen pro INSERT (executemany)
+MAX_FEHLER = 1000            # so viele Fehlerzeilen werden im Bericht aufgeführt
+
+# Spaltenköpfe aus Excel & Co. auf die internen Namen abbilden
+_KOPF_UMLAUTE = str.maketrans({"ä": "ae", "ö": "oe", "ü": "ue", "ß": "ss"})
+_KOPF_ALIASE = {
+    "massnahme": "massnahmen",
+    "foerderbedarf_massnahmen": "massnahmen",
+    "foerdermassnahmen": "massnahmen",
+    "gruppe": "lerngruppe",
+    "klassenstufe": "stufe",
+}
+
+
+class ImportErgebnis:
+    def __init__(self):
+        self.angelegt = 0
+        self.gruppen_neu = []
+        self.fehler = []          # (zeilennummer, meldung)
+        self.fehler_gesamt = 0
+        self.kodierung = None
+
+    def fehler_melden(self, zeile, meldung):
+        self.fehler_gesamt += 1
+        if len(self.fehler) < MAX_FEHLER:
+            self.fehler.append((zeile, meldung))
+
+    def als_dict(self):
+        return {
+            "angelegt": self.angelegt,
+            "gruppen_neu": self.gruppen_neu,
+            "fehler": self.fehler,
+            "fehler_gesamt": self.fehler_gesamt,
+            "kodierung": self.kodierung,
+        }
+
+
+def kodierung_erkennen(probe):
+    """BOM → UTF-8 → Windows-1252 (Excel unter Windows speichert meist so)."""
+    if probe.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    if probe.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return "utf-16"
+    try:
+        # final=False: ein am Blockende abgeschnittenes Zeichen ist kein Fehler
+        codecs.getincrementaldecoder("utf-8")().decode(probe, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        return "cp1252"
+
+
+class Kodierungsfehler(ValueError):
+    """Bytes, die in der gewählten Kodierung ungültig sind; ``zeile`` zählt ab 1."""
+
+    def __init__(self, kodierung, zeile):
+        super().__init__(f"Zeile {zeile} ist kein gültiges {kodierung}.")
+        self.kodierung = kodierung
+        self.zeile = zeile
+
+
+def _zeilen(bloecke, kodierung):
+    """Dekodiert Byte-Blöcke schrittweise und liefert einzelne Zeilen (mit Zeilenende).
+
+    Dekodiert wird strikt: ungültige Bytes lösen ``Kodierungsfehler`` mit
+    der betroffenen Zeile aus, statt still als „�“ importiert zu werden.
+    """
+    decoder = codecs.getincrementaldecoder(kodierung)()
+    rest = ""
+    zeilen = 0
+    for block in chain(bloecke, [None]):
+        try:
+            text = decoder.decode(b"", final=True) if block is None else decoder.decode(block)
+        except UnicodeDecodeError as e:
+            davor = e.object[:e.start].decode(kodierung, errors="replace")
+            raise Kodierungsfehler(kodierung, zeilen + davor.count("\n") + 1) from e
+        teile = (rest + text).split("\n")
+        rest = teile.pop()
+        for t in teile:
+            zeilen += 1
+            yield t + "\n"
+    if rest:
+        yield rest
+
+
+def _kopf_normalisieren(name):
+    name = (name or "").strip().lower().translate(_KOPF_UMLAUTE).replace(" ", "_")
+    return _KOPF_ALIASE.get(name, name)
+
+
+def personen_importieren(stream, fortschritt=None):
+    """Liest eine CSV-Datei blockweise ein und legt die Personen in Batches an.
+
+    Fehlerhafte Zeilen werden übersprungen und im Ergebnis gemeldet, alle
+    übrigen in einer Transaktion gespeichert. ``fortschritt(bytes)`` wird
+    nach jedem gelesenen Block aufgerufen.
+
+    Die Kodierung wird am ersten Block erkannt. Steht das erste Nicht-ASCII-
+    Zeichen einer Windows-Datei erst dahinter, beginnt der Import als
+    Windows-1252 von vorn; ist die Datei auch so nicht lesbar, wird nichts
+    gespeichert und die Zeile gemeldet.
+    """
+    probe = stream.read(BLOCKGROESSE)
+    kodierung = kodierung_erkennen(probe)
+    try:
+        return _einlesen(stream, probe, kodierung, fortschritt)
+    except Kodierungsfehler as e:
+        db.session.rollback()
+        fehler = e
+    if kodierung == "utf-8" and stream.seekable():
+        stream.seek(0)
+        try:
+            return _einlesen(stream, stream.read(BLOCKGROESSE), "cp1252", fortschritt)
+        except Kodierungsfehler as e:
+            db.session.rollback()
+            fehler = e
+    ergebnis = ImportErgebnis()
+    ergebnis.kodierung = fehler.kodierung
+    ergebnis.fehler_melden(
+        fehler.zeile, "Die Zeile enthält Zeichen, die sich nicht lesen lassen – "
+                      "bitte die Datei als „CSV UTF-8“ speichern. Es wurde nichts importiert."
+    )
+    return ergebnis
+
+
+def _einlesen(stream, probe, kodierung, fortschritt):
+    ergebnis = ImportErgebnis()
+    ergebnis.kodierung = kodierung
+    gelesen = len(probe)
+
+    def lesen():
+        nonlocal gelesen
+        block = stream.read(BLOCKGROESSE)
+        gelesen += len(block)
+        if fortschritt:
+            fortschritt(gelesen)
+        return block
+
+    bloecke = chain([probe], iter(lesen, b""))
+
+    vorschau = codecs.getincrementaldecoder(kodierung)(errors="replace").decode(probe[:4096])
+    try:
+        dialect = csv.Sniffer().sniff(vorschau[:1024], delimiters=";,\t")
+    except csv.Error:
+        dialect = csv.excel
+
+    reader = csv.reader(_zeilen(bloecke, kodierung), dialect=dialect)
+    kopf = next(reader, None)
+    if not kopf:
+        ergebnis.fehler_melden(1, "Die Datei ist leer.")
+        return ergebnis
+    spalten = [_kopf_normalisieren(k) for k in kopf]
+    for pflicht in ("vorname", "nachname", "lerngruppe"):
+        if pflicht not in spalten:
+            ergebnis.fehler_melden(1, f"Spalte „{pflicht}“ fehlt in der Kopfzeile.")
+    if ergebnis.fehler:
+        return ergebnis
+
+    # Alle Lerngruppen mit einer Abfrage vorab auflösen
+    gruppen = {name: gid for gid, name in db.session.query(Lerngruppe.id, Lerngruppe.name)}
+
+    batch = []
+    for werte in reader:
+        zeile_nr = reader.line_num
+        if not any(w.strip() for w in werte):
+            continue
+        zeile = dict(zip(spalten, (w.strip() for w in werte)))
+
+        v = zeile.get("vorname", "")
+        n = zeile.get("nachname", "")
+        grp_name = zeile.get("lerngruppe", "")
+        if not v or not n:
+            ergebnis.fehler_melden(zeile_nr, "Vor- oder Nachname fehlt.")
+            continue
+        if not grp_name:
+            ergebnis.fehler_melden(zeile_nr, f"Keine Lerngruppe für {v} {n} angegeben.")
+            continue
+        try:
+            stufe = int(zeile.get("stufe") or 0)
+        except ValueError:
+            ergebnis.fehler_melden(zeile_nr, f"Ungültige Stufe „{zeile.get('stufe')}“.")
+            continue
+
+        gid = gruppen.get(grp_name)
+        if gid is None:
+            gruppe = Lerngruppe(name=grp_name)
+            db.session.add(gruppe)
+            db.session.flush()
+            gid = gruppen[grp_name] = gruppe.id
+            ergebnis.gruppen_neu.append(grp_name)
+
+        batch.append({
+            "vorname":        v,
+            "nachname":       n,
+            "spitzname":      zeile.get("spitzname") or None,
+            "lerngruppe_id":  gid,
+            "stufe":          stufe,
+            "foerderbedarf":  zeile.get("foerderbedarf", ""),
+            "foerderbedarf_massnahmen": zeile.get("massnahmen", ""),
+            "ziele":          zeile.get("ziele", ""),
+        })
+        if len(batch) >= BATCHGROESSE:
+            ergebnis.angelegt += _einfuegen(batch)
+
+    ergebnis.angelegt += _einfuegen(batch)
+    db.session.commit()
+    return ergebnis
+
+
+def _einfuegen(batch):
+    if not batch:
+        return 0
+    db.session.execute(insert(Person), batch)
+    anzahl = len(batch)
+    batch.clear()
+    return anzahl
+
+
+@aufgabe("personen_import", weiter="personen.import_ergebnis")
+def _import_job(job, datei):
+    """Importiert eine hochgeladene CSV aus der Job-Ablage und löscht sie danach."""
+    pfad = os.path.join(job.verzeichnis, datei)
+    groesse = os.path.getsize(pfad)
+    try:
+        with open(pfad, "rb") as stream:
+            ergebnis = personen_importieren(stream, lambda gelesen: job.fortschritt(gelesen, groesse))
+    finally:
+        os.remove(pfad)
+    return ergebnis.als_dict()
@@ -0,0 +1,111 @@
+import threading
+from collections import namedtuple
+
+from flask import g, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from app import db, versionen
+from app.models import Lernfeld, Lerngruppe
+
+
+# Schlanke Kopie einer Zeile – ORM-Objekte dürfen die Session nicht überleben
+Referenz = namedtuple("Referenz", "id name")
+
+_MODELLE = {
+    "lernfelder":  Lernfeld,
+    "lerngruppen": Lerngruppe,
+}
+
+
+class Referenzdaten:
+    """Cache für selten geänderte Auswahllisten (Lernfelder, Lerngruppen).
+
+    Die Listen werden pro Prozess einmal geladen und zusätzlich im
+    Request (``g``) abgelegt. Schreibzugriffe auf die Tabellen verwerfen den
+    Cache nach dem Commit; Änderungen aus anderen Prozessen erkennt er am
+    Tabellenstand in ``versionen``.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cache = {}
+
+    def lernfelder(self):
+        return self._holen("lernfelder")
+
+    def lerngruppen(self):
+        return self._holen("lerngruppen")
+
+    def choices(self, art):
+        """Fertige ``(id, name)``-Paare für ``SelectField.choices``."""
+        return [(r.id, r.name) for r in self._holen(art)]
+
+    def name(self, art, id):
+        for r in self._holen(art):
+            if r.id == id:
+                return r.name
+        return None
+
+    def _holen(self, art):
+        im_request = has_app_context()
+        if im_request:
+            gecacht = g.setdefault("_referenzdaten", {})
+            if art in gecacht:
+                return gecacht[art]
+
+        model = _MODELLE[art]
+        stand = versionen.stand(model.__tablename__)
+        eintrag = self._cache.get(art)
+        if eintrag is not None and eintrag[0] == stand:
+            liste = eintrag[1]
+        else:
+            liste = tuple(
+                Referenz(*z)
+                for z in db.session.query(model.id, model.name).order_by(model.name)
+            )
+            with self._lock:
+                self._cache[art] = (stand, liste)
+
+        if im_request:
+            gecacht[art] = liste
+        return liste
+
+    def invalidieren(self, *arten):
+        with self._lock:
+            for art in arten or tuple(self._cache):
+                self._cache.pop(art, None)
+        if has_app_context():
+            gecacht = g.get("_referenzdaten")
+            if gecacht:
+                for art in arten or tuple(gecacht):
+                    gecacht.pop(art, None)
+
+
+referenzdaten = Referenzdaten()
+
+
+# ── Invalidierung über SQLAlchemy-Events ─────────────────────────────────
+def _geaendert(art):
+    def listener(mapper, connection, target):
+        session = object_session(target)
+        if session is not None:
+            session.info.setdefault("referenzdaten", set()).add(art)
+    return listener
+
+
+for _art, _model in _MODELLE.items():
+    for _ereignis in ("after_insert", "after_update", "after_delete"):
+        event.listen(_model, _ereignis, _geaendert(_art))
+
+
+@event.listens_for(Session, "after_commit")
+def _nach_commit(session):
+    arten = session.info.pop("referenzdaten", None)
+    if arten:
+        referenzdaten.invalidieren(*arten)
+
+
+@event.listens_for(Session, "after_rollback")
+def _nach_rollback(session):
+    session.info.pop("referenzdaten", None)
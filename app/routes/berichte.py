@@ -0,0 +1,23 @@
+from flask import Blueprint, render_template, redirect, url_for, request
+from app import jobs
+from app.referenzdaten import referenzdaten
+from datetime import date
+
+bp = Blueprint("berichte", __name__, url_prefix="/berichte")
+
+
+@bp.route("/", methods=["GET", "POST"])
+def start():
+    if request.method == "POST":
+        # Ungültige Angaben werden wie leere Felder behandelt
+        von = request.form.get("von", type=date.fromisoformat)
+        bis = request.form.get("bis", type=date.fromisoformat)
+        job_id = jobs.einreihen(
+            "berichte",
+            lerngruppe_id=request.form.get("lerngruppe_id", type=int),
+            von=von and von.isoformat(),
+            bis=bis and bis.isoformat(),
+        )
+        return redirect(url_for("jobs.anzeigen", job_id=job_id))
+
+    return render_template("berichte/start.html", lerngruppen=referenzdaten.lerngruppen())
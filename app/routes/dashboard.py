@@ -0,0 +1,41 @@
+from flask import Blueprint, render_template, request
+from app.dashboard import dashboard_laden
+from app.anwesenheit import fehlzeiten_warnungen, wochen_bericht
+from app.referenzdaten import referenzdaten
+from datetime import date
+
+bp = Blueprint("dashboard", __name__, url_prefix="/dashboard")
+
+
+@bp.route("/")
+def uebersicht():
+    # Ungültige Datumsangaben werden wie leere Felder behandelt
+    lerngruppe_id = request.args.get("lerngruppe_id", type=int)
+    von = request.args.get("von", type=date.fromisoformat)
+    bis = request.args.get("bis", type=date.fromisoformat)
+
+    zeilen, lernfelder = dashboard_laden(lerngruppe_id, von, bis)
+
+    # Fehlzeiten und Wochenverlauf kommen aus den Anwesenheits-Rollups
+    stichtag = bis or date.today()
+    namen = {z.person_id: z.name for z in zeilen}
+    warnungen = [
+        (pid, namen.get(pid, f"#{pid}"), abwesend, anwesend)
+        for pid, abwesend, anwesend in fehlzeiten_warnungen(
+            stichtag.year, stichtag.month, lerngruppe_id=lerngruppe_id
+        )
+    ]
+    wochen = wochen_bericht(lerngruppe_id, stichtag) if lerngruppe_id else []
+
+    return render_template(
+        "dashboard/uebersicht.html",
+        zeilen=zeilen,
+        spalten=lernfelder,
+        lerngruppen=referenzdaten.lerngruppen(),
+        lerngruppe_id=lerngruppe_id,
+        von=von,
+        bis=bis,
+        stichtag=stichtag,
+        warnungen=warnungen,
+        wochen=wochen
+    )
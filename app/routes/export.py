@@ -0,0 +1,36 @@
+from flask import Blueprint, Response, render_template, request, abort, stream_with_context
+from app.export import EXPORTE, FORMATE, kopf_und_zeilen, stueckweise, dateiname
+from app.referenzdaten import referenzdaten
+from datetime import date
+
+bp = Blueprint("export", __name__, url_prefix="/export")
+
+
+@bp.route("/")
+def auswahl():
+    return render_template(
+        "export/auswahl.html",
+        exporte={art: name for art, (name, _) in EXPORTE.items()},
+        lerngruppen=referenzdaten.lerngruppen()
+    )
+
+
+@bp.route("/<art>.<format_>")
+def herunterladen(art, format_):
+    if art not in EXPORTE or format_ not in FORMATE:
+        abort(404)
+    # Ungültige Filterwerte werden wie leere Felder behandelt
+    von = request.args.get("von", type=date.fromisoformat)
+    bis = request.args.get("bis", type=date.fromisoformat)
+    kopf, zeilen = kopf_und_zeilen(
+        art,
+        lerngruppe_id=request.args.get("lerngruppe_id", type=int),
+        lernfeld_id=request.args.get("lernfeld_id", type=int),
+        von=von,
+        bis=bis,
+    )
+    return Response(
+        stream_with_context(stueckweise(format_, kopf, zeilen, EXPORTE[art][0])),
+        mimetype=FORMATE[format_],
+        headers={"Content-Disposition": f'attachment; filename="{dateiname(art, format_, von, bis)}"'},
+    )
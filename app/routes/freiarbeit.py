@@ -1,10 +1,16 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify
+from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify, Response, stream_with_context, current_app
 from app import db
 from app.forms import FreiarbeitEintragForm
-from app.models import Person, Lernfeld, FreiarbeitEintrag, ThemaZuweisung
+from app.models import Person, FreiarbeitEintrag, ThemaZuweisung
 from app.utils import berechne_arbeitsphase
-from datetime import date, datetime, timedelta
-from sqlalchemy import or_, and_
+from app.suche import personen_index
+from app.abfragen import person_mit_gruppe
+from app.lesemodelle import thema_zuweisung
+from app.httpcache import bedingt
+from app.referenzdaten import referenzdaten
+from app.freiarbeitsync import eintraege_uebernehmen, MAX_EINTRAEGE
+from app.live import live_broker, strom, eintraege_heute, neue_eintraege, Ueberlastet
+from datetime import date
 
 bp = Blueprint("freiarbeit", __name__, url_prefix="/freiarbeit")
 
@@ -19,25 +25,23 @@ def neuer_eintrag(lernfeld_id):
     if not form.phase.data:
         form.phase.data = berechne_arbeitsphase()
 
-    lernfelder = Lernfeld.query.order_by(Lernfeld.name).all()
+    lernfelder = referenzdaten.lernfelder()
     if not lernfelder:
         flash("Es wurden noch keine Lernfelder angelegt.", "warning")
         return redirect(url_for("index"))
 
     # Person ermitteln
     person_id = request.form.get("person_id") or request.args.get("person_id")
-    person = Person.query.get(person_id) if person_id else None
+    person = person_mit_gruppe(person_id)
     person_anzeige = (
-        f"{person.name_mit_spitzname} – {person.lerngruppe_obj.name if person.lerngruppe_obj else ""}"
+        f"{person.name_mit_spitzname} – {person.lerngruppe_obj.name if person.lerngruppe_obj else ''}"
         if person else ""
     )
 
     # Bei GET und ausgewählter Person Thema & Bemerkung vorbefüllen
     bemerkung = ""
     if request.method == "GET" and person:
-        zuweisung = ThemaZuweisung.query.filter_by(
-            person_id=person.id, lernfeld_id=lernfeld_id
-        ).first()
+        zuweisung = thema_zuweisung(person.id, lernfeld_id)
         form.thema_text.data = zuweisung.thema_basistext if zuweisung else ""
         bemerkung = zuweisung.bemerkung if zuweisung else ""
 
@@ -61,22 +65,8 @@ def neuer_eintrag(lernfeld_id):
         # zurück ohne person_id, damit das Formular leer ist
         return redirect(url_for("freiarbeit.neuer_eintrag", lernfeld_id=lernfeld_id))
 
-    # ─── Neu: Letzte 40 Einträge heute für dieses Lernfeld ───
-    heute = date.today()
-    start = datetime(heute.year, heute.month, heute.day)
-    ende  = start + timedelta(days=1)
-    recent_entries = (
-        FreiarbeitEintrag.query
-        .filter(
-            FreiarbeitEintrag.lernfeld_id == lernfeld_id,
-            FreiarbeitEintrag.gespeichert_am >= start,
-            FreiarbeitEintrag.gespeichert_am < ende
-        )
-        .order_by(FreiarbeitEintrag.gespeichert_am.desc())
-        .limit(40)
-        .all()
-    )
-
+    # Die heutigen Einträge; neue kommen danach über freiarbeit.live bzw. .heute
+    eintraege = eintraege_heute(lernfeld_id)
     return render_template(
         "freiarbeit/formular.html",
         form=form,
@@ -85,58 +75,75 @@ def neuer_eintrag(lernfeld_id):
         person=person,
         person_anzeige=person_anzeige,
         bemerkung=bemerkung,
-        recent_entries=recent_entries
+        eintraege=eintraege,
+        letzte_id=eintraege[0].id if eintraege else 0,
+        live_stream=current_app.config["LIVE_MAX_VERBINDUNGEN"] > 0,
+    )
+
+
+@bp.route("/live/<int:lernfeld_id>")
+def live(lernfeld_id):
+    """Server-Sent Events: jeder neue Eintrag im Lernfeld ab ``?seit=<id>``.
+
+    Beim Neuverbinden schickt der Browser ``Last-Event-ID`` mit; der Stream
+    setzt dann hinter dem zuletzt empfangenen Eintrag fort.
+    """
+    seit = request.headers.get("Last-Event-ID", type=int) or request.args.get("seit", 0, type=int)
+    try:
+        abo = live_broker.abonnieren(lernfeld_id, current_app.config["LIVE_MAX_VERBINDUNGEN"])
+    except Ueberlastet:
+        return Response(status=503, headers={"Retry-After": "30"})
+    return Response(
+        stream_with_context(strom(abo, lernfeld_id, seit)),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
+
+@bp.route("/heute/<int:lernfeld_id>")
+@bedingt("freiarbeit_eintrag", schluessel=date.today)    # nach Mitternacht ist die Liste leer
+def heute(lernfeld_id):
+    """Polling statt Stream: die heutigen Einträge ab ``?seit=<id>``, älteste zuerst."""
+    return jsonify(neue_eintraege(lernfeld_id, request.args.get("seit", 0, type=int)))
+
+
 @bp.route("/api/personensuche")
+@bedingt("person", "lerngruppe")
 def api_personensuche():
-    q = request.args.get("q", "").strip().lower()
-    terms = q.split()
-    query = Person.query
-    if terms:
-        filters = [
-            or_(
-              Person.vorname.ilike(f"%{t}%"),
-              Person.nachname.ilike(f"%{t}%"),
-              Person.spitzname.ilike(f"%{t}%"),
-            )
-            for t in terms
-        ]
-        query = query.filter(and_(*filters))
-    personen = query.order_by(Person.vorname, Person.nachname).limit(20).all()
-
-    return jsonify([
-        {
-            "id": p.id,
-            "anzeige": p.name_mit_spitzname + " – " + (p.lerngruppe_obj.name if p.lerngruppe_obj else "")
-        }
-        for p in personen
-    ])
+    q = request.args.get("q", "")
+    personen = personen_index.suchen(q, limit=20)
+    return jsonify([{"id": p.id, "anzeige": p.anzeige} for p in personen])
 
 
 @bp.route("/api/personen")
+@bedingt("person", "lerngruppe")
 def api_personen():
-    term = request.args.get("q", "").lower()
-    ergebnisse = Person.query.filter(
-        (Person.vorname.ilike(f"%{term}%")) |
-        (Person.nachname.ilike(f"%{term}%")) |
-        (Person.spitzname.ilike(f"%{term}%"))
-    ).order_by(Person.vorname).limit(20).all()
-
-    return jsonify([
-        {
-            "id": p.id,
-            "text": (
-                f"{p.vorname} ({p.spitzname}) {p.nachname} – {(p.lerngruppe_obj.name if p.lerngruppe_obj else '')}"
-                if p.spitzname
-                else f"{p.vorname} {p.nachname} – {(p.lerngruppe_obj.name if p.lerngruppe_obj else '')}"
-            )
-        }
-        for p in ergebnisse
-    ])
+    term = request.args.get("q", "")
+    ergebnisse = personen_index.suchen(term, limit=20, als_ganzes=True)
+    return jsonify([{"id": p.id, "text": p.anzeige} for p in ergebnisse])
+
+
+@bp.route("/api/eintraege", methods=["POST"])
+def api_eintraege():
+    """Nimmt einen Stapel Einträge aus der Offline-Warteschlange entgegen.
+
+    Erwartet ``{"eintraege": [{"client_id", "person_id", "lernfeld_id",
+    "datum", "phase", "thema_text", "notiz"}, ...]}`` und meldet zu jedem
+    Eintrag ``gespeichert``, ``vorhanden`` oder ``fehler``.
+    """
+    daten = request.get_json(silent=True) or {}
+    eintraege = daten.get("eintraege")
+    if not isinstance(eintraege, list):
+        return jsonify({"fehler": "Erwartet wird eine Liste „eintraege“."}), 400
+    if len(eintraege) > MAX_EINTRAEGE:
+        return jsonify({"fehler": f"Höchstens {MAX_EINTRAEGE} Einträge pro Anfrage."}), 413
+
+    ergebnisse = eintraege_uebernehmen(eintraege)
+    return jsonify({"ergebnisse": [e.als_dict() for e in ergebnisse]})
 
 
 @bp.route("/api/thema_vorschlag")
+@bedingt("thema_zuweisung")
 def api_thema_vorschlag():
     person_id = request.args.get("person_id", type=int)
     lernfeld_id = request.args.get("lernfeld_id", type=int)
@@ -144,21 +151,15 @@ def api_thema_vorschlag():
     if not person_id or not lernfeld_id:
         return jsonify({"thema": ""})
 
-    zuweisung = ThemaZuweisung.query.filter_by(
-        person_id=person_id,
-        lernfeld_id=lernfeld_id
-    ).first()
-
+    zuweisung = thema_zuweisung(person_id, lernfeld_id)
     return jsonify({"thema": zuweisung.thema_basistext if zuweisung else ""})
 
 @bp.route("/api_thema")
+@bedingt("thema_zuweisung")
 def api_thema():
     pid = request.args.get("person_id", type=int)
     lf  = request.args.get("lernfeld_id", type=int)
-    z   = ThemaZuweisung.query.filter_by(
-              person_id=pid,
-              lernfeld_id=lf
-          ).first()
+    z   = thema_zuweisung(pid, lf)
     return jsonify({
         "thema_basistext": z.thema_basistext if z else "",
         "bemerkung":       z.bemerkung        if z else ""
@@ -0,0 +1,43 @@
+import os
+
+from flask import Blueprint, render_template, jsonify, abort, send_file, url_for
+from app import jobs
+
+bp = Blueprint("jobs", __name__, url_prefix="/jobs")
+
+
+def _stand(job_id):
+    stand = jobs.status(job_id)
+    if stand is None:
+        abort(404)
+    # Links für die Statusseite: Weiterleitung bzw. Download nach dem Ende
+    if stand["zustand"] == "fertig":
+        endpoint = jobs.weiter_endpoint(stand["art"])
+        if endpoint:
+            stand["weiter"] = url_for(endpoint, job_id=job_id)
+        if (stand["ergebnis"] or {}).get("datei"):
+            stand["download"] = url_for("jobs.datei", job_id=job_id)
+    return stand
+
+
+@bp.route("/<int:job_id>")
+def anzeigen(job_id):
+    return render_template("jobs/anzeigen.html", job=_stand(job_id))
+
+
+@bp.route("/<int:job_id>/status")
+def status(job_id):
+    return jsonify(_stand(job_id))
+
+
+@bp.route("/<int:job_id>/datei")
+def datei(job_id):
+    stand = jobs.status(job_id)
+    if stand is None or stand["zustand"] != "fertig" or not (stand["ergebnis"] or {}).get("datei"):
+        abort(404)
+    ergebnis = stand["ergebnis"]
+    # Nur Dateinamen aus dem Ergebnis, nie Pfade
+    pfad = os.path.join(jobs.verzeichnis(), os.path.basename(ergebnis["datei"]))
+    if not os.path.exists(pfad):
+        abort(404)
+    return send_file(pfad, as_attachment=True, download_name=ergebnis.get("dateiname") or ergebnis["datei"])
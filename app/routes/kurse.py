@@ -1,8 +1,12 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify
 from app import db
-from app.models import Lerngruppe, Lernfeld, Person, KursRueckmeldung, KursTeilnahme
 from app.forms import KursDokumentationForm
 from app.utils import berechne_arbeitsphase
+from app.referenzdaten import referenzdaten
+from app.kursdoku import KursEingabe, kurse_dokumentieren
+from app.lesemodelle import personen_zeilen
+from app.suche import personen_index
+from app.httpcache import bedingt
 from datetime import date
 
 bp = Blueprint("kurse", __name__, url_prefix="/kurse")
@@ -17,63 +21,43 @@ def dokumentieren():
         form.phase.data = berechne_arbeitsphase()
 
     # 2) Choices füllen
-    form.lernfeld.choices   = [(lf.id, lf.name) for lf in Lernfeld.query.order_by(Lernfeld.name)]
-    form.lerngruppe.choices = [(lg.id, lg.name) for lg in Lerngruppe.query.order_by(Lerngruppe.name)]
+    form.lernfeld.choices   = referenzdaten.choices("lernfelder")
+    form.lerngruppe.choices = referenzdaten.choices("lerngruppen")
 
-    # 3) Personen-Liste, wenn Gruppe ausgewählt
-    personen = []
-    if form.lerngruppe.data:
-        personen = (
-            Person.query
-                  .filter_by(lerngruppe_id=form.lerngruppe.data)
-                  .order_by(Person.vorname, Person.nachname)
-                  .all()
-        )
-
-    # 4) Speichern
+    # 3) Speichern – eine Rückmeldung und alle Teilnahmen als Batch
     if request.method == "POST":
-        # Metadaten
-        rueck = KursRueckmeldung(
-            lernfeld_id   = form.lernfeld.data,
-            lerngruppe_id = form.lerngruppe.data,
-            datum         = form.datum.data,
-            phase         = form.phase.data,
-            thema         = form.thema.data
-        )
-        db.session.add(rueck)
-        db.session.flush()  # um rueck.id zu bekommen
-
-        # IDs aus den Checkboxen
-        krank_ids      = set(map(int, request.form.getlist("krank")))
-        nichtkurs_ids  = set(map(int, request.form.getlist("nicht_im_kurs")))
-        alle_ids       = {p.id for p in personen}
-
-        # 4a) Abwesend (krank)
-        for pid in krank_ids:
-            db.session.add(KursTeilnahme(
-                rueckmeldung_id = rueck.id,
-                person_id       = pid,
-                status          = "abwesend",
-                notiz           = "nicht da"
-            ))
-
-        # 4b) Anwesend (alle, die nicht krank und nicht im Kurs)
-        present_ids = alle_ids - krank_ids - nichtkurs_ids
-        for pid in present_ids:
-            note = request.form.get(f"notiz_{pid}", "").strip()
-            db.session.add(KursTeilnahme(
-                rueckmeldung_id = rueck.id,
-                person_id       = pid,
-                status          = "anwesend",
-                notiz           = note
-            ))
-
-        # 4c) Kinder in nichtkurs_ids werden übersprungen
+        # Notizen stehen in Feldern "notiz_<person_id>"
+        notizen = {
+            int(k[len("notiz_"):]): v
+            for k, v in request.form.items()
+            if k.startswith("notiz_") and k[len("notiz_"):].isdigit()
+        }
+        try:
+            eingabe = KursEingabe(
+                lernfeld_id   = form.lernfeld.data,
+                lerngruppe_id = form.lerngruppe.data,
+                datum         = form.datum.data,
+                phase         = form.phase.data,
+                thema         = form.thema.data,
+                krank         = map(int, request.form.getlist("krank")),
+                nicht_im_kurs = map(int, request.form.getlist("nicht_im_kurs")),
+                notizen       = notizen
+            )
+            kurse_dokumentieren([eingabe])
+        except ValueError as e:
+            db.session.rollback()
+            flash(str(e), "danger")
+            return redirect(url_for("kurse.dokumentieren"))
 
         db.session.commit()
         flash("Kurs dokumentiert.", "success")
         return redirect(url_for("kurse.dokumentieren"))
 
+    # 4) Personen-Liste, wenn Gruppe ausgewählt
+    personen = []
+    if form.lerngruppe.data:
+        personen = personen_zeilen(form.lerngruppe.data)
+
     return render_template(
         "kurse/dokumentieren.html",
         form=form,
@@ -81,14 +65,29 @@ def dokumentieren():
     )
 
 @bp.route("/api/personen")
+@bedingt("person", "lerngruppe")
 def api_personen():
     lid = request.args.get("lerngruppe_id", type=int)
     if not lid:
         return jsonify([])
-    ps = (
-        Person.query
-        .filter_by(lerngruppe_id=lid)
-        .order_by(Person.vorname, Person.nachname)
-        .all()
-    )
+    ps = personen_index.gruppe(lid)
     return jsonify([{"id": p.id, "text": p.name_mit_spitzname} for p in ps])
+
+
+@bp.route("/api/dokumentieren", methods=["POST"])
+def api_dokumentieren():
+    """Mehrere Kurse (z. B. eine ganze Kursschiene) in einer Transaktion.
+
+    Erwartet ``{"kurse": [{"lernfeld_id", "lerngruppe_id", "datum", "phase",
+    "thema", "krank": [...], "nicht_im_kurs": [...], "notizen": {id: text}}]}``.
+    """
+    daten = request.get_json(silent=True) or {}
+    try:
+        eingaben = [KursEingabe.aus_json(k) for k in daten.get("kurse", [])]
+        rueck_ids = kurse_dokumentieren(eingaben)
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({"fehler": str(e)}), 400
+
+    db.session.commit()
+    return jsonify({"rueckmeldungen": rueck_ids}), 201
@@ -1,9 +1,12 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify
 from app import db
-from app.models import Person, Lernfeld, LeistungsRueckmeldung
+from app.models import Person, LeistungsRueckmeldung
 from app.forms import LeistungsRueckmeldungForm
+from app.suche import personen_index
+from app.abfragen import person_mit_gruppe
+from app.httpcache import bedingt
+from app.referenzdaten import referenzdaten
 from datetime import date
-from sqlalchemy import or_, and_
 
 bp = Blueprint("leistung", __name__, url_prefix="/leistung")
 
@@ -11,14 +14,14 @@ bp = Blueprint("leistung", __name__, url_prefix="/leistung")
 def neuer_eintrag():
     # Person ermitteln aus Form/GET
     person_id = request.form.get("person_id") or request.args.get("person_id")
-    person = Person.query.get(person_id) if person_id else None
+    person = person_mit_gruppe(person_id)
     person_anzeige = (
         f"{person.name_mit_spitzname} – {person.lerngruppe_obj.name if person and person.lerngruppe_obj else ''}"
         if person else ""
     )
 
     form = LeistungsRueckmeldungForm()
-    form.lernfeld.choices = [(lf.id, lf.name) for lf in Lernfeld.query.order_by(Lernfeld.name).all()]
+    form.lernfeld.choices = referenzdaten.choices("lernfelder")
     if not form.datum.data:
         form.datum.data = date.today()
 
@@ -51,25 +54,8 @@ def neuer_eintrag():
 
 # --- API für Personensuche ---
 @bp.route("/api/personensuche")
+@bedingt("person", "lerngruppe")
 def api_personensuche():
-    q = request.args.get("q", "").strip().lower()
-    terms = q.split()
-    query = Person.query
-    if terms:
-        filters = [
-            or_(
-                Person.vorname.ilike(f"%{t}%"),
-                Person.nachname.ilike(f"%{t}%"),
-                Person.spitzname.ilike(f"%{t}%"),
-            )
-            for t in terms
-        ]
-        query = query.filter(and_(*filters))
-    personen = query.order_by(Person.vorname, Person.nachname).limit(20).all()
-    return jsonify([
-        {
-            "id": p.id,
-            "anzeige": p.name_mit_spitzname + " – " + (p.lerngruppe_obj.name if p.lerngruppe_obj else "")
-        }
-        for p in personen
-    ])
+    q = request.args.get("q", "")
+    personen = personen_index.suchen(q, limit=20)
+    return jsonify([{"id": p.id, "anzeige": p.anzeige} for p in personen])
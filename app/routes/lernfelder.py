@@ -2,13 +2,16 @@ from flask import Blueprint, render_template, redirect, url_for, flash
 from app import db
 from app.models import Lernfeld
 from app.forms import LernfeldForm
+from app.referenzdaten import referenzdaten
+from app.httpcache import bedingt
 
 bp = Blueprint("lernfelder", __name__, url_prefix="/lernfelder")
 
 @bp.route("/", methods=["GET", "POST"])
+@bedingt("lernfeld", seite=True)
 def verwalten():
     form = LernfeldForm()
-    lernfelder = Lernfeld.query.order_by(Lernfeld.name).all()
+    lernfelder = referenzdaten.lernfelder()
 
     if form.validate_on_submit():
         neues_lernfeld = Lernfeld(name=form.name.data.strip())
@@ -0,0 +1,33 @@
+from flask import Blueprint, render_template, request
+from app.volltext import suchen, ART_NAMEN
+from app.referenzdaten import referenzdaten
+from datetime import date
+
+bp = Blueprint("suche", __name__, url_prefix="/suche")
+
+
+@bp.route("/")
+def ergebnisse():
+    # Ungültige Filterwerte werden wie leere Felder behandelt
+    q = request.args.get("q", "").strip()
+    filter_ = dict(
+        person_id=request.args.get("person_id", type=int),
+        lerngruppe_id=request.args.get("lerngruppe_id", type=int),
+        lernfeld_id=request.args.get("lernfeld_id", type=int),
+        von=request.args.get("von", type=date.fromisoformat),
+        bis=request.args.get("bis", type=date.fromisoformat),
+        art=request.args.get("art") or None,
+    )
+
+    treffer = suchen(q, **filter_) if q else []
+    lernfeld_namen = {lf.id: lf.name for lf in referenzdaten.lernfelder()}
+
+    return render_template(
+        "suche/ergebnisse.html",
+        q=q,
+        treffer=treffer,
+        lernfeld_namen=lernfeld_namen,
+        lerngruppen=referenzdaten.lerngruppen(),
+        arten=ART_NAMEN,
+        **filter_
+    )
@@ -0,0 +1,272 @@
+import threading
+import unicodedata
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from app import db, versionen
+from app.models import Person, Lerngruppe
+from app.lesemodelle import PERSON_SPALTEN, PersonZeile
+
+_TABELLEN = ("person", "lerngruppe")
+
+
+# Umlaute werden zweifach gefaltet: "Müller" findet man mit "muller" und "mueller"
+_UMLAUTE_KURZ = str.maketrans({"ä": "a", "ö": "o", "ü": "u", "ß": "ss"})
+_UMLAUTE_LANG = str.maketrans({"ä": "ae", "ö": "oe", "ü": "ue", "ß": "ss"})
+
+
+def _ohne_akzente(text):
+    zerlegt = unicodedata.normalize("NFKD", text)
+    return "".join(z for z in zerlegt if not unicodedata.combining(z))
+
+
+def falten(text):
+    """Normalform für Suchbegriffe: klein, ohne Umlaute und Akzente."""
+    return _ohne_akzente((text or "").casefold().translate(_UMLAUTE_KURZ))
+
+
+def _varianten(text):
+    text = (text or "").casefold()
+    if not text:
+        return ()
+    kurz = _ohne_akzente(text.translate(_UMLAUTE_KURZ))
+    lang = _ohne_akzente(text.translate(_UMLAUTE_LANG))
+    return (kurz,) if kurz == lang else (kurz, lang)
+
+
+def _trigramme(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _ngramme(text):
+    # Trigramme plus Uni- und Bigramme, damit auch 1–2 Zeichen ohne Scan gehen
+    return {text[i:i + n] for n in (1, 2, 3) for i in range(len(text) - n + 1)}
+
+
+class PersonenSuchindex:
+    """N-Gramm-Index über Vor-, Nach- und Spitznamen aller Personen.
+
+    Der Index wird beim ersten Zugriff einmal aus der Datenbank geladen und
+    danach über Mapper-Events aktuell gehalten. Änderungen werden erst nach
+    einem erfolgreichen Commit übernommen. Haben andere Prozesse (Worker)
+    Personen geändert, zeigt das der Tabellenstand in ``versionen`` an und der
+    Index wird neu aufgebaut.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._geladen = False
+        self._eintraege = {}     # person_id -> PersonZeile (auch das Suchergebnis)
+        self._felder = {}        # person_id -> tuple gefalteter Namensvarianten
+        self._sortierung = {}    # person_id -> (vorname, nachname) gefaltet
+        self._ngramme = {}       # n-gramm   -> set(person_id)
+        self._gruppen = {}       # lerngruppe_id -> name
+        self._stand = None       # versionen.stand(*_TABELLEN) beim Aufbau
+
+    # ── Aufbau ────────────────────────────────────────────────────────────
+    def neu_aufbauen(self):
+        stand = versionen.stand(*_TABELLEN)
+        zeilen = (
+            db.session.query(*PERSON_SPALTEN)
+            .outerjoin(Lerngruppe, Person.lerngruppe_id == Lerngruppe.id)
+            .all()
+        )
+        gruppen = dict(db.session.query(Lerngruppe.id, Lerngruppe.name).all())
+        with self._lock:
+            self._eintraege.clear()
+            self._felder.clear()
+            self._sortierung.clear()
+            self._ngramme.clear()
+            self._gruppen = gruppen
+            for z in zeilen:
+                self._aufnehmen(PersonZeile(*z))
+            self._stand = stand
+            self._geladen = True
+
+    def invalidieren(self):
+        """Erzwingt einen Neuaufbau beim nächsten Zugriff (z. B. nach Bulk-Importen)."""
+        with self._lock:
+            self._geladen = False
+
+    def _sicherstellen(self):
+        if not self._geladen or versionen.stand(*_TABELLEN) != self._stand:
+            self.neu_aufbauen()
+
+    # ── Pflege ────────────────────────────────────────────────────────────
+    def _aufnehmen(self, eintrag):
+        self._entfernen(eintrag.id)
+        felder = []
+        for wert in (eintrag.vorname, eintrag.nachname, eintrag.spitzname):
+            felder.extend(_varianten(wert))
+        self._eintraege[eintrag.id] = eintrag
+        self._felder[eintrag.id] = tuple(felder)
+        self._sortierung[eintrag.id] = (falten(eintrag.vorname), falten(eintrag.nachname))
+        for feld in felder:
+            for gramm in _ngramme(feld):
+                self._ngramme.setdefault(gramm, set()).add(eintrag.id)
+
+    def _entfernen(self, person_id):
+        felder = self._felder.pop(person_id, ())
+        self._eintraege.pop(person_id, None)
+        self._sortierung.pop(person_id, None)
+        for feld in felder:
+            for gramm in _ngramme(feld):
+                ids = self._ngramme.get(gramm)
+                if ids is not None:
+                    ids.discard(person_id)
+                    if not ids:
+                        del self._ngramme[gramm]
+
+    def _anwenden(self, aenderungen, eigene):
+        with self._lock:
+            if not self._geladen:
+                return
+            # Nur nachziehen, wenn seit dem Aufbau niemand sonst geändert hat
+            stand = list(self._stand)
+            for i, tabelle in enumerate(_TABELLEN):
+                if tabelle in eigene:
+                    vorher, nachher = eigene[tabelle]
+                    if vorher is None or vorher != stand[i]:
+                        self._geladen = False
+                        return
+                    stand[i] = nachher
+            self._stand = tuple(stand)
+
+            for art, daten in aenderungen:
+                if art == "gruppe":
+                    gid, name = daten
+                    self._gruppen[gid] = name
+                    for e in list(self._eintraege.values()):
+                        if e.lerngruppe_id == gid and e.lerngruppe != name:
+                            self._eintraege[e.id] = e.mit_lerngruppe(name)
+                elif art == "person":
+                    pid, vorname, nachname, spitzname, gid = daten
+                    self._aufnehmen(PersonZeile(
+                        pid, vorname, nachname, spitzname, gid, self._gruppen.get(gid)
+                    ))
+                elif art == "person_geloescht":
+                    self._entfernen(daten)
+
+    # ── Suche ─────────────────────────────────────────────────────────────
+    def suchen(self, q, limit=20, als_ganzes=False):
+        """Sucht Personen zu einem Suchbegriff.
+
+        Standardmäßig muss jedes Wort des Suchbegriffs in einem der Namen
+        vorkommen. Mit ``als_ganzes=True`` wird der Begriff wie früher bei
+        ``ilike('%q%')`` als ein zusammenhängender Teilstring behandelt.
+        """
+        self._sicherstellen()
+        q = (q or "").strip()
+        begriffe = [falten(q)] if als_ganzes else [falten(t) for t in q.split()]
+        begriffe = [b for b in begriffe if b]
+
+        with self._lock:
+            if not begriffe:
+                kandidaten = list(self._eintraege)
+            else:
+                kandidaten = None
+                for b in begriffe:
+                    ids = self._kandidaten(b)
+                    kandidaten = ids if kandidaten is None else kandidaten & ids
+                    if not kandidaten:
+                        return []
+
+            treffer = []
+            for pid in kandidaten:
+                felder = self._felder[pid]
+                punkte = 0
+                for b in begriffe:
+                    wertung = _bewerten(b, felder)
+                    if wertung is None:
+                        break
+                    punkte += wertung
+                else:
+                    treffer.append((-punkte, self._sortierung[pid], self._eintraege[pid]))
+
+        treffer.sort(key=lambda t: t[:2])
+        return [t[2] for t in treffer[:limit]]
+
+    def gruppe(self, lerngruppe_id):
+        """Alle Personen einer Lerngruppe, nach Vor- und Nachname (wie ``personen_zeilen``).
+
+        Liest nur den Tabellenstand aus der Datenbank – denselben, den
+        ``@bedingt`` für den ETag braucht.
+        """
+        self._sicherstellen()
+        with self._lock:
+            zeilen = [e for e in self._eintraege.values() if e.lerngruppe_id == lerngruppe_id]
+        zeilen.sort(key=lambda e: (e.vorname, e.nachname))
+        return zeilen
+
+    def _kandidaten(self, begriff):
+        if len(begriff) < 3:
+            return set(self._ngramme.get(begriff, ()))
+        ids = None
+        for tri in _trigramme(begriff):
+            treffer = self._ngramme.get(tri)
+            if not treffer:
+                return set()
+            ids = set(treffer) if ids is None else ids & treffer
+        return ids
+
+
+def _bewerten(begriff, felder):
+    """Ganzer Name > Namensanfang > Wortanfang > irgendwo enthalten."""
+    beste = None
+    for f in felder:
+        if f == begriff:
+            return 3
+        pos = f.find(begriff)
+        if pos < 0:
+            continue
+        if pos == 0:
+            wertung = 2
+        elif not f[pos - 1].isalnum():
+            wertung = 1
+        else:
+            wertung = 0
+        if beste is None or wertung > beste:
+            beste = wertung
+    return beste
+
+
+personen_index = PersonenSuchindex()
+
+
+# ── Aktualisierung über SQLAlchemy-Events ────────────────────────────────
+def _vormerken(target, aenderung):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("suchindex", []).append(aenderung)
+
+
+@event.listens_for(Person, "after_insert")
+@event.listens_for(Person, "after_update")
+def _person_gespeichert(mapper, connection, target):
+    _vormerken(target, ("person", (
+        target.id, target.vorname, target.nachname, target.spitzname, target.lerngruppe_id
+    )))
+
+
+@event.listens_for(Person, "after_delete")
+def _person_geloescht(mapper, connection, target):
+    _vormerken(target, ("person_geloescht", target.id))
+
+
+@event.listens_for(Lerngruppe, "after_insert")
+@event.listens_for(Lerngruppe, "after_update")
+def _gruppe_gespeichert(mapper, connection, target):
+    _vormerken(target, ("gruppe", (target.id, target.name)))
+
+
+@event.listens_for(Session, "after_commit")
+def _nach_commit(session):
+    aenderungen = session.info.pop("suchindex", None)
+    if aenderungen:
+        personen_index._anwenden(aenderungen, versionen.eigene_aenderungen(session))
+
+
+@event.listens_for(Session, "after_rollback")
+def _nach_rollback(session):
+    session.info.pop("suchindex", None)
@@ -0,0 +1,160 @@
+from collections import defaultdict
+from datetime import date, timedelta
+from itertools import groupby
+
+from sqlalchemy import func, tuple_
+
+from app import db
+from app.abfragen import EINTRAG_MIT_LERNFELD, SITZUNG_MIT_LERNFELD, RUECKMELDUNG_MIT_LERNFELD
+from app.models import FreiarbeitEintrag, Lernfeld, KursRueckmeldung, KursTeilnahme, LeistungsRueckmeldung
+from app.utils import phase_nummer
+
+KEIN_LERNFELD = "– kein Lernfeld –"
+
+
+def wochen_gruppieren(eintraege):
+    """Verteilt Einträge auf Kalenderwochen für die Wochenliste.
+
+    Erwartet Einträge sortiert nach Datum absteigend – damit ist jede
+    Kalenderwoche ein zusammenhängender Block (das Wochenplan-Raster kommt
+    vorberechnet aus ``app.wochenplan``).
+    """
+    entry_weeks = []
+    for (y, kw), eintraege_der_woche in groupby(eintraege, key=lambda e: e.datum.isocalendar()[:2]):
+        woche = sorted(eintraege_der_woche, key=lambda e: (e.datum.isoweekday(), phase_nummer(e.phase)))
+        mo = date.fromisocalendar(y, kw, 1)
+        entry_weeks.append({
+            "year":    y,
+            "week":    kw,
+            "monday":  mo,
+            "friday":  mo + timedelta(days=4),
+            "entries": woche
+        })
+    return entry_weeks
+
+
+# ── Seitenweises Laden für die Tabs der Detailseite ──────────────────────
+#
+# Die Wochen-Tabs blättern immer in ganzen Kalenderwochen: der Cursor ist der
+# Montag der zuletzt gelieferten Woche, die nächste Seite beginnt mit dem
+# jüngsten Eintrag davor. Listen-Tabs blättern zeilenweise über
+# (datum, phase, id), die id bricht Gleichstände auf.
+
+def cursor_lesen(cursor):
+    """'2024-05-06|3.AP|17' → (date, '3.AP', 17); None bei fehlendem/ungültigem Cursor."""
+    if not cursor:
+        return None
+    teile = cursor.split("|")
+    try:
+        datum = date.fromisoformat(teile[0])
+        if len(teile) == 1:
+            return (datum,)
+        return (datum, teile[1], int(teile[2]))
+    except (ValueError, IndexError):
+        return None
+
+
+def cursor_schreiben(datum, phase=None, id=None):
+    if phase is None:
+        return datum.isoformat()
+    return f"{datum.isoformat()}|{phase}|{id}"
+
+
+def wochen_seite(person_id, vor=None, wochen=8):
+    """Liefert (entry_weeks, weiter) für bis zu ``wochen`` Kalenderwochen vor ``vor``."""
+    basis = FreiarbeitEintrag.query.filter(FreiarbeitEintrag.person_id == person_id)
+    if vor:
+        basis = basis.filter(FreiarbeitEintrag.datum < vor[0])
+
+    neuester = basis.with_entities(func.max(FreiarbeitEintrag.datum)).scalar()
+    if neuester is None:
+        return [], None
+
+    neuester_montag = neuester - timedelta(days=neuester.isoweekday() - 1)
+    untergrenze = neuester_montag - timedelta(weeks=wochen - 1)
+    entry_weeks = wochen_gruppieren(
+        basis
+        .options(EINTRAG_MIT_LERNFELD)
+        .filter(FreiarbeitEintrag.datum >= untergrenze)
+        .order_by(FreiarbeitEintrag.datum.desc(), FreiarbeitEintrag.phase)
+    )
+
+    mehr = db.session.query(
+        basis.filter(FreiarbeitEintrag.datum < untergrenze).exists()
+    ).scalar()
+    return entry_weeks, (cursor_schreiben(untergrenze) if mehr else None)
+
+
+def lernfeld_uebersicht(person_id):
+    """Lernfelder (mit Anzahl Einträgen), in denen die Person gearbeitet hat."""
+    zeilen = (
+        db.session.query(
+            FreiarbeitEintrag.lernfeld_id, Lernfeld.name, func.count(FreiarbeitEintrag.id)
+        )
+        .outerjoin(Lernfeld, FreiarbeitEintrag.lernfeld_id == Lernfeld.id)
+        .filter(FreiarbeitEintrag.person_id == person_id)
+        .group_by(FreiarbeitEintrag.lernfeld_id, Lernfeld.name)
+        .all()
+    )
+    bloecke = [
+        {"lernfeld_id": lf_id or 0, "lernfeld": name or KEIN_LERNFELD, "anzahl": anzahl}
+        for lf_id, name, anzahl in zeilen
+    ]
+    bloecke.sort(key=lambda b: b["lernfeld"].lower())
+    return bloecke
+
+
+def _keyset(query, datum_spalte, phase_spalte, id_spalte, vor, limit):
+    if vor and len(vor) == 3:
+        query = query.filter(tuple_(datum_spalte, phase_spalte, id_spalte) < vor)
+    zeilen = (
+        query
+        .order_by(datum_spalte.desc(), phase_spalte.desc(), id_spalte.desc())
+        .limit(limit + 1)
+        .all()
+    )
+    return zeilen[:limit], len(zeilen) > limit
+
+
+def lernfeld_seite(person_id, lernfeld_id, vor=None, limit=50):
+    query = FreiarbeitEintrag.query.filter(
+        FreiarbeitEintrag.person_id == person_id,
+        FreiarbeitEintrag.lernfeld_id == (lernfeld_id or None)
+    )
+    eintraege, mehr = _keyset(
+        query, FreiarbeitEintrag.datum, FreiarbeitEintrag.phase, FreiarbeitEintrag.id, vor, limit
+    )
+    letzter = eintraege[-1] if eintraege else None
+    weiter = cursor_schreiben(letzter.datum, letzter.phase, letzter.id) if mehr else None
+    return eintraege, weiter
+
+
+def kurs_seite(person_id, vor=None, limit=50):
+    query = (
+        db.session
+        .query(KursTeilnahme, KursRueckmeldung)
+        .join(KursRueckmeldung, KursTeilnahme.rueckmeldung_id == KursRueckmeldung.id)
+        .options(SITZUNG_MIT_LERNFELD)
+        .filter(KursTeilnahme.person_id == person_id)
+    )
+    zeilen, mehr = _keyset(
+        query, KursRueckmeldung.datum, KursRueckmeldung.phase, KursTeilnahme.id, vor, limit
+    )
+    weiter = None
+    if mehr:
+        teilnahme, sitzung = zeilen[-1]
+        weiter = cursor_schreiben(sitzung.datum, sitzung.phase, teilnahme.id)
+    return zeilen, weiter
+
+
+def rueckmeldungen_nach_lernfeld(person_id):
+    gruppiert = defaultdict(list)
+    rueckmeldungen = (
+        LeistungsRueckmeldung.query
+        .options(RUECKMELDUNG_MIT_LERNFELD)
+        .filter_by(person_id=person_id)
+        .order_by(LeistungsRueckmeldung.datum.desc())
+    )
+    for r in rueckmeldungen:
+        gruppiert[r.lernfeld.name if r.lernfeld else "-"].append(r)
+    return gruppiert
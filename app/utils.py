@@ -18,3 +18,20 @@ def berechne_arbeitsphase(jetzt=None):
         if jetzt >= start:
             return f"{len(phasen_start) - 1 - i}.AP"
     return "0.AP"
+
+
+def phase_nummer(phase):
+    """'3.AP' → 3; unbekannte Formate landen bei -1 (außerhalb des Rasters)."""
+    try:
+        return int(phase.split(".")[0])
+    except (AttributeError, ValueError):
+        return -1
+
+
+def zeitraum_filtern(query, spalte, von=None, bis=None):
+    """Schränkt ``query`` auf ``von <= spalte <= bis`` ein; fehlende Grenzen gelten nicht."""
+    if von:
+        query = query.where(spalte >= von)
+    if bis:
+        query = query.where(spalte <= bis)
+    return query
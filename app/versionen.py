@@ -0,0 +1,80 @@
+from flask import g, has_app_context
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from app import db
+from app.models import TabellenVersion
+
+
+_ERHOEHEN = text(
+    "INSERT INTO tabellen_version (tabelle, version) VALUES (:t, 1) "
+    "ON CONFLICT(tabelle) DO UPDATE SET version = version + 1 "
+    "RETURNING version"
+)
+
+
+def stand(*tabellen):
+    """Aktuelle Änderungszähler der Tabellen (einmal pro Request aus der DB gelesen)."""
+    if has_app_context() and "_tabellenversionen" in g:
+        alle = g._tabellenversionen
+    else:
+        alle = dict(db.session.query(TabellenVersion.tabelle, TabellenVersion.version))
+        if has_app_context():
+            g._tabellenversionen = alle
+    return tuple(alle.get(t, 0) for t in tabellen)
+
+
+def eigene_aenderungen(session):
+    """{tabelle: (version_vorher, version_nachher)} der laufenden Transaktion.
+
+    Nur in ``after_commit``-Handlern sinnvoll: Ein Cache, der genau
+    ``version_vorher`` kennt, hat keine fremde Änderung verpasst und darf seine
+    eigenen Änderungen inkrementell übernehmen.
+    """
+    return session.info.get("tabellenversionen", {})
+
+
+def erhoehen(session, tabelle, bulk=False):
+    """Erhöht den Zähler einer Tabelle innerhalb der laufenden Transaktion.
+
+    ``bulk=True`` kennzeichnet Änderungen, die an den Mapper-Events vorbei
+    liefen – Caches können sie nicht nachziehen und laden daher neu.
+    """
+    neu = session.connection().execute(_ERHOEHEN, {"t": tabelle}).scalar()
+    aenderungen = session.info.setdefault("tabellenversionen", {})
+    if bulk:
+        vorher = None
+    elif tabelle in aenderungen:
+        vorher = aenderungen[tabelle][0]
+    else:
+        vorher = neu - 1
+    aenderungen[tabelle] = (vorher, neu)
+    if has_app_context():
+        g.pop("_tabellenversionen", None)
+
+
+# ── Zähler in derselben Transaktion wie die Änderung erhöhen ──────────────
+@event.listens_for(Session, "after_flush")
+def _nach_flush(session, flush_context):
+    tabellen = {
+        obj.__table__.name
+        for obj in (*session.new, *session.dirty, *session.deleted)
+        if not isinstance(obj, TabellenVersion)
+    }
+    for t in sorted(tabellen):
+        erhoehen(session, t)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _bulk_dml(orm_execute_state):
+    # session.execute(insert(Person), [...]) läuft an den Mapper-Events vorbei
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        tabelle = getattr(orm_execute_state.statement, "table", None)
+        if tabelle is not None and tabelle.name != TabellenVersion.__tablename__:
+            erhoehen(orm_execute_state.session, tabelle.name, bulk=True)
+
+
+@event.listens_for(Session, "after_transaction_create")
+def _neue_transaktion(session, transaction):
+    if transaction.parent is None:
+        session.info.pop("tabellenversionen", None)
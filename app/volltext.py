@@ -0,0 +1,275 @@
+import re
+import unicodedata
+from collections import namedtuple
+
+import click
+from markupsafe import Markup, escape
+from sqlalchemy import bindparam, text
+
+from app import db
+from app.lesemodelle import name_mit_spitzname
+
+# Volltextsuche über alle Freitexte mit SQLite FTS5.
+#
+# Alle Quellen landen in einer virtuellen Tabelle ``volltext``. Die rowid
+# kodiert Quelle und Datensatz (id * 8 + Code), damit Trigger einzelne Zeilen
+# ohne Scan ersetzen können. Gepflegt wird der Index per SQL-Trigger statt
+# über Mapper-Events, weil auch Bulk-INSERTs (Kurs-Teilnahmen, Import) an ihm
+# vorbei müssen. Achtung: ``batch_alter_table`` baut Tabellen unter SQLite
+# neu und verliert dabei die Trigger – Migrationen an Quelltabellen legen sie
+# danach neu an, mit einer Kopie der DDL wie in e5a93c0d7b12 (Migrationen
+# importieren keinen App-Code).
+
+TABELLE = "volltext"
+TOKENIZER = "unicode61 remove_diacritics 2"    # "Übung" findet auch "ubung"
+
+# Quelle: Code für die rowid, Tabelle und SQL-Ausdrücke je Spalte ({t} = Zeile)
+Quelle = namedtuple("Quelle", "code tabelle titel inhalt person_id lernfeld_id datum")
+
+_KURS = "(SELECT {feld} FROM kurs_rueckmeldung WHERE id = {t}.rueckmeldung_id)"
+
+QUELLEN = {
+    "freiarbeit": Quelle(
+        1, "freiarbeit_eintrag", "{t}.thema_text", "{t}.notiz",
+        "{t}.person_id", "{t}.lernfeld_id", "{t}.datum",
+    ),
+    "kurs": Quelle(
+        2, "kurs_teilnahme", _KURS.format(feld="thema", t="{t}"), "{t}.notiz",
+        "{t}.person_id", _KURS.format(feld="lernfeld_id", t="{t}"), _KURS.format(feld="datum", t="{t}"),
+    ),
+    "leistung": Quelle(
+        3, "leistungs_rueckmeldung", "{t}.thema", "{t}.rueckmeldung",
+        "{t}.person_id", "{t}.lernfeld_id", "{t}.datum",
+    ),
+    "zuweisung": Quelle(
+        4, "thema_zuweisung", "{t}.thema_basistext", "{t}.bemerkung",
+        "{t}.person_id", "{t}.lernfeld_id", "NULL",
+    ),
+    "foerderbedarf": Quelle(
+        5, "person", "NULL",
+        "trim(coalesce({t}.foerderbedarf, '') || ' ' || coalesce({t}.foerderbedarf_massnahmen, ''))",
+        "{t}.id", "NULL", "NULL",
+    ),
+}
+
+ART_NAMEN = {
+    "freiarbeit":    "Freiarbeit",
+    "kurs":          "Kurs-Notiz",
+    "leistung":      "Leistungsrückmeldung",
+    "zuweisung":     "Themenzuweisung",
+    "foerderbedarf": "Förderbedarf",
+}
+_ART_VON_CODE = {q.code: art for art, q in QUELLEN.items()}
+
+# Kurs-Teilnahmen ohne Notiz (der Normalfall) gar nicht erst indizieren
+_NUR_MIT_TEXT = "coalesce({titel}, '') || coalesce({inhalt}, '') <> ''"
+_KURS_NUR_MIT_NOTIZ = "coalesce({t}.notiz, '') <> ''"
+
+
+def _select(art, t):
+    q = QUELLEN[art]
+    spalten = {f: getattr(q, f).format(t=t) for f in ("titel", "inhalt", "person_id", "lernfeld_id", "datum")}
+    bedingung = (_KURS_NUR_MIT_NOTIZ.format(t=t) if art == "kurs"
+                 else _NUR_MIT_TEXT.format(**spalten))
+    return (
+        f"SELECT {t}.id * 8 + {q.code}, {spalten['titel']}, {spalten['inhalt']}, "
+        f"{spalten['person_id']}, {spalten['lernfeld_id']}, {spalten['datum']}"
+        f"{' FROM ' + q.tabelle + ' AS ' + t if t != 'NEW' else ''} WHERE {bedingung}"
+    )
+
+
+_EINFUEGEN = f"INSERT INTO {TABELLE} (rowid, titel, inhalt, person_id, lernfeld_id, datum) "
+
+
+def ddl():
+    """CREATE-Statements für die FTS-Tabelle und alle Trigger."""
+    anweisungen = [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABELLE} USING fts5("
+        "titel, inhalt, person_id UNINDEXED, lernfeld_id UNINDEXED, datum UNINDEXED, "
+        f"tokenize = '{TOKENIZER}')"
+    ]
+    for art, q in QUELLEN.items():
+        loeschen = f"DELETE FROM {TABELLE} WHERE rowid = OLD.id * 8 + {q.code};"
+        einfuegen = _EINFUEGEN + _select(art, "NEW") + ";"
+        anweisungen += [
+            f"CREATE TRIGGER IF NOT EXISTS {TABELLE}_{q.tabelle}_ai AFTER INSERT ON {q.tabelle} "
+            f"BEGIN {einfuegen} END",
+            f"CREATE TRIGGER IF NOT EXISTS {TABELLE}_{q.tabelle}_au AFTER UPDATE ON {q.tabelle} "
+            f"BEGIN {loeschen} {einfuegen} END",
+            f"CREATE TRIGGER IF NOT EXISTS {TABELLE}_{q.tabelle}_ad AFTER DELETE ON {q.tabelle} "
+            f"BEGIN {loeschen} END",
+        ]
+    # Thema/Datum/Lernfeld eines Kurses stehen auch in den Zeilen seiner Teilnahmen
+    kurs = QUELLEN["kurs"]
+    anweisungen.append(
+        f"CREATE TRIGGER IF NOT EXISTS {TABELLE}_kurs_rueckmeldung_au AFTER UPDATE ON kurs_rueckmeldung "
+        f"BEGIN DELETE FROM {TABELLE} WHERE rowid IN "
+        f"(SELECT id * 8 + {kurs.code} FROM kurs_teilnahme WHERE rueckmeldung_id = NEW.id); "
+        f"{_EINFUEGEN}{_select('kurs', 't')} AND t.rueckmeldung_id = NEW.id; END"
+    )
+    return anweisungen
+
+
+def trigger_namen():
+    namen = [f"{TABELLE}_{q.tabelle}_{s}" for q in QUELLEN.values() for s in ("ai", "au", "ad")]
+    return namen + [f"{TABELLE}_kurs_rueckmeldung_au"]
+
+
+def einrichten(connection):
+    for anweisung in ddl():
+        connection.exec_driver_sql(anweisung)
+
+
+def entfernen(connection):
+    for name in trigger_namen():
+        connection.exec_driver_sql(f"DROP TRIGGER IF EXISTS {name}")
+    connection.exec_driver_sql(f"DROP TABLE IF EXISTS {TABELLE}")
+
+
+def fuer_migration(name, type_, parent_names):
+    """``include_name`` für Alembic: FTS-Tabelle und ihre Schattentabellen auslassen."""
+    return not (type_ == "table" and name.startswith(TABELLE))
+
+
+def neu_aufbauen(connection):
+    """Füllt den Index komplett neu aus allen Quellen; gibt die Zeilenzahl zurück."""
+    connection.exec_driver_sql(f"DELETE FROM {TABELLE}")
+    for art in QUELLEN:
+        connection.exec_driver_sql(_EINFUEGEN + _select(art, "t"))
+    connection.exec_driver_sql(f"INSERT INTO {TABELLE}({TABELLE}) VALUES ('optimize')")
+    return connection.exec_driver_sql(f"SELECT count(*) FROM {TABELLE}").scalar()
+
+
+# ── Suche ─────────────────────────────────────────────────────────────────
+Treffer = namedtuple(
+    "Treffer", "art art_name quelle_id person_id person lernfeld_id datum titel ausschnitt"
+)
+
+_WORT = re.compile(r"\w+", re.UNICODE)
+AUSSCHNITT_WOERTER = 16
+
+
+def anfrage_bauen(q):
+    """Suchbegriff → FTS5-Ausdruck: jedes Wort als Präfix, alle Wörter müssen vorkommen.
+
+    Sonderzeichen der FTS-Syntax fallen weg, so dass Nutzereingaben nie
+    einen Syntaxfehler auslösen. Leere Eingabe → None.
+    """
+    woerter = _WORT.findall(q or "")
+    if not woerter:
+        return None
+    return " ".join(f'"{w}"*' for w in woerter)
+
+
+def _falten(wort):
+    """Wie der Tokenizer: klein und ohne diakritische Zeichen."""
+    zerlegt = unicodedata.normalize("NFKD", wort)
+    return "".join(z for z in zerlegt if not unicodedata.combining(z)).casefold()
+
+
+def hervorheben(text_, praefixe, woerter=None):
+    """Escaptes HTML mit ``<mark>`` um alle Wörter, die mit einem der Präfixe beginnen.
+
+    Mit ``woerter`` wird auf so viele Wörter rund um den ersten Treffer
+    gekürzt. Der Ausschnitt entsteht hier statt mit FTS5 ``snippet()``,
+    weil das den Suchausdruck für jede Ergebniszeile erneut auswerten müsste.
+    """
+    if not text_:
+        return Markup("")
+    tokens = list(_WORT.finditer(text_))
+    treffer = [any(_falten(t.group()).startswith(p) for p in praefixe) for t in tokens]
+
+    anfang, ende = 0, len(tokens)
+    if woerter and len(tokens) > woerter:
+        erster = treffer.index(True) if True in treffer else 0
+        anfang = max(0, min(erster - woerter // 4, len(tokens) - woerter))
+        ende = anfang + woerter
+
+    teile = ["…" if anfang else ""]
+    pos = tokens[anfang].start() if anfang else 0
+    for t, markiert in zip(tokens[anfang:ende], treffer[anfang:ende]):
+        teile.append(escape(text_[pos:t.start()]))
+        teile.append(Markup("<mark>%s</mark>") % t.group() if markiert else escape(t.group()))
+        pos = t.end()
+    if ende < len(tokens):
+        teile.append("…")
+    else:
+        teile.append(escape(text_[pos:]))
+    return Markup("").join(teile)
+
+
+def suchen(q, person_id=None, lerngruppe_id=None, lernfeld_id=None,
+           von=None, bis=None, art=None, limit=50):
+    """Sucht in allen Freitexten; Ergebnis nach Relevanz (bm25) sortiert.
+
+    Titel (Thema) zählen doppelt so viel wie der Text. Zwei Abfragen: die
+    erste rankt im FTS-Index nur rowids, die zweite holt Inhalt und Person
+    für die ``limit`` besten per rowid – so wird nichts für Treffer gelesen,
+    die ohnehin abgeschnitten werden.
+    """
+    ausdruck = anfrage_bauen(q)
+    if ausdruck is None:
+        return []
+
+    bedingungen = [f"{TABELLE} MATCH :ausdruck"]
+    parameter = {"ausdruck": ausdruck, "limit": limit}
+    if person_id:
+        bedingungen.append("person_id = :person_id")
+        parameter["person_id"] = person_id
+    if lerngruppe_id:
+        bedingungen.append("person_id IN (SELECT id FROM person WHERE lerngruppe_id = :lerngruppe_id)")
+        parameter["lerngruppe_id"] = lerngruppe_id
+    if lernfeld_id:
+        bedingungen.append("lernfeld_id = :lernfeld_id")
+        parameter["lernfeld_id"] = lernfeld_id
+    if von:
+        bedingungen.append("datum >= :von")
+        parameter["von"] = von.isoformat()
+    if bis:
+        bedingungen.append("datum <= :bis")
+        parameter["bis"] = bis.isoformat()
+    if art in QUELLEN:
+        bedingungen.append("rowid % 8 = :code")
+        parameter["code"] = QUELLEN[art].code
+
+    rowids = db.session.execute(text(
+        f"SELECT rowid FROM {TABELLE} WHERE {' AND '.join(bedingungen)} "
+        f"ORDER BY bm25({TABELLE}, 2.0, 1.0) LIMIT :limit"
+    ), parameter).scalars().all()
+    if not rowids:
+        return []
+
+    zeilen = {
+        z[0]: z for z in db.session.execute(
+            text(
+                f"SELECT v.rowid, v.person_id, v.lernfeld_id, v.datum, v.titel, v.inhalt, "
+                f"p.vorname, p.spitzname, p.nachname "
+                f"FROM {TABELLE} AS v LEFT JOIN person AS p ON p.id = v.person_id "
+                f"WHERE v.rowid IN :rowids"
+            ).bindparams(bindparam("rowids", expanding=True)),
+            {"rowids": rowids},
+        )
+    }
+
+    praefixe = [_falten(w) for w in _WORT.findall(q)]
+    treffer = []
+    for rowid in rowids:
+        _, pid, lf_id, datum, titel, inhalt, vorname, spitzname, nachname = zeilen[rowid]
+        art_ = _ART_VON_CODE[rowid % 8]
+        person = "" if vorname is None else name_mit_spitzname(vorname, nachname, spitzname)
+        treffer.append(Treffer(
+            art_, ART_NAMEN[art_], rowid // 8, pid, person, lf_id, datum,
+            hervorheben(titel, praefixe), hervorheben(inhalt, praefixe, AUSSCHNITT_WOERTER),
+        ))
+    return treffer
+
+
+def init_app(app):
+    @app.cli.command("volltext-aufbauen")
+    def volltext_aufbauen():
+        """Legt den Volltextindex (falls nötig) an und füllt ihn neu."""
+        connection = db.session.connection()
+        einrichten(connection)
+        anzahl = neu_aufbauen(connection)
+        db.session.commit()
+        click.echo(f"{anzahl} Texte indiziert.")
@@ -0,0 +1,61 @@
+import os
+import time
+
+import click
+from jinja2 import FileSystemBytecodeCache, TemplateError
+
+# Templates beim Start statt beim ersten Request übersetzen.
+#
+# Jinja übersetzt ein Template beim ersten get_template in Python-Code und
+# behält es dann im Speicher – bisher also beim ersten Aufruf jeder Seite in
+# jedem Worker, nach einem Deploy spürbar langsam. Der Bytecode-Cache legt
+# den übersetzten Code unter instance/jinja-cache ab (Schlüssel ist der
+# Template-Quelltext, Änderungen machen den Eintrag ungültig), und
+# ``vorkompilieren`` lädt beim Start alle Templates einmal: der Prozess hat
+# sie dann im Speicher, und jeder weitere Worker liest nur noch den Cache.
+
+STANDARD = {
+    "TEMPLATE_CACHE_AKTIV": True,
+    "TEMPLATE_CACHE_VERZEICHNIS": None,     # None = instance/jinja-cache
+    "TEMPLATES_VORKOMPILIEREN": True,       # beim Start alle Templates laden
+}
+
+
+def vorkompilieren(app):
+    """Lädt alle Templates der App; gibt (Anzahl, Fehler) zurück."""
+    umgebung = app.jinja_env
+    namen = [n for n in umgebung.list_templates() if n.endswith((".html", ".txt", ".xml"))]
+    fehler = []
+    for name in namen:
+        try:
+            umgebung.get_template(name)
+        except TemplateError as e:
+            fehler.append((name, e))
+            app.logger.warning("Template %s lässt sich nicht übersetzen: %s", name, e)
+    return len(namen) - len(fehler), fehler
+
+
+def init_app(app):
+    for schluessel, wert in STANDARD.items():
+        app.config.setdefault(schluessel, wert)
+
+    if app.config["TEMPLATE_CACHE_AKTIV"]:
+        pfad = app.config["TEMPLATE_CACHE_VERZEICHNIS"] or os.path.join(app.instance_path, "jinja-cache")
+        os.makedirs(pfad, exist_ok=True)
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(pfad)
+
+    @app.cli.command("templates-kompilieren")
+    @click.option("--leeren", is_flag=True, help="Vorher den Bytecode-Cache leeren.")
+    def templates_kompilieren(leeren):
+        """Übersetzt alle Templates in den Bytecode-Cache (z. B. beim Deploy)."""
+        cache = app.jinja_env.bytecode_cache
+        if leeren:
+            app.jinja_env.cache.clear()     # beim Start schon geladen
+            if cache is not None:
+                cache.clear()
+        start = time.perf_counter()
+        anzahl, fehler = vorkompilieren(app)
+        click.echo(f"{anzahl} Templates übersetzt in {time.perf_counter() - start:.2f} s"
+                   f"{'' if cache is not None else ' (ohne Bytecode-Cache)'}.")
+        if fehler:
+            raise SystemExit(1)
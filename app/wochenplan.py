@@ -0,0 +1,250 @@
+import json
+from collections import namedtuple
+from datetime import date, timedelta
+from itertools import groupby
+
+import click
+from sqlalchemy import and_, bindparam, delete, event, inspect, or_, select, tuple_
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from app import db
+from app.models import FreiarbeitEintrag, Person, Wochenplan
+from app.referenzdaten import referenzdaten
+from app.utils import phase_nummer
+from app.timeline import cursor_schreiben
+
+# Die Wochenplan-Tabelle hält pro (Person, ISO-Jahr, KW) nur die belegten
+# Zellen des 7×5-Rasters als kompaktes JSON. Lernfeld-Namen werden erst beim
+# Anzeigen über die Referenzdaten aufgelöst, damit ein Umbenennen keine
+# Neuberechnung braucht.
+
+_EINTRAG = FreiarbeitEintrag.__table__
+_WOCHENPLAN = Wochenplan.__table__
+
+BATCHGROESSE = 500          # Wochen pro executemany beim Neuaufbau
+_WOCHEN_PRO_ABFRAGE = 200   # Wochen pro Abfrage bei der inkrementellen Pflege
+
+Zelle = namedtuple("Zelle", "name theme note")
+_LEERE_ZELLE = Zelle("", "", "")
+
+
+class Woche:
+    """Eine Kalenderwoche des Wochenplans, so wie sie das Template braucht."""
+
+    __slots__ = ("year", "week", "monday", "sunday", "_zellen")
+
+    def __init__(self, jahr, kw, montag, zellen, lernfeld_namen):
+        self.year = jahr
+        self.week = kw
+        self.monday = montag
+        self.sunday = montag + timedelta(days=6)
+        self._zellen = {}
+        for ap, tag, lernfeld_id, thema, notiz in json.loads(zellen):
+            name = lernfeld_namen.get(lernfeld_id)
+            if name:
+                self._zellen[ap, tag] = Zelle(name, thema, notiz)
+
+    def zelle(self, ap, tag):
+        return self._zellen.get((ap, tag), _LEERE_ZELLE)
+
+
+def zellen_berechnen(eintraege):
+    """Raster einer Woche aus ``(datum, phase, lernfeld_id, thema, notiz)``-Zeilen.
+
+    Die Zeilen kommen wie auf der Detailseite sortiert (Datum absteigend,
+    Phase, ID); bei mehreren Einträgen in einer Zelle gewinnt der letzte.
+    """
+    raster = {}
+    for datum, phase, lernfeld_id, thema, notiz in eintraege:
+        ap = phase_nummer(phase)
+        tag = datum.isoweekday()
+        if 0 <= ap <= 6 and 1 <= tag <= 5 and lernfeld_id:
+            raster[ap, tag] = [ap, tag, lernfeld_id, thema or "", notiz or ""]
+    return json.dumps(sorted(raster.values()), ensure_ascii=False, separators=(",", ":"))
+
+
+def _montag(jahr, kw):
+    return date.fromisocalendar(jahr, kw, 1)
+
+
+def _speichern(connection, zeilen):
+    if not zeilen:
+        return
+    stmt = insert(_WOCHENPLAN)
+    connection.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[_WOCHENPLAN.c.person_id, _WOCHENPLAN.c.jahr, _WOCHENPLAN.c.kw],
+            set_={"montag": stmt.excluded.montag, "zellen": stmt.excluded.zellen},
+        ),
+        zeilen,
+    )
+
+
+# ── Lesen ─────────────────────────────────────────────────────────────────
+def wochenplan_seite(person_id, vor=None, wochen=8):
+    """Liefert (wochen, weiter) mit bis zu ``wochen`` Kalenderwochen vor ``vor``.
+
+    Gelesen werden nur die vorberechneten Zeilen – der Aufwand hängt an der
+    Zahl der angezeigten Wochen, nicht an der Zahl der Einträge.
+    """
+    query = (
+        select(Wochenplan.jahr, Wochenplan.kw, Wochenplan.montag, Wochenplan.zellen)
+        .where(Wochenplan.person_id == person_id)
+    )
+    if vor:
+        query = query.where(tuple_(Wochenplan.jahr, Wochenplan.kw) < vor[0].isocalendar()[:2])
+    zeilen = db.session.execute(
+        query.order_by(Wochenplan.jahr.desc(), Wochenplan.kw.desc()).limit(wochen + 1)
+    ).all()
+
+    namen = {lf.id: lf.name for lf in referenzdaten.lernfelder()}
+    ergebnis = [Woche(*z, namen) for z in zeilen[:wochen]]
+    weiter = cursor_schreiben(ergebnis[-1].monday) if len(zeilen) > wochen else None
+    return ergebnis, weiter
+
+
+# ── Pflege ────────────────────────────────────────────────────────────────
+def wochen_aktualisieren(connection, wochen):
+    """Berechnet die Zeilen für die Wochen ``{(person_id, jahr, kw), …}`` neu.
+
+    Wochen ohne Einträge werden gelöscht. Läuft auf der Verbindung der
+    laufenden Transaktion, sieht also bereits geflushte Änderungen.
+    """
+    wochen = sorted(wochen)
+    # SQLite begrenzt die Tiefe eines OR-Ausdrucks – große Mengen stückeln
+    for i in range(0, len(wochen), _WOCHEN_PRO_ABFRAGE):
+        _wochen_aktualisieren(connection, wochen[i:i + _WOCHEN_PRO_ABFRAGE])
+
+
+def _wochen_aktualisieren(connection, wochen):
+    bereiche = []
+    for person_id, jahr, kw in wochen:
+        mo = _montag(jahr, kw)
+        bereiche.append(and_(
+            _EINTRAG.c.person_id == person_id,
+            _EINTRAG.c.datum >= mo,
+            _EINTRAG.c.datum < mo + timedelta(days=7),
+        ))
+
+    gruppen = {w: [] for w in wochen}
+    for person_id, datum, *rest in connection.execute(
+        select(_EINTRAG.c.person_id, _EINTRAG.c.datum, _EINTRAG.c.phase,
+               _EINTRAG.c.lernfeld_id, _EINTRAG.c.thema_text, _EINTRAG.c.notiz)
+        .where(or_(*bereiche))
+        .order_by(_EINTRAG.c.datum.desc(), _EINTRAG.c.phase, _EINTRAG.c.id)
+    ):
+        jahr, kw, _ = datum.isocalendar()
+        gruppen[person_id, jahr, kw].append((datum, *rest))
+
+    zeilen, leer = [], []
+    for (person_id, jahr, kw), eintraege in gruppen.items():
+        if eintraege:
+            zeilen.append({
+                "person_id": person_id, "jahr": jahr, "kw": kw,
+                "montag": _montag(jahr, kw), "zellen": zellen_berechnen(eintraege),
+            })
+        else:
+            leer.append({"p": person_id, "j": jahr, "k": kw})
+
+    _speichern(connection, zeilen)
+    if leer:
+        connection.execute(
+            delete(_WOCHENPLAN).where(
+                _WOCHENPLAN.c.person_id == bindparam("p"),
+                _WOCHENPLAN.c.jahr == bindparam("j"),
+                _WOCHENPLAN.c.kw == bindparam("k"),
+            ),
+            leer,
+        )
+
+
+def neu_aufbauen(connection, person_id=None):
+    """Berechnet die Tabelle (oder die Wochen einer Person) komplett neu.
+
+    Nötig nach Änderungen, die an den ORM-Events vorbei gingen (Bulk-DML,
+    direktes SQL). Gibt die Zahl der geschriebenen Wochen zurück.
+    """
+    loeschen = delete(_WOCHENPLAN)
+    query = select(
+        _EINTRAG.c.person_id, _EINTRAG.c.datum, _EINTRAG.c.phase,
+        _EINTRAG.c.lernfeld_id, _EINTRAG.c.thema_text, _EINTRAG.c.notiz
+    )
+    if person_id is not None:
+        loeschen = loeschen.where(_WOCHENPLAN.c.person_id == person_id)
+        query = query.where(_EINTRAG.c.person_id == person_id)
+    connection.execute(loeschen)
+
+    zeilen = connection.execute(
+        query.order_by(_EINTRAG.c.person_id, _EINTRAG.c.datum.desc(), _EINTRAG.c.phase, _EINTRAG.c.id)
+    )
+    anzahl = 0
+    batch = []
+    for (pid, jahr, kw), gruppe in groupby(
+        zeilen, key=lambda z: (z.person_id, *z.datum.isocalendar()[:2])
+    ):
+        batch.append({
+            "person_id": pid, "jahr": jahr, "kw": kw, "montag": _montag(jahr, kw),
+            "zellen": zellen_berechnen(z[1:] for z in gruppe),
+        })
+        if len(batch) >= BATCHGROESSE:
+            _speichern(connection, batch)
+            anzahl += len(batch)
+            batch = []
+    _speichern(connection, batch)
+    return anzahl + len(batch)
+
+
+def _betroffene_wochen(eintrag):
+    """Alte und neue (person_id, jahr, kw) eines geänderten Eintrags."""
+    zustand = inspect(eintrag)
+
+    def werte(attr):
+        verlauf = zustand.attrs[attr].history
+        alle = {*verlauf.added, *verlauf.unchanged, *verlauf.deleted, zustand.dict.get(attr)}
+        return {w for w in alle if w is not None}
+
+    return {
+        (person_id, *datum.isocalendar()[:2])
+        for person_id in werte("person_id")
+        for datum in werte("datum")
+    }
+
+
+# ── Aktualisierung in derselben Transaktion wie die Einträge ──────────────
+@event.listens_for(FreiarbeitEintrag.person_id, "set", active_history=True)
+@event.listens_for(FreiarbeitEintrag.datum, "set", active_history=True)
+def _alten_wert_merken(target, value, oldvalue, initiator):
+    # active_history lädt den alten Wert auch bei expired Objekten, damit
+    # die bisherige Woche in der History steht und neu berechnet wird
+    pass
+
+
+@event.listens_for(Session, "after_flush")
+def _nach_flush(session, flush_context):
+    wochen = set()
+    geloeschte_personen = []
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, FreiarbeitEintrag):
+            wochen |= _betroffene_wochen(obj)
+        elif isinstance(obj, Person) and obj in session.deleted:
+            geloeschte_personen.append(obj.id)
+    if not (wochen or geloeschte_personen):
+        return
+
+    connection = session.connection()
+    wochen_aktualisieren(connection, wochen)
+    if geloeschte_personen:
+        connection.execute(
+            delete(_WOCHENPLAN).where(_WOCHENPLAN.c.person_id.in_(geloeschte_personen))
+        )
+
+
+def init_app(app):
+    @app.cli.command("wochenplan-aufbauen")
+    @click.option("--person", "person_id", type=int, help="Nur die Wochen dieser Person.")
+    def wochenplan_aufbauen(person_id):
+        """Berechnet die Wochenplan-Tabelle aus den Freiarbeit-Einträgen neu."""
+        anzahl = neu_aufbauen(db.session.connection(), person_id)
+        db.session.commit()
+        click.echo(f"{anzahl} Wochen berechnet.")
@@ -0,0 +1,290 @@
+"""Misst die häufig genutzten Seiten und APIs über den Flask-Test-Client.
+
+Legt (falls nicht mit ``--datenbank`` vorhanden) einen synthetischen
+Datenbestand an (siehe testdaten.py) und ruft jeden Endpunkt mehrfach auf.
+Ausgegeben wird JSON mit Laufzeiten (Median, p95, Min, Max) und der Zahl der
+SQL-Abfragen je Aufruf. Mit ``--vergleich`` werden die Werte gegen eine
+frühere Ausgabe geprüft; der Exit-Code ist dann 1, wenn ein Endpunkt mehr
+Abfragen braucht oder im Median um mehr als ``--toleranz`` langsamer ist.
+Unabhängig davon darf kein Endpunkt sein Abfragen-Budget (BUDGETS)
+überschreiten – die Zahl hängt nicht von der Datenmenge ab, ein Anstieg
+deutet auf ein N+1-Muster hin.
+
+    python benchmarks/endpunkte.py --ausgabe basis.json
+    python benchmarks/endpunkte.py --datenbank /tmp/bench.sqlite --vergleich basis.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timezone
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import event, func, select  # noqa: E402
+
+from app import create_app, db  # noqa: E402
+from app.models import Lerngruppe, Lernfeld, Person  # noqa: E402
+
+import testdaten  # noqa: E402
+
+# Höchstzahl SQL-Abfragen je Aufruf, unabhängig von der Zahl der Zeilen.
+# Der Stand der Tabellenversionen (Caches) zählt mit. tests/test_abfragen.py
+# prüft dieselben Zahlen exakt auf zwei kleinen Beständen.
+BUDGETS = {
+    "personen.suche_person": 1,
+    "freiarbeit.api_personensuche": 1,
+    "freiarbeit.api_personen": 1,
+    "kurse.api_personen": 1,
+    # ETag aus dem Tabellenstand (@bedingt) plus die eigentliche Abfrage;
+    # eine 304-Antwort braucht nur den Stand
+    "freiarbeit.api_thema_vorschlag": 2,
+    "lernfelder.verwalten": 1,
+    "personen.liste": 2,
+    "personen.detail": 2,
+    "personen.tab:wochenplan": 2,
+    "personen.tab:eintragungen_woche": 4,
+    "personen.tab:eintragungen_lernfeld": 2,
+    "personen.tab:kurs": 2,
+    "personen.tab:leistungsrueck": 2,
+    "kurse.dokumentieren": 1,
+    "kurse.dokumentieren:speichern": 8,
+    "freiarbeit.neuer_eintrag": 4,        # inkl. der heutigen Einträge (Liste unter dem Formular)
+    "freiarbeit.neuer_eintrag:speichern": 6,
+}
+
+WURZEL = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+class Zaehler:
+    """Zählt SQL-Abfragen und ihre Dauer auf einer Engine."""
+
+    def __init__(self, engine):
+        self.abfragen = 0
+        self.sql_dauer = 0.0
+        event.listen(engine, "before_cursor_execute", self._beginn)
+        event.listen(engine, "after_cursor_execute", self._ende)
+
+    def _beginn(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info["bench_beginn"] = time.perf_counter()
+
+    def _ende(self, conn, cursor, statement, parameters, context, executemany):
+        self.abfragen += 1
+        self.sql_dauer += time.perf_counter() - conn.info.pop("bench_beginn", time.perf_counter())
+
+    def zuruecksetzen(self):
+        self.abfragen = 0
+        self.sql_dauer = 0.0
+
+
+def szenarien(app, rnd):
+    """(Name, Methode, Funktion → (URL, Formulardaten)) für jeden gemessenen Endpunkt."""
+    with app.app_context():
+        person_ids = db.session.scalars(select(Person.id)).all()
+        gruppen_ids = db.session.scalars(select(Lerngruppe.id)).all()
+        lernfeld_ids = db.session.scalars(select(Lernfeld.id)).all()
+        namen = db.session.execute(select(Person.vorname, Person.nachname)).all()
+        mitglieder = {
+            gid: db.session.scalars(select(Person.id).where(Person.lerngruppe_id == gid)).all()
+            for gid in gruppen_ids
+        }
+
+    def suchbegriff():
+        vorname, nachname = rnd.choice(namen)
+        return rnd.choice([vorname[:3], nachname[:4], f"{vorname} {nachname[:2]}"])
+
+    def kurs():
+        gid = rnd.choice(gruppen_ids)
+        kinder = mitglieder[gid]
+        return "/kurse/dokumentieren", {
+            "lernfeld": rnd.choice(lernfeld_ids), "lerngruppe": gid,
+            "datum": date.today().isoformat(), "phase": "2.AP", "thema": "Benchmark",
+            "krank": rnd.sample(kinder, min(2, len(kinder))),
+        }
+
+    def freiarbeit_speichern():
+        return f"/freiarbeit/neu/{rnd.choice(lernfeld_ids)}", {
+            "person_id": rnd.choice(person_ids), "datum": date.today().isoformat(),
+            "phase": "3.AP", "thema_text": "Benchmark", "notiz": "",
+        }
+
+    def tab(name):
+        return lambda: (f"/personen/{rnd.choice(person_ids)}/tabs/{name}", None)
+
+    return [
+        ("personen.suche_person", "GET", lambda: (f"/personen/api/suche?q={suchbegriff()}", None)),
+        ("freiarbeit.api_personensuche", "GET", lambda: (f"/freiarbeit/api/personensuche?q={suchbegriff()}", None)),
+        ("freiarbeit.api_personen", "GET", lambda: (f"/freiarbeit/api/personen?q={suchbegriff()}", None)),
+        ("kurse.api_personen", "GET", lambda: (f"/kurse/api/personen?lerngruppe_id={rnd.choice(gruppen_ids)}", None)),
+        ("freiarbeit.api_thema_vorschlag", "GET",
+         lambda: (f"/freiarbeit/api/thema_vorschlag?person_id={rnd.choice(person_ids)}"
+                  f"&lernfeld_id={rnd.choice(lernfeld_ids)}", None)),
+        ("lernfelder.verwalten", "GET", lambda: ("/lernfelder/", None)),
+        ("personen.liste", "GET", lambda: ("/personen/", None)),
+        ("personen.detail", "GET", lambda: (f"/personen/{rnd.choice(person_ids)}", None)),
+        ("personen.tab:wochenplan", "GET", tab("wochenplan")),
+        ("personen.tab:eintragungen_woche", "GET", tab("eintragungen_woche")),
+        ("personen.tab:eintragungen_lernfeld", "GET", tab("eintragungen_lernfeld")),
+        ("personen.tab:kurs", "GET", tab("kurs")),
+        ("personen.tab:leistungsrueck", "GET", tab("leistungsrueck")),
+        ("kurse.dokumentieren", "GET", lambda: ("/kurse/dokumentieren", None)),
+        ("kurse.dokumentieren:speichern", "POST", kurs),
+        ("freiarbeit.neuer_eintrag", "GET",
+         lambda: (f"/freiarbeit/neu/{rnd.choice(lernfeld_ids)}?person_id={rnd.choice(person_ids)}", None)),
+        ("freiarbeit.neuer_eintrag:speichern", "POST", freiarbeit_speichern),
+    ]
+
+
+def messen(client, zaehler, methode, anfrage, wiederholungen, aufwaermen):
+    zeiten, abfragen, sql = [], [], []
+    status = set()
+    for i in range(aufwaermen + wiederholungen):
+        url, daten = anfrage()
+        zaehler.zuruecksetzen()
+        t0 = time.perf_counter()
+        antwort = client.open(url, method=methode, data=daten)
+        antwort.get_data()
+        dauer = time.perf_counter() - t0
+        status.add(antwort.status_code)
+        if i >= aufwaermen:
+            zeiten.append(dauer * 1000)
+            abfragen.append(zaehler.abfragen)
+            sql.append(zaehler.sql_dauer * 1000)
+    zeiten.sort()
+    return {
+        "aufrufe": wiederholungen,
+        "status": sorted(status),
+        "median_ms": round(statistics.median(zeiten), 3),
+        "p95_ms": round(zeiten[min(len(zeiten) - 1, int(len(zeiten) * 0.95))], 3),
+        "min_ms": round(zeiten[0], 3),
+        "max_ms": round(zeiten[-1], 3),
+        "abfragen_median": statistics.median(abfragen),
+        "abfragen_max": max(abfragen),
+        "sql_median_ms": round(statistics.median(sql), 3),
+    }
+
+
+def _git_stand():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=WURZEL,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def budgets_pruefen(ergebnis):
+    """Liste der Endpunkte, die mehr Abfragen brauchen als erlaubt."""
+    return [
+        f"{name}: {e['abfragen_max']} Abfragen, Budget {BUDGETS[name]}"
+        for name, e in ergebnis["endpunkte"].items()
+        if name in BUDGETS and e["abfragen_max"] > BUDGETS[name]
+    ]
+
+
+def vergleichen(basis, aktuell, toleranz):
+    """Liste der Verschlechterungen gegenüber ``basis``."""
+    meldungen = []
+    for name, neu in aktuell["endpunkte"].items():
+        alt = basis.get("endpunkte", {}).get(name)
+        if not alt:
+            continue
+        if neu["abfragen_max"] > alt["abfragen_max"]:
+            meldungen.append(f"{name}: {alt['abfragen_max']} → {neu['abfragen_max']} Abfragen")
+        if neu["median_ms"] > alt["median_ms"] * (1 + toleranz):
+            meldungen.append(f"{name}: Median {alt['median_ms']:.1f} → {neu['median_ms']:.1f} ms")
+    return meldungen
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--datenbank", help="SQLite-Datei; wird beim ersten Lauf angelegt und danach wiederverwendet")
+    parser.add_argument("--gruppen", type=int, default=12)
+    parser.add_argument("--personen-je-gruppe", type=int, default=25)
+    parser.add_argument("--jahre", type=float, default=2)
+    parser.add_argument("--eintraege-pro-tag", type=float, default=1.0)
+    parser.add_argument("--wiederholungen", type=int, default=30)
+    parser.add_argument("--aufwaermen", type=int, default=3)
+    parser.add_argument("--nur", action="append", help="nur Endpunkte, deren Name so beginnt (mehrfach möglich)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--ausgabe", help="JSON in diese Datei statt auf stdout")
+    parser.add_argument("--vergleich", help="frühere JSON-Ausgabe, gegen die geprüft wird")
+    parser.add_argument("--toleranz", type=float, default=0.25, help="erlaubte Verlangsamung des Medians (Anteil)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pfad = args.datenbank or os.path.join(tmp, "bench.sqlite")
+        if not os.path.exists(pfad):
+            print("Erzeuge Testdaten …", file=sys.stderr)
+            testdaten.datenbank_anlegen(
+                pfad, gruppen=args.gruppen, personen_je_gruppe=args.personen_je_gruppe,
+                jahre=args.jahre, eintraege_pro_tag=args.eintraege_pro_tag, seed=args.seed,
+            )
+
+        app = create_app({
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.abspath(pfad)}",
+            "WTF_CSRF_ENABLED": False,
+            "JOBS_IM_WEBPROZESS": False,
+            "JOBS_VERZEICHNIS": os.path.join(tmp, "jobs"),
+            "MESSUNG_AKTIV": False,
+        })
+        # Startseite kommt aus run.py; base.html verlinkt sie
+        app.add_url_rule("/", "index", lambda: "")
+
+        with app.app_context():
+            zaehler = Zaehler(db.engine)
+            daten = {
+                t: db.session.scalar(select(func.count()).select_from(db.metadata.tables[t]))
+                for t in ("lerngruppe", "person", "freiarbeit_eintrag", "kurs_rueckmeldung",
+                          "kurs_teilnahme", "leistungs_rueckmeldung")
+            }
+
+        rnd = random.Random(args.seed)
+        client = app.test_client()
+        ergebnis = {
+            "zeitpunkt": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git": _git_stand(),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "daten": daten,
+            "wiederholungen": args.wiederholungen,
+            "endpunkte": {},
+        }
+        for name, methode, anfrage in szenarien(app, rnd):
+            if args.nur and not name.startswith(tuple(args.nur)):
+                continue
+            ergebnis["endpunkte"][name] = messen(
+                client, zaehler, methode, anfrage, args.wiederholungen, args.aufwaermen
+            )
+            e = ergebnis["endpunkte"][name]
+            print(f"{name:40} {e['median_ms']:9.2f} ms  {e['abfragen_max']:4} Abfragen  {e['status']}",
+                  file=sys.stderr)
+            e["budget"] = BUDGETS.get(name)
+
+        with app.app_context():
+            db.engine.dispose()
+
+    text = json.dumps(ergebnis, indent=2, ensure_ascii=False)
+    if args.ausgabe:
+        with open(args.ausgabe, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    fehler = ["Budget überschritten: " + m for m in budgets_pruefen(ergebnis)]
+    if args.vergleich:
+        with open(args.vergleich, encoding="utf-8") as f:
+            fehler += ["Verschlechtert: " + m for m in vergleichen(json.load(f), ergebnis, args.toleranz)]
+    for m in fehler:
+        print(m, file=sys.stderr)
+    sys.exit(1 if fehler else 0)
+
+
+if __name__ == "__main__":
+    main()
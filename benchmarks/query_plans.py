@@ -0,0 +1,160 @@
+"""Vergleicht Query-Pläne und Laufzeiten der häufigen Abfragen mit und ohne Indizes.
+
+Legt eine temporäre SQLite-Datenbank mit synthetischen Daten an, misst die
+Abfragen zuerst ohne die Indizes aus den Models (Full Scan) und danach mit
+ihnen (Index Seek).
+
+    python benchmarks/query_plans.py --personen 600 --eintraege 100000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import create_engine, text  # noqa: E402
+
+from app import db  # noqa: E402
+import app.models  # noqa: E402,F401
+
+
+ABFRAGEN = {
+    "Detailseite: Einträge einer Person": (
+        "SELECT id, datum, phase, lernfeld_id FROM freiarbeit_eintrag "
+        "WHERE person_id = :pid ORDER BY datum DESC, phase",
+    ),
+    "Freiarbeit: Einträge heute im Lernfeld": (
+        "SELECT id FROM freiarbeit_eintrag "
+        "WHERE lernfeld_id = :lf AND gespeichert_am >= :start AND gespeichert_am < :ende "
+        "ORDER BY gespeichert_am DESC LIMIT 40",
+    ),
+    "Themenzuweisung nachschlagen": (
+        "SELECT thema_basistext, bemerkung FROM thema_zuweisung "
+        "WHERE person_id = :pid AND lernfeld_id = :lf",
+    ),
+    "Kurs-Teilnahmen einer Person": (
+        "SELECT kt.id, kr.datum FROM kurs_teilnahme kt "
+        "JOIN kurs_rueckmeldung kr ON kt.rueckmeldung_id = kr.id "
+        "WHERE kt.person_id = :pid ORDER BY kr.datum DESC, kr.phase",
+    ),
+    "Personen einer Lerngruppe": (
+        "SELECT id, vorname, nachname FROM person "
+        "WHERE lerngruppe_id = :lg ORDER BY vorname, nachname",
+    ),
+    "Übersicht: Freiarbeit je Person und Lernfeld": (
+        "SELECT person_id, lernfeld_id, count(*), max(datum) FROM freiarbeit_eintrag "
+        "GROUP BY person_id, lernfeld_id",
+    ),
+    "Leistungsrückmeldungen einer Person": (
+        "SELECT id FROM leistungs_rueckmeldung WHERE person_id = :pid ORDER BY datum DESC",
+    ),
+}
+
+
+def befuellen(conn, personen, eintraege, gruppen=12, lernfelder=8):
+    rnd = random.Random(42)
+    conn.execute(text("INSERT INTO lerngruppe (id, name) VALUES (:id, :name)"),
+                 [{"id": i, "name": f"Gruppe {i}"} for i in range(1, gruppen + 1)])
+    conn.execute(text("INSERT INTO lernfeld (id, name) VALUES (:id, :name)"),
+                 [{"id": i, "name": f"Lernfeld {i}"} for i in range(1, lernfelder + 1)])
+    conn.execute(
+        text("INSERT INTO person (id, vorname, nachname, lerngruppe_id, stufe) "
+             "VALUES (:id, :v, :n, :g, :s)"),
+        [{"id": i, "v": f"Vorname{i}", "n": f"Nachname{i}",
+          "g": rnd.randint(1, gruppen), "s": rnd.randint(5, 13)}
+         for i in range(1, personen + 1)]
+    )
+    start = date.today() - timedelta(days=3 * 365)
+    conn.execute(
+        text("INSERT INTO freiarbeit_eintrag "
+             "(person_id, datum, phase, lernfeld_id, thema_text, gespeichert_am) "
+             "VALUES (:p, :d, :ph, :lf, 'Thema', :g)"),
+        [{"p": rnd.randint(1, personen),
+          "d": (d := start + timedelta(days=rnd.randint(0, 3 * 365))),
+          "ph": f"{rnd.randint(0, 6)}.AP",
+          "lf": rnd.randint(1, lernfelder),
+          "g": datetime(d.year, d.month, d.day, rnd.randint(7, 17))}
+         for _ in range(eintraege)]
+    )
+    conn.execute(
+        text("INSERT INTO thema_zuweisung (person_id, lernfeld_id, thema_basistext) "
+             "VALUES (:p, :lf, 'Basis')"),
+        [{"p": p, "lf": lf} for p in range(1, personen + 1) for lf in range(1, lernfelder + 1)]
+    )
+    sitzungen = eintraege // 20
+    conn.execute(
+        text("INSERT INTO kurs_rueckmeldung (id, lernfeld_id, lerngruppe_id, datum, phase, thema) "
+             "VALUES (:id, :lf, :lg, :d, '1.AP', 'Kurs')"),
+        [{"id": i, "lf": rnd.randint(1, lernfelder), "lg": rnd.randint(1, gruppen),
+          "d": start + timedelta(days=rnd.randint(0, 3 * 365))} for i in range(1, sitzungen + 1)]
+    )
+    conn.execute(
+        text("INSERT INTO kurs_teilnahme (rueckmeldung_id, person_id, status) "
+             "VALUES (:r, :p, 'anwesend')"),
+        [{"r": rnd.randint(1, sitzungen), "p": rnd.randint(1, personen)} for _ in range(eintraege)]
+    )
+    conn.execute(
+        text("INSERT INTO leistungs_rueckmeldung (person_id, lernfeld_id, datum, thema, rueckmeldung) "
+             "VALUES (:p, :lf, :d, 'Test', 'gut')"),
+        [{"p": rnd.randint(1, personen), "lf": rnd.randint(1, lernfelder),
+          "d": start + timedelta(days=rnd.randint(0, 3 * 365))} for _ in range(eintraege // 10)]
+    )
+
+
+def messen(conn, wiederholungen):
+    heute = date.today()
+    parameter = {"pid": 7, "lf": 3, "lg": 2,
+                 "start": datetime(heute.year, heute.month, heute.day) - timedelta(days=30),
+                 "ende": datetime(heute.year, heute.month, heute.day) - timedelta(days=29)}
+    ergebnisse = {}
+    for name, (sql,) in ABFRAGEN.items():
+        plan = [z[-1] for z in conn.execute(text("EXPLAIN QUERY PLAN " + sql), parameter)]
+        t0 = time.perf_counter()
+        for _ in range(wiederholungen):
+            conn.execute(text(sql), parameter).fetchall()
+        ms = (time.perf_counter() - t0) / wiederholungen * 1000
+        ergebnisse[name] = (plan, ms)
+    return ergebnisse
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--personen", type=int, default=600)
+    parser.add_argument("--eintraege", type=int, default=100_000)
+    parser.add_argument("--wiederholungen", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.sqlite')}")
+        db.metadata.create_all(engine)
+        indizes = [ix for t in db.metadata.sorted_tables for ix in t.indexes]
+
+        with engine.begin() as conn:
+            for ix in indizes:
+                ix.drop(conn)
+            befuellen(conn, args.personen, args.eintraege)
+            conn.execute(text("ANALYZE"))
+
+        with engine.connect() as conn:
+            ohne = messen(conn, args.wiederholungen)
+        with engine.begin() as conn:
+            for ix in indizes:
+                ix.create(conn)
+            conn.execute(text("ANALYZE"))
+        with engine.connect() as conn:
+            mit = messen(conn, args.wiederholungen)
+        engine.dispose()
+
+    for name in ABFRAGEN:
+        (plan_ohne, ms_ohne), (plan_mit, ms_mit) = ohne[name], mit[name]
+        print(f"\n{name}")
+        print(f"  ohne Indizes: {ms_ohne:8.3f} ms   " + " | ".join(plan_ohne))
+        print(f"  mit Indizes:  {ms_mit:8.3f} ms   " + " | ".join(plan_mit))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""Erzeugt einen synthetischen Datenbestand in Schulgröße.
+
+Lerngruppen mit je einigen Dutzend Kindern, dazu über mehrere Schuljahre
+Freiarbeit-Einträge an jedem Schultag, tägliche Kurse je Lerngruppe mit
+allen Teilnahmen, Leistungsrückmeldungen und Themenzuweisungen. Die Daten
+sind mit ``seed`` reproduzierbar. Geschrieben wird per executemany an den
+ORM-Events vorbei; Wochenplan und Anwesenheits-Rollups werden danach neu
+berechnet, der Volltextindex füllt sich über seine Trigger.
+
+    python benchmarks/testdaten.py ziel.sqlite --gruppen 12 --personen-je-gruppe 25 --jahre 2
+"""
+import argparse
+import os
+import random
+import sys
+from datetime import date, datetime, time, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import insert, text  # noqa: E402
+
+from app.models import (  # noqa: E402
+    FreiarbeitEintrag, KursRueckmeldung, KursTeilnahme, Lerngruppe, Lernfeld,
+    LeistungsRueckmeldung, Person, ThemaLLK, ThemaZuweisung,
+)
+
+BATCHGROESSE = 5000
+
+LERNFELDER = {
+    "Mathematik":   ["Bruchrechnung", "Dezimalbrüche", "Prozentrechnung", "Terme", "Gleichungen",
+                     "Geometrie: Flächen", "Körper", "Funktionen", "Wahrscheinlichkeit"],
+    "Deutsch":      ["Lesetagebuch", "Rechtschreibung", "Erörterung", "Gedichte", "Grammatik",
+                     "Kurzgeschichten", "Bericht schreiben"],
+    "Englisch":     ["Simple Past", "Present Perfect", "Vokabeln Unit 3", "Reading", "Letter writing"],
+    "Naturwissenschaften": ["Pflanzen", "Stromkreise", "Wasser", "Ökosystem Wald", "Optik", "Magnetismus"],
+    "Gesellschaft": ["Antike", "Mittelalter", "Kartenkunde", "Demokratie", "Klima und Zonen"],
+    "Kunst":        ["Farblehre", "Perspektive", "Collage", "Druck"],
+    "Musik":        ["Rhythmus", "Notenlehre", "Instrumente"],
+    "Informatik":   ["Algorithmen", "Scratch", "Tabellenkalkulation", "Daten und Codierung"],
+}
+GRUPPEN = ["Ameisen", "Apfel", "Bären", "Dachs", "Eulen", "Füchse", "Igel", "Kraniche",
+           "Luchse", "Otter", "Raben", "Wölfe", "Zebra", "Biber", "Falken", "Hasen"]
+VORNAMEN = ["Ali", "Anna", "Ben", "Clara", "David", "Elif", "Emil", "Emma", "Finn", "Greta",
+            "Hannah", "Jonas", "Jule", "Karim", "Lea", "Leon", "Lina", "Luca", "Marie", "Mats",
+            "Mia", "Noah", "Nora", "Ole", "Paul", "Piet", "Sara", "Sophie", "Theo", "Zoe",
+            "Jürgen", "Özlem", "Björn", "Ayşe", "Renée", "Søren"]
+NACHNAMEN = ["Müller", "Schmidt", "Schneider", "Fischer", "Weber", "Meyer", "Wagner", "Becker",
+             "Schulz", "Hoffmann", "Schäfer", "Koch", "Bauer", "Richter", "Klein", "Wolf",
+             "Schröder", "Neumann", "Schwarz", "Zimmermann", "Braun", "Krüger", "Hofmann",
+             "Hartmann", "Lange", "Yılmaz", "Kaya", "Nowak", "Öztürk", "Weiß"]
+SPITZNAMEN = ["Bibi", "Charly", "Flocke", "Jojo", "Kiki", "Lu", "Maxi", "Pünktchen", "Sunny"]
+NOTIZEN = ["", "", "", "konzentriert gearbeitet", "braucht Hilfe bei den Aufgaben",
+           "hat Material vergessen", "mit Partner gearbeitet", "Test vorbereitet",
+           "Station 3 abgeschlossen", "sehr ausdauernd, viele Aufgaben geschafft"]
+PHASEN_START = [time(7, 30), time(9, 0), time(10, 30), time(12, 0), time(13, 30), time(15, 0), time(16, 30)]
+
+
+def schultage(von, bis):
+    """Montag bis Freitag ohne Sommerferien (KW 28–33) und Weihnachten."""
+    tag = von
+    while tag <= bis:
+        kw = tag.isocalendar()[1]
+        if tag.weekday() < 5 and not 28 <= kw <= 33 and kw not in (52, 1):
+            yield tag
+        tag += timedelta(days=1)
+
+
+def _einfuegen(connection, model, zeilen):
+    """Schreibt ein Iterable von Dicts blockweise per executemany."""
+    batch = []
+    anzahl = 0
+    for zeile in zeilen:
+        batch.append(zeile)
+        if len(batch) >= BATCHGROESSE:
+            connection.execute(insert(model), batch)
+            anzahl += len(batch)
+            batch = []
+    if batch:
+        connection.execute(insert(model), batch)
+    return anzahl + len(batch)
+
+
+def erzeugen(connection, gruppen=12, personen_je_gruppe=25, jahre=2, eintraege_pro_tag=1.0,
+             leistungen_pro_jahr=6, seed=42, bis=None):
+    """Befüllt eine leere, migrierte Datenbank; gibt die Zeilenzahlen je Tabelle zurück."""
+    rnd = random.Random(seed)
+    bis = bis or date.today()
+    tage = list(schultage(bis - timedelta(days=round(365.25 * jahre)), bis))
+    anzahl = {}
+
+    lernfelder = list(LERNFELDER)
+    anzahl["lernfeld"] = _einfuegen(connection, Lernfeld, (
+        {"id": i, "name": name} for i, name in enumerate(lernfelder, 1)
+    ))
+    themen = {i: LERNFELDER[name] for i, name in enumerate(lernfelder, 1)}
+    anzahl["thema_llk"] = _einfuegen(connection, ThemaLLK, (
+        {"lernfeld_id": lf, "thema": t, "thema_notiz": ""} for lf, liste in themen.items() for t in liste
+    ))
+
+    gruppen_namen = [
+        f"{GRUPPEN[i % len(GRUPPEN)]}geister" + (f" {i // len(GRUPPEN) + 1}" if i >= len(GRUPPEN) else "")
+        for i in range(gruppen)
+    ]
+    anzahl["lerngruppe"] = _einfuegen(connection, Lerngruppe, (
+        {"id": i, "name": name} for i, name in enumerate(gruppen_namen, 1)
+    ))
+
+    mitglieder = {}          # lerngruppe_id -> [person_id]
+    personen = []
+    for gid in range(1, gruppen + 1):
+        for _ in range(personen_je_gruppe):
+            pid = len(personen) + 1
+            mitglieder.setdefault(gid, []).append(pid)
+            foerder = rnd.random() < 0.15
+            personen.append({
+                "id": pid,
+                "vorname": rnd.choice(VORNAMEN),
+                "nachname": rnd.choice(NACHNAMEN),
+                "spitzname": rnd.choice(SPITZNAMEN) if rnd.random() < 0.1 else None,
+                "lerngruppe_id": gid,
+                "stufe": rnd.randint(5, 10),
+                "foerderbedarf": "LRS" if foerder else "",
+                "foerderbedarf_massnahmen": "Zeitzugabe bei Tests" if foerder else "",
+                "ziele": "Selbstständig mit dem Lernplan arbeiten" if rnd.random() < 0.3 else "",
+            })
+    anzahl["person"] = _einfuegen(connection, Person, personen)
+
+    anzahl["thema_zuweisung"] = _einfuegen(connection, ThemaZuweisung, (
+        {"person_id": p["id"], "lernfeld_id": lf, "thema_basistext": rnd.choice(themen[lf]),
+         "bemerkung": "hat eigenes Material" if rnd.random() < 0.1 else ""}
+        for p in personen for lf in themen if rnd.random() < 0.5
+    ))
+
+    def freiarbeit():
+        ganz, rest = int(eintraege_pro_tag), eintraege_pro_tag % 1
+        for tag in tage:
+            for p in personen:
+                n = ganz + (rnd.random() < rest)
+                for ap in rnd.sample(range(7), min(n, 7)):
+                    lf = rnd.randint(1, len(lernfelder))
+                    start = PHASEN_START[ap]
+                    yield {
+                        "person_id": p["id"], "datum": tag, "phase": f"{ap}.AP",
+                        "lernfeld_id": lf, "thema_text": rnd.choice(themen[lf]),
+                        "notiz": rnd.choice(NOTIZEN) or None,
+                        "gespeichert_am": datetime.combine(tag, start) + timedelta(minutes=rnd.randint(5, 85)),
+                    }
+    anzahl["freiarbeit_eintrag"] = _einfuegen(connection, FreiarbeitEintrag, freiarbeit())
+
+    # Ein Kurs je Lerngruppe und Schultag, alle Kinder der Gruppe mit Status
+    kurse = []
+    for tag in tage:
+        for gid in mitglieder:
+            lf = rnd.randint(1, len(lernfelder))
+            kurse.append({
+                "id": len(kurse) + 1, "lernfeld_id": lf, "lerngruppe_id": gid, "datum": tag,
+                "phase": f"{rnd.randint(1, 5)}.AP", "thema": rnd.choice(themen[lf]),
+                "gespeichert_am": datetime.combine(tag, time(15, 0)),
+            })
+    anzahl["kurs_rueckmeldung"] = _einfuegen(connection, KursRueckmeldung, kurse)
+
+    def teilnahmen():
+        for k in kurse:
+            for pid in mitglieder[k["lerngruppe_id"]]:
+                abwesend = rnd.random() < 0.08
+                yield {
+                    "rueckmeldung_id": k["id"], "person_id": pid,
+                    "status": "abwesend" if abwesend else "anwesend",
+                    "notiz": "nicht da" if abwesend else rnd.choice(NOTIZEN),
+                }
+    anzahl["kurs_teilnahme"] = _einfuegen(connection, KursTeilnahme, teilnahmen())
+
+    def leistungen():
+        for p in personen:
+            for _ in range(round(leistungen_pro_jahr * jahre)):
+                lf = rnd.randint(1, len(lernfelder))
+                tag = rnd.choice(tage)
+                yield {
+                    "person_id": p["id"], "lernfeld_id": lf, "datum": tag,
+                    "gespeichert_am": datetime.combine(tag, time(17, 0)),
+                    "thema": f"Test {rnd.choice(themen[lf])}",
+                    "rueckmeldung": "Kompetenzen überwiegend sicher, Darstellung noch ungenau.",
+                    "note": rnd.choice(["1", "2", "2-", "3+", "3", "4", None]),
+                }
+    anzahl["leistungs_rueckmeldung"] = _einfuegen(connection, LeistungsRueckmeldung, leistungen())
+
+    # Abgeleitete Tabellen wie nach einem Bulk-Import nachziehen
+    from app import anwesenheit, wochenplan
+    anzahl["wochenplan"] = wochenplan.neu_aufbauen(connection)
+    anzahl["anwesenheit_monat"], anzahl["anwesenheit_woche"] = anwesenheit.neu_aufbauen(connection)
+    connection.execute(text("ANALYZE"))
+    return anzahl
+
+
+def datenbank_anlegen(pfad, **optionen):
+    """Legt eine neue SQLite-Datei an, migriert sie und befüllt sie."""
+    import flask_migrate
+    from app import create_app, db
+
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.abspath(pfad)}",
+        "JOBS_IM_WEBPROZESS": False,
+    })
+    verzeichnis = os.path.join(os.path.dirname(__file__), "..", "migrations")
+    with app.app_context():
+        flask_migrate.upgrade(directory=verzeichnis)
+        anzahl = erzeugen(db.session.connection(), **optionen)
+        db.session.commit()
+        db.engine.dispose()
+    return anzahl
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("ziel", help="neue SQLite-Datei")
+    parser.add_argument("--gruppen", type=int, default=12)
+    parser.add_argument("--personen-je-gruppe", type=int, default=25)
+    parser.add_argument("--jahre", type=float, default=2)
+    parser.add_argument("--eintraege-pro-tag", type=float, default=1.0,
+                        help="Freiarbeit-Einträge je Kind und Schultag (Mittel)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    if os.path.exists(args.ziel):
+        parser.error(f"{args.ziel} existiert bereits.")
+
+    anzahl = datenbank_anlegen(
+        args.ziel, gruppen=args.gruppen, personen_je_gruppe=args.personen_je_gruppe,
+        jahre=args.jahre, eintraege_pro_tag=args.eintraege_pro_tag, seed=args.seed,
+    )
+    for tabelle, n in anzahl.items():
+        print(f"{tabelle:24} {n:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,3 +5,62 @@ SECRET_KEY = "supergeheim"
 SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(BASE_DIR, 'datenbank.sqlite')}"
 SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+
+# SQLite-Tuning (siehe app/datenbank.py)
+SQLITE_JOURNAL_MODE = "WAL"
+SQLITE_SYNCHRONOUS = "NORMAL"
+SQLITE_BUSY_TIMEOUT = 5000          # ms
+SQLITE_CACHE_SIZE = -32000          # KiB (negativ) bzw. Seiten (positiv)
+SQLITE_MMAP_SIZE = 256 * 1024 * 1024
+SQLITE_TEMP_STORE = "MEMORY"
+SQLITE_POOL_SIZE = 10
+SQLITE_MAX_OVERFLOW = 10
+SQLITE_POOL_TIMEOUT = 30            # s
+
+# Fehlzeiten-Warnung in der Übersicht: mehr als so viele Fehlzeiten pro Monat
+ANWESENHEIT_WARNSCHWELLE = 3
+
+# Live-Liste im Freiarbeit-Formular (siehe app/live.py). Jeder offene Stream
+# belegt einen Server-Thread – server.py begrenzt LIVE_MAX_VERBINDUNGEN auf
+# --threads minus 1; 0 = kein Stream, die Formulare fragen regelmäßig nach.
+LIVE_MAX_VERBINDUNGEN = 4
+LIVE_ABFRAGE_INTERVALL = 5          # s
+LIVE_DAUER = 300                    # s
+LIVE_POLL_INTERVALL = 15            # s, ohne Stream
+
+# Sammel-Berichte (siehe app/berichte.py)
+BERICHTE_PROZESSE = 1               # Render-Prozesse; None = Anzahl CPU-Kerne
+
+# Hintergrund-Jobs (siehe app/jobs.py). Unter gunicorn startet server.py einen
+# eigenen Job-Prozess; JOBS_IM_WEBPROZESS gilt dann nicht.
+JOBS_THREADS = 2
+JOBS_IM_WEBPROZESS = True
+JOBS_AUFBEWAHREN_TAGE = 7
+
+# Laufzeitmessung je Request (siehe app/messung.py): Server-Timing-Header,
+# /metrics und Log-Einträge für langsame Requests und Abfragen
+MESSUNG_AKTIV = False
+MESSUNG_STICHPROBE = 1.0            # Anteil gemessener Requests
+MESSUNG_LANGSAM_MS = 500
+MESSUNG_VIELE_ABFRAGEN = 50
+MESSUNG_LANGSAME_ABFRAGE_MS = 100
+
+# HTTP-Caching (siehe app/httpcache.py): ETags/304 für Referenzdaten und
+# Such-APIs, Browser-Cache für /static
+HTTP_CACHE_AKTIV = True
+STATIC_MAX_AGE = 3600               # s
+
+# Statische Dateien (siehe app/assets.py): ``flask assets-bauen`` holt die
+# Bibliotheken nach static/vendor und baut static/dist; ohne Build CDN
+ASSETS_MAX_AGE = 365 * 24 * 3600    # s, gebaute Dateien tragen einen Hash im Namen
+ASSETS_OFFLINE = False              # True im Netz ohne Internet: kein CDN, fehlender Build = Fehler
+
+# gzip für HTML/JSON/CSV (siehe app/kompression.py)
+KOMPRESSION_AKTIV = True
+KOMPRESSION_MIN_BYTES = 1024
+KOMPRESSION_STUFE = 6
+
+# Templates beim Start übersetzen, Bytecode unter instance/jinja-cache
+# (siehe app/vorlagen.py); beim Deploy: flask templates-kompilieren
+TEMPLATE_CACHE_AKTIV = True
+TEMPLATES_VORKOMPILIEREN = True
@@ -0,0 +1,46 @@
+"""Indizes für häufige Abfragen
+
+Revision ID: 3f6c2a91d4e7
+Revises: 01b7b9982170
+Create Date: 2026-10-18 09:12:40.118230
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f6c2a91d4e7'
+down_revision = '01b7b9982170'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Doppelte Themenzuweisungen entfernen, bevor der Unique-Index greift.
+    # Behalten wird die älteste Zeile – die hat .first() bisher geliefert.
+    op.execute(
+        "DELETE FROM thema_zuweisung WHERE id NOT IN ("
+        " SELECT MIN(id) FROM thema_zuweisung GROUP BY person_id, lernfeld_id)"
+    )
+
+    op.create_index('ix_person_lerngruppe_name', 'person', ['lerngruppe_id', 'vorname', 'nachname'], unique=False)
+    op.create_index('uq_thema_zuweisung_person_lernfeld', 'thema_zuweisung', ['person_id', 'lernfeld_id'], unique=True)
+    op.create_index('ix_freiarbeit_eintrag_person_datum', 'freiarbeit_eintrag', ['person_id', 'datum', 'phase'], unique=False)
+    op.create_index('ix_freiarbeit_eintrag_lernfeld_gespeichert', 'freiarbeit_eintrag', ['lernfeld_id', 'gespeichert_am'], unique=False)
+    op.create_index('ix_kurs_teilnahme_person', 'kurs_teilnahme', ['person_id', 'rueckmeldung_id'], unique=False)
+    op.create_index('ix_kurs_teilnahme_rueckmeldung', 'kurs_teilnahme', ['rueckmeldung_id'], unique=False)
+    op.create_index('ix_leistungs_rueckmeldung_person_datum', 'leistungs_rueckmeldung', ['person_id', 'datum'], unique=False)
+
+    # Statistiken für den Query-Planer auffrischen
+    op.execute("ANALYZE")
+
+
+def downgrade():
+    op.drop_index('ix_leistungs_rueckmeldung_person_datum', table_name='leistungs_rueckmeldung')
+    op.drop_index('ix_kurs_teilnahme_rueckmeldung', table_name='kurs_teilnahme')
+    op.drop_index('ix_kurs_teilnahme_person', table_name='kurs_teilnahme')
+    op.drop_index('ix_freiarbeit_eintrag_lernfeld_gespeichert', table_name='freiarbeit_eintrag')
+    op.drop_index('ix_freiarbeit_eintrag_person_datum', table_name='freiarbeit_eintrag')
+    op.drop_index('uq_thema_zuweisung_person_lernfeld', table_name='thema_zuweisung')
+    op.drop_index('ix_person_lerngruppe_name', table_name='person')
@@ -0,0 +1,77 @@
+"""Vorberechneter Wochenplan
+
+Revision ID: 5e2b7f3a9c10
+Revises: c47e93b1f0a2
+Create Date: 2026-10-18 13:12:45.218330
+
+"""
+import json
+from datetime import date
+from itertools import groupby
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e2b7f3a9c10'
+down_revision = 'c47e93b1f0a2'
+branch_labels = None
+depends_on = None
+
+
+# Stand von app.wochenplan.zellen_berechnen bei dieser Revision – bewusst
+# kopiert, damit die Migration nicht mit dem App-Code mitwandert
+def _phase_nummer(phase):
+    try:
+        return int(phase.split(".")[0])
+    except (AttributeError, ValueError):
+        return -1
+
+
+def _zellen_berechnen(eintraege):
+    raster = {}
+    for datum, phase, lernfeld_id, thema, notiz in eintraege:
+        ap = _phase_nummer(phase)
+        tag = datum.isoweekday()
+        if 0 <= ap <= 6 and 1 <= tag <= 5 and lernfeld_id:
+            raster[ap, tag] = [ap, tag, lernfeld_id, thema or "", notiz or ""]
+    return json.dumps(sorted(raster.values()), ensure_ascii=False, separators=(",", ":"))
+
+
+def upgrade():
+    wochenplan = op.create_table('wochenplan',
+    sa.Column('person_id', sa.Integer(), nullable=False),
+    sa.Column('jahr', sa.Integer(), nullable=False),
+    sa.Column('kw', sa.Integer(), nullable=False),
+    sa.Column('montag', sa.Date(), nullable=False),
+    sa.Column('zellen', sa.Text(), nullable=False),
+    sa.ForeignKeyConstraint(['person_id'], ['person.id'], ),
+    sa.PrimaryKeyConstraint('person_id', 'jahr', 'kw')
+    )
+
+    # Bestehende Einträge einmal durchrechnen
+    eintrag = sa.table('freiarbeit_eintrag',
+        sa.column('id', sa.Integer), sa.column('person_id', sa.Integer),
+        sa.column('datum', sa.Date), sa.column('phase', sa.String),
+        sa.column('lernfeld_id', sa.Integer), sa.column('thema_text', sa.String),
+        sa.column('notiz', sa.Text))
+    conn = op.get_bind()
+    zeilen = conn.execute(
+        sa.select(eintrag.c.person_id, eintrag.c.datum, eintrag.c.phase, eintrag.c.lernfeld_id,
+                  eintrag.c.thema_text, eintrag.c.notiz)
+        .order_by(eintrag.c.person_id, eintrag.c.datum.desc(), eintrag.c.phase, eintrag.c.id)
+    ).all()
+    wochen = []
+    for (pid, jahr, kw), gruppe in groupby(zeilen, key=lambda z: (z[0], *z[1].isocalendar()[:2])):
+        wochen.append({
+            'person_id': pid, 'jahr': jahr, 'kw': kw,
+            'montag': date.fromisocalendar(jahr, kw, 1),
+            'zellen': _zellen_berechnen(z[1:] for z in gruppe),
+        })
+    if wochen:
+        op.bulk_insert(wochenplan, wochen)
+
+
+def downgrade():
+    op.drop_table('wochenplan')
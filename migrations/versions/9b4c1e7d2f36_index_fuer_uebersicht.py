@@ -0,0 +1,25 @@
+"""Index für die Übersicht (Freiarbeit je Person und Lernfeld)
+
+Revision ID: 9b4c1e7d2f36
+Revises: 5e2b7f3a9c10
+Create Date: 2026-10-18 14:03:19.774102
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9b4c1e7d2f36'
+down_revision = '5e2b7f3a9c10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_freiarbeit_eintrag_person_lernfeld', 'freiarbeit_eintrag', ['person_id', 'lernfeld_id', 'datum'], unique=False)
+    op.execute("ANALYZE freiarbeit_eintrag")
+
+
+def downgrade():
+    op.drop_index('ix_freiarbeit_eintrag_person_lernfeld', table_name='freiarbeit_eintrag')
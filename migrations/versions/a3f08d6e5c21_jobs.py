@@ -0,0 +1,44 @@
+"""Tabelle für Hintergrund-Jobs
+
+Revision ID: a3f08d6e5c21
+Revises: e5a93c0d7b12
+Create Date: 2026-10-18 17:05:11.640937
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3f08d6e5c21'
+down_revision = 'e5a93c0d7b12'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('job',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('art', sa.String(length=50), nullable=False),
+    sa.Column('parameter', sa.Text(), nullable=False),
+    sa.Column('zustand', sa.String(length=20), nullable=False),
+    sa.Column('fertig', sa.Integer(), nullable=False),
+    sa.Column('gesamt', sa.Integer(), nullable=True),
+    sa.Column('ergebnis', sa.Text(), nullable=True),
+    sa.Column('fehler', sa.Text(), nullable=True),
+    sa.Column('worker', sa.String(length=100), nullable=True),
+    sa.Column('erstellt_am', sa.DateTime(), nullable=False),
+    sa.Column('gestartet_am', sa.DateTime(), nullable=True),
+    sa.Column('aktualisiert_am', sa.DateTime(), nullable=True),
+    sa.Column('beendet_am', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('job', schema=None) as batch_op:
+        batch_op.create_index('ix_job_zustand', ['zustand', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('job', schema=None) as batch_op:
+        batch_op.drop_index('ix_job_zustand')
+
+    op.drop_table('job')
@@ -0,0 +1,28 @@
+"""FreiarbeitEintrag.client_id für die Offline-Warteschlange
+
+Revision ID: c47e93b1f0a2
+Revises: 8a1d5e0c2b94
+Create Date: 2026-10-18 11:58:23.671904
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c47e93b1f0a2'
+down_revision = '8a1d5e0c2b94'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('freiarbeit_eintrag', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('client_id', sa.String(length=36), nullable=True))
+        batch_op.create_unique_constraint('uq_freiarbeit_eintrag_client_id', ['client_id'])
+
+
+def downgrade():
+    with op.batch_alter_table('freiarbeit_eintrag', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_freiarbeit_eintrag_client_id', type_='unique')
+        batch_op.drop_column('client_id')
@@ -0,0 +1,95 @@
+"""Anwesenheits-Rollups je Monat und Woche
+
+Revision ID: d81f6a2c4b57
+Revises: 9b4c1e7d2f36
+Create Date: 2026-10-18 14:47:02.390615
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd81f6a2c4b57'
+down_revision = '9b4c1e7d2f36'
+branch_labels = None
+depends_on = None
+
+
+# Stand von app.anwesenheit.rollups_berechnen bei dieser Revision – bewusst
+# kopiert, damit die Migration nicht mit dem App-Code mitwandert
+def _rollups_berechnen(zeilen):
+    monate, wochen = {}, {}
+    for person_id, lernfeld_id, lerngruppe_id, datum, anwesend, abwesend in zeilen:
+        if lernfeld_id is not None:
+            m = monate.setdefault((person_id, lernfeld_id, datum.year, datum.month), [0, 0])
+            m[0] += anwesend
+            m[1] += abwesend
+        if lerngruppe_id is not None:
+            jahr, kw, _ = datum.isocalendar()
+            w = wochen.setdefault((lerngruppe_id, jahr, kw), [0, 0])
+            w[0] += anwesend
+            w[1] += abwesend
+    return monate, wochen
+
+
+def upgrade():
+    monat = op.create_table('anwesenheit_monat',
+    sa.Column('person_id', sa.Integer(), nullable=False),
+    sa.Column('lernfeld_id', sa.Integer(), nullable=False),
+    sa.Column('jahr', sa.Integer(), nullable=False),
+    sa.Column('monat', sa.Integer(), nullable=False),
+    sa.Column('anwesend', sa.Integer(), nullable=False),
+    sa.Column('abwesend', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['lernfeld_id'], ['lernfeld.id'], ),
+    sa.ForeignKeyConstraint(['person_id'], ['person.id'], ),
+    sa.PrimaryKeyConstraint('person_id', 'lernfeld_id', 'jahr', 'monat')
+    )
+    with op.batch_alter_table('anwesenheit_monat', schema=None) as batch_op:
+        batch_op.create_index('ix_anwesenheit_monat_zeitraum', ['jahr', 'monat', 'person_id'], unique=False)
+
+    woche = op.create_table('anwesenheit_woche',
+    sa.Column('lerngruppe_id', sa.Integer(), nullable=False),
+    sa.Column('jahr', sa.Integer(), nullable=False),
+    sa.Column('kw', sa.Integer(), nullable=False),
+    sa.Column('anwesend', sa.Integer(), nullable=False),
+    sa.Column('abwesend', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['lerngruppe_id'], ['lerngruppe.id'], ),
+    sa.PrimaryKeyConstraint('lerngruppe_id', 'jahr', 'kw')
+    )
+
+    # Vorhandene Kurs-Teilnahmen einmal aufsummieren
+    kt = sa.table('kurs_teilnahme',
+        sa.column('rueckmeldung_id', sa.Integer), sa.column('person_id', sa.Integer),
+        sa.column('status', sa.String))
+    kr = sa.table('kurs_rueckmeldung',
+        sa.column('id', sa.Integer), sa.column('lernfeld_id', sa.Integer),
+        sa.column('lerngruppe_id', sa.Integer), sa.column('datum', sa.Date))
+    zeilen = op.get_bind().execute(
+        sa.select(
+            kt.c.person_id, kr.c.lernfeld_id, kr.c.lerngruppe_id, kr.c.datum,
+            sa.func.sum(sa.case((kt.c.status == 'anwesend', 1), else_=0)),
+            sa.func.sum(sa.case((kt.c.status == 'abwesend', 1), else_=0)),
+        )
+        .join(kr, kt.c.rueckmeldung_id == kr.c.id)
+        .group_by(kt.c.person_id, kr.c.lernfeld_id, kr.c.lerngruppe_id, kr.c.datum)
+    ).all()
+    monate, wochen = _rollups_berechnen(zeilen)
+    if monate:
+        op.bulk_insert(monat, [
+            {'person_id': p, 'lernfeld_id': lf, 'jahr': j, 'monat': m, 'anwesend': anw, 'abwesend': abw}
+            for (p, lf, j, m), (anw, abw) in monate.items()
+        ])
+    if wochen:
+        op.bulk_insert(woche, [
+            {'lerngruppe_id': lg, 'jahr': j, 'kw': kw, 'anwesend': anw, 'abwesend': abw}
+            for (lg, j, kw), (anw, abw) in wochen.items()
+        ])
+
+
+def downgrade():
+    op.drop_table('anwesenheit_woche')
+    with op.batch_alter_table('anwesenheit_monat', schema=None) as batch_op:
+        batch_op.drop_index('ix_anwesenheit_monat_zeitraum')
+
+    op.drop_table('anwesenheit_monat')
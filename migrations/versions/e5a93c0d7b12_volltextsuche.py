@@ -0,0 +1,118 @@
+"""Volltextsuche (FTS5) über alle Freitexte
+
+Revision ID: e5a93c0d7b12
+Revises: d81f6a2c4b57
+Create Date: 2026-10-18 16:12:40.118204
+
+"""
+from collections import namedtuple
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5a93c0d7b12'
+down_revision = 'd81f6a2c4b57'
+branch_labels = None
+depends_on = None
+
+
+# Virtuelle Tabelle und Trigger kennt SQLAlchemy nicht. Stand von
+# app.volltext (ddl(), neu_aufbauen()) bei dieser Revision – bewusst
+# kopiert, damit die Migration nicht mit dem App-Code mitwandert.
+TABELLE = "volltext"
+TOKENIZER = "unicode61 remove_diacritics 2"
+
+Quelle = namedtuple("Quelle", "code tabelle titel inhalt person_id lernfeld_id datum")
+
+_KURS = "(SELECT {feld} FROM kurs_rueckmeldung WHERE id = {t}.rueckmeldung_id)"
+
+QUELLEN = {
+    "freiarbeit": Quelle(
+        1, "freiarbeit_eintrag", "{t}.thema_text", "{t}.notiz",
+        "{t}.person_id", "{t}.lernfeld_id", "{t}.datum",
+    ),
+    "kurs": Quelle(
+        2, "kurs_teilnahme", _KURS.format(feld="thema", t="{t}"), "{t}.notiz",
+        "{t}.person_id", _KURS.format(feld="lernfeld_id", t="{t}"), _KURS.format(feld="datum", t="{t}"),
+    ),
+    "leistung": Quelle(
+        3, "leistungs_rueckmeldung", "{t}.thema", "{t}.rueckmeldung",
+        "{t}.person_id", "{t}.lernfeld_id", "{t}.datum",
+    ),
+    "zuweisung": Quelle(
+        4, "thema_zuweisung", "{t}.thema_basistext", "{t}.bemerkung",
+        "{t}.person_id", "{t}.lernfeld_id", "NULL",
+    ),
+    "foerderbedarf": Quelle(
+        5, "person", "NULL",
+        "trim(coalesce({t}.foerderbedarf, '') || ' ' || coalesce({t}.foerderbedarf_massnahmen, ''))",
+        "{t}.id", "NULL", "NULL",
+    ),
+}
+
+_NUR_MIT_TEXT = "coalesce({titel}, '') || coalesce({inhalt}, '') <> ''"
+_KURS_NUR_MIT_NOTIZ = "coalesce({t}.notiz, '') <> ''"
+_EINFUEGEN = f"INSERT INTO {TABELLE} (rowid, titel, inhalt, person_id, lernfeld_id, datum) "
+
+
+def _select(art, t):
+    q = QUELLEN[art]
+    spalten = {f: getattr(q, f).format(t=t) for f in ("titel", "inhalt", "person_id", "lernfeld_id", "datum")}
+    bedingung = (_KURS_NUR_MIT_NOTIZ.format(t=t) if art == "kurs"
+                 else _NUR_MIT_TEXT.format(**spalten))
+    return (
+        f"SELECT {t}.id * 8 + {q.code}, {spalten['titel']}, {spalten['inhalt']}, "
+        f"{spalten['person_id']}, {spalten['lernfeld_id']}, {spalten['datum']}"
+        f"{' FROM ' + q.tabelle + ' AS ' + t if t != 'NEW' else ''} WHERE {bedingung}"
+    )
+
+
+def _ddl():
+    anweisungen = [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABELLE} USING fts5("
+        "titel, inhalt, person_id UNINDEXED, lernfeld_id UNINDEXED, datum UNINDEXED, "
+        f"tokenize = '{TOKENIZER}')"
+    ]
+    for art, q in QUELLEN.items():
+        loeschen = f"DELETE FROM {TABELLE} WHERE rowid = OLD.id * 8 + {q.code};"
+        einfuegen = _EINFUEGEN + _select(art, "NEW") + ";"
+        anweisungen += [
+            f"CREATE TRIGGER IF NOT EXISTS {TABELLE}_{q.tabelle}_ai AFTER INSERT ON {q.tabelle} "
+            f"BEGIN {einfuegen} END",
+            f"CREATE TRIGGER IF NOT EXISTS {TABELLE}_{q.tabelle}_au AFTER UPDATE ON {q.tabelle} "
+            f"BEGIN {loeschen} {einfuegen} END",
+            f"CREATE TRIGGER IF NOT EXISTS {TABELLE}_{q.tabelle}_ad AFTER DELETE ON {q.tabelle} "
+            f"BEGIN {loeschen} END",
+        ]
+    kurs = QUELLEN["kurs"]
+    anweisungen.append(
+        f"CREATE TRIGGER IF NOT EXISTS {TABELLE}_kurs_rueckmeldung_au AFTER UPDATE ON kurs_rueckmeldung "
+        f"BEGIN DELETE FROM {TABELLE} WHERE rowid IN "
+        f"(SELECT id * 8 + {kurs.code} FROM kurs_teilnahme WHERE rueckmeldung_id = NEW.id); "
+        f"{_EINFUEGEN}{_select('kurs', 't')} AND t.rueckmeldung_id = NEW.id; END"
+    )
+    return anweisungen
+
+
+def _trigger_namen():
+    namen = [f"{TABELLE}_{q.tabelle}_{s}" for q in QUELLEN.values() for s in ("ai", "au", "ad")]
+    return namen + [f"{TABELLE}_kurs_rueckmeldung_au"]
+
+
+def upgrade():
+    verbindung = op.get_bind()
+    for anweisung in _ddl():
+        verbindung.exec_driver_sql(anweisung)
+    # Index einmal aus allen Quellen füllen
+    for art in QUELLEN:
+        verbindung.exec_driver_sql(_EINFUEGEN + _select(art, "t"))
+    verbindung.exec_driver_sql(f"INSERT INTO {TABELLE}({TABELLE}) VALUES ('optimize')")
+
+
+def downgrade():
+    verbindung = op.get_bind()
+    for name in _trigger_namen():
+        verbindung.exec_driver_sql(f"DROP TRIGGER IF EXISTS {name}")
+    verbindung.exec_driver_sql(f"DROP TABLE IF EXISTS {TABELLE}")
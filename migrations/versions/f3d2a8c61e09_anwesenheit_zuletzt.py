@@ -0,0 +1,38 @@
+"""Letzter Anwesenheitstag im Monats-Rollup
+
+Revision ID: f3d2a8c61e09
+Revises: a3f08d6e5c21
+Create Date: 2026-10-18 17:05:41.802213
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3d2a8c61e09'
+down_revision = 'a3f08d6e5c21'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('anwesenheit_monat', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('zuletzt_anwesend', sa.Date(), nullable=True))
+
+    # Bestehende Monate aus den Kurs-Teilnahmen nachtragen
+    op.execute(
+        "UPDATE anwesenheit_monat SET zuletzt_anwesend = ("
+        " SELECT max(kr.datum) FROM kurs_teilnahme AS kt"
+        " JOIN kurs_rueckmeldung AS kr ON kr.id = kt.rueckmeldung_id"
+        " WHERE kt.person_id = anwesenheit_monat.person_id"
+        " AND kr.lernfeld_id = anwesenheit_monat.lernfeld_id"
+        " AND kt.status = 'anwesend'"
+        " AND CAST(strftime('%Y', kr.datum) AS INTEGER) = anwesenheit_monat.jahr"
+        " AND CAST(strftime('%m', kr.datum) AS INTEGER) = anwesenheit_monat.monat)"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('anwesenheit_monat', schema=None) as batch_op:
+        batch_op.drop_column('zuletzt_anwesend')
@@ -1,12 +1,12 @@
 from app import create_app
 from flask import render_template
-from app.models import Lernfeld
+from app.referenzdaten import referenzdaten
 
 app = create_app()
 
 @app.route("/")
 def index():
-    lernfelder = Lernfeld.query.order_by(Lernfeld.name).all()
+    lernfelder = referenzdaten.lernfelder()
     return render_template("index.html", lernfelder=lernfelder)
 
 if __name__ == "__main__":
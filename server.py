@@ -0,0 +1,148 @@
+"""Produktionsserver für LernDoku.
+
+    python server.py --workers 4 --threads 8 --bind 0.0.0.0:8000
+
+Unter Linux/macOS läuft gunicorn: mehrere Worker-Prozesse mit je mehreren
+Threads, Keep-Alive und Neustart ohne Abbruch laufender Anfragen
+(``kill -HUP <master-pid>``). Windows kennt kein fork – dort übernimmt
+waitress mit mehreren Threads in einem Prozess.
+
+Hintergrund-Jobs (Import, Berichte) laufen unter gunicorn in einem eigenen
+Prozess, damit sie keinen Web-Worker belegen; unter waitress als Threads
+im Serverprozess.
+
+Alle Optionen lassen sich auch über Umgebungsvariablen setzen
+(LERNDOKU_BIND, LERNDOKU_WORKERS, LERNDOKU_THREADS, LERNDOKU_KEEPALIVE,
+LERNDOKU_GRACEFUL_TIMEOUT, LERNDOKU_MAX_REQUESTS, LERNDOKU_JOB_THREADS).
+"""
+import argparse
+import os
+import sys
+
+
+def _env(name, standard, typ=str):
+    wert = os.environ.get(f"LERNDOKU_{name}")
+    return typ(wert) if wert is not None else standard
+
+
+def optionen_lesen(argv=None):
+    parser = argparse.ArgumentParser(description="LernDoku-Produktionsserver")
+    parser.add_argument("--bind", default=_env("BIND", "0.0.0.0:8000"))
+    parser.add_argument("--workers", type=int, default=_env("WORKERS", min(4, (os.cpu_count() or 1) * 2), int),
+                        help="Anzahl Worker-Prozesse (nur gunicorn)")
+    parser.add_argument("--threads", type=int, default=_env("THREADS", 8, int),
+                        help="Threads pro Worker")
+    parser.add_argument("--keepalive", type=int, default=_env("KEEPALIVE", 5, int),
+                        help="Sekunden, die eine Keep-Alive-Verbindung offen bleibt")
+    parser.add_argument("--graceful-timeout", type=int, default=_env("GRACEFUL_TIMEOUT", 30, int),
+                        help="Sekunden, die laufende Anfragen beim Neustart noch bekommen")
+    parser.add_argument("--max-requests", type=int, default=_env("MAX_REQUESTS", 2000, int),
+                        help="Worker nach so vielen Anfragen ersetzen (0 = nie)")
+    parser.add_argument("--job-threads", type=int, default=_env("JOB_THREADS", 2, int),
+                        help="Gleichzeitige Hintergrund-Jobs (0 = keine, dann flask jobs-worker starten)")
+    return parser.parse_args(argv)
+
+
+def live_begrenzen(app, threads):
+    """Live-Streams belegen je einen Thread: mindestens einer bleibt für Seiten frei.
+
+    Bei nur einem Thread (sync-Worker) öffnet das Formular keinen Stream und
+    fragt stattdessen regelmäßig nach (siehe app/live.py).
+    """
+    app.config["LIVE_MAX_VERBINDUNGEN"] = max(0, min(app.config["LIVE_MAX_VERBINDUNGEN"], threads - 1))
+
+
+def gunicorn_starten(opt):
+    import signal
+
+    from gunicorn.app.base import BaseApplication
+
+    from app import jobs
+    from app.datenbank import nach_fork
+    from wsgi import app
+
+    # Web-Worker starten keine Job-Threads, das übernimmt der Job-Prozess
+    app.config["JOBS_IM_WEBPROZESS"] = False
+    live_begrenzen(app, opt.threads)
+
+    def post_fork(server, worker):
+        nach_fork(app)
+
+    job_pid = []
+
+    def job_prozess():
+        # Die Signal-Handler des Masters gelten im Kind nicht
+        for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGQUIT, signal.SIGCHLD,
+                    signal.SIGUSR1, signal.SIGUSR2, signal.SIGTTIN, signal.SIGTTOU, signal.SIGWINCH):
+            signal.signal(sig, signal.SIG_DFL)
+        nach_fork(app)
+        jobs.worker_ausfuehren(app, opt.job_threads)
+
+    def when_ready(server):
+        if opt.job_threads <= 0:
+            return
+        # Direkt forken statt multiprocessing.Process: dessen Buchführung erben
+        # sonst die Web-Worker und beenden den Job-Prozess beim eigenen Exit
+        pid = os.fork()
+        if pid == 0:
+            try:
+                job_prozess()
+            finally:
+                os._exit(0)
+        job_pid.append(pid)
+        server.log.info("Job-Prozess gestartet (pid %s)", pid)
+
+    def on_exit(server):
+        for pid in job_pid:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    class LernDokuServer(BaseApplication):
+        def load_config(self):
+            einstellungen = {
+                "bind": opt.bind,
+                "workers": opt.workers,
+                "threads": opt.threads,
+                "worker_class": "gthread" if opt.threads > 1 else "sync",
+                "keepalive": opt.keepalive,
+                "graceful_timeout": opt.graceful_timeout,
+                "max_requests": opt.max_requests,
+                "max_requests_jitter": opt.max_requests // 10,
+                "preload_app": True,
+                "post_fork": post_fork,
+                "when_ready": when_ready,
+                "on_exit": on_exit,
+                "accesslog": "-",
+            }
+            for schluessel, wert in einstellungen.items():
+                self.cfg.set(schluessel, wert)
+
+        def load(self):
+            return app
+
+    LernDokuServer().run()
+
+
+def waitress_starten(opt):
+    from waitress import serve
+
+    from wsgi import app
+
+    app.config["JOBS_THREADS"] = opt.job_threads
+    app.config["JOBS_IM_WEBPROZESS"] = opt.job_threads > 0
+    live_begrenzen(app, opt.workers * opt.threads)
+    if opt.workers > 1:
+        print("Hinweis: waitress läuft in einem Prozess, --workers wird ignoriert.", file=sys.stderr)
+    host, _, port = opt.bind.rpartition(":")
+    serve(app, host=host or "0.0.0.0", port=int(port), threads=opt.workers * opt.threads,
+          channel_timeout=max(opt.keepalive, 30))
+
+
+if __name__ == "__main__":
+    optionen = optionen_lesen()
+    if sys.platform == "win32":
+        waitress_starten(optionen)
+    else:
+        gunicorn_starten(optionen)
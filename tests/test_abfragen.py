@@ -0,0 +1,67 @@
+import os
+import sys
+
+import pytest
+from sqlalchemy import event
+
+from app import create_app, db
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "benchmarks"))
+import testdaten  # noqa: E402
+
+# SQL-Abfragen je Aufruf. Die Zahl hängt nicht von der Datenmenge ab – jeder
+# Endpunkt wird gegen zwei verschieden große Bestände geprüft, ein N+1-Muster
+# fällt so sofort auf. Der Stand der Tabellenversionen (Caches) zählt mit.
+ABFRAGEN = {
+    "personen.liste": ("/personen/", 2),
+    "personen.suche_person": ("/personen/api/suche?q=Mül", 1),
+    "freiarbeit.api_personensuche": ("/freiarbeit/api/personensuche?q=an", 1),
+    "freiarbeit.api_personen": ("/freiarbeit/api/personen?q=an", 1),
+    "kurse.api_personen": ("/kurse/api/personen?lerngruppe_id=1", 1),
+    "personen.detail": ("/personen/1", 2),
+    "personen.tab:wochenplan": ("/personen/1/tabs/wochenplan", 2),
+    "personen.tab:eintragungen_woche": ("/personen/1/tabs/eintragungen_woche", 4),
+    "personen.tab:eintragungen_lernfeld": ("/personen/1/tabs/eintragungen_lernfeld", 2),
+    "personen.tab:lernfeld_eintraege": ("/personen/1/tabs/eintragungen_lernfeld?lernfeld_id=1", 2),
+    "personen.tab:kurs": ("/personen/1/tabs/kurs", 2),
+    "personen.tab:leistungsrueck": ("/personen/1/tabs/leistungsrueck", 2),
+}
+
+# (Lerngruppen, Personen je Gruppe, Jahre) – klein und ein Vielfaches davon
+BESTAENDE = {"klein": (2, 4, 0.1), "gross": (3, 12, 0.5)}
+
+
+@pytest.fixture(scope="module", params=BESTAENDE)
+def client(request):
+    gruppen, personen, jahre = BESTAENDE[request.param]
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+        "JOBS_IM_WEBPROZESS": False,
+        "MESSUNG_AKTIV": False,
+        "TEMPLATES_VORKOMPILIEREN": False,
+        "TEMPLATE_CACHE_AKTIV": False,
+    })
+    app.add_url_rule("/", "index", lambda: "")    # base.html verlinkt die Startseite aus run.py
+    with app.app_context():
+        db.create_all()
+        testdaten.erzeugen(db.session.connection(), gruppen=gruppen,
+                           personen_je_gruppe=personen, jahre=jahre)
+        db.session.commit()
+        engine = db.engine
+
+    # Jeder Aufruf bekommt seinen eigenen App-Kontext (und damit ein frisches g)
+    abfragen = []
+    event.listen(engine, "before_cursor_execute", lambda *a: abfragen.append(a[2]))
+    client = app.test_client()
+    client.abfragen = abfragen
+    yield client
+
+
+@pytest.mark.parametrize("name", ABFRAGEN)
+def test_abfragen_je_endpunkt(client, name):
+    url, erwartet = ABFRAGEN[name]
+    assert client.get(url).status_code == 200     # füllt Caches und Suchindex
+
+    client.abfragen.clear()
+    assert client.get(url).status_code == 200
+    assert len(client.abfragen) == erwartet, "\n\n".join(client.abfragen)
@@ -0,0 +1,63 @@
+import io
+
+import pytest
+from flask import Flask
+
+from app import db
+from app.models import Person
+from app.personenimport import BLOCKGROESSE, personen_importieren
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+
+
+def _csv(*zeilen, fuellung=0):
+    """Kopf, ``fuellung`` Bytes reiner ASCII-Zeilen, dann ``zeilen``."""
+    kopf = "Vorname;Nachname;Lerngruppe\n"
+    ascii_zeile = "Anna;Schmidt;Blau\n"
+    anzahl = fuellung // len(ascii_zeile) + 1
+    return kopf + ascii_zeile * anzahl + "".join(zeilen), anzahl
+
+
+def test_cp1252_umlaut_hinter_dem_ersten_block(app):
+    text, anzahl = _csv("Jörg;Müller;Blau\n", fuellung=BLOCKGROESSE + 1000)
+    daten = text.encode("cp1252")
+    assert daten[:BLOCKGROESSE].isascii()
+
+    ergebnis = personen_importieren(io.BytesIO(daten))
+
+    assert ergebnis.fehler == []
+    assert ergebnis.kodierung == "cp1252"
+    assert ergebnis.angelegt == anzahl + 1
+    assert db.session.query(Person).filter_by(vorname="Jörg", nachname="Müller").count() == 1
+    # Der abgebrochene UTF-8-Durchlauf hat nichts hinterlassen
+    assert db.session.query(Person).count() == anzahl + 1
+
+
+def test_utf8_bleibt_utf8(app):
+    text, anzahl = _csv("Jörg;Müller;Blau\n", fuellung=BLOCKGROESSE + 1000)
+
+    ergebnis = personen_importieren(io.BytesIO(text.encode("utf-8")))
+
+    assert ergebnis.kodierung == "utf-8"
+    assert ergebnis.angelegt == anzahl + 1
+    assert db.session.query(Person).filter_by(nachname="Müller").count() == 1
+
+
+def test_unlesbare_zeile_wird_gemeldet(app):
+    # 0x81 ist weder UTF-8 noch Windows-1252
+    text, anzahl = _csv(fuellung=BLOCKGROESSE + 1000)
+    daten = text.encode("ascii") + b"J\x81rg;M\xfcller;Blau\n"
+
+    ergebnis = personen_importieren(io.BytesIO(daten))
+
+    assert ergebnis.angelegt == 0
+    assert [zeile for zeile, _ in ergebnis.fehler] == [anzahl + 2]
+    assert db.session.query(Person).count() == 0
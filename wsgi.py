@@ -0,0 +1,4 @@
+# Einstiegspunkt für WSGI-Server, z. B.  gunicorn wsgi:app  – oder  python server.py
+from run import app
+
+application = app